@@ -0,0 +1,177 @@
+# Benchmark suite of the title cleaning pipeline: extract_suffixes, name_to_title, camel_case and
+# generate_filename_from_tags, run on a seeded corpus of messy titles (see corpus.py) with the
+# default words to remove and tag mappings. Reports titles per second and the 50th, 90th and
+# 99th percentile latency of each function, and a digest of its results.
+#
+# Runs are compared against baseline_cleaning.json: a function is reported as a regression when
+# it is slower than the baseline by more than the tolerance, or when its results changed. The
+# exit status is then 1. Timings are only comparable on the machine the baseline was saved on;
+# save a new one there with --save-baseline.
+#
+# Usage: python benchmarks/bench_cleaning_suite.py [--titles N] [--seed N] [--repeat N]
+#                                                  [--baseline FILE] [--save-baseline] [--tolerance F]
+
+import gc
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import platform
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from corpus import generate_tracks
+from utils.settings_manager import SettingsManager
+from utils.user_defaults import DEFAULT_BANNED_WORDS, DEFAULT_TAG_MAPPINGS
+from tools.special_cleaner import _extract_suffixes, get_cleaning_rules, SUFFIX_MEMO
+from tools.name_to_tags import name_to_title
+from tools.camel_case import camel_case
+from tools.filename_generators import generate_filename_from_tags
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline_cleaning.json')
+
+
+def default_settings_manager():
+    """A settings manager with the default words to remove and tag mappings, whatever settings.json holds."""
+    return SettingsManager.from_settings({'general': {
+        'words_to_remove': list(DEFAULT_BANNED_WORDS),
+        'tag_mappings': dict(DEFAULT_TAG_MAPPINGS),
+    }})
+
+
+def suite(settings_manager):
+    """The benchmarked functions: name -> function of a track returning what is compared between runs."""
+    rules = get_cleaning_rules(settings_manager)
+
+    def extract(track):
+        # The memo is bypassed, so the cost of the cleaning itself is measured
+        return _extract_suffixes(track.tags.get('title', ''), track.tags.get('artist', ''), rules)
+
+    def to_title(track):
+        name_to_title(track, settings_manager, rules)
+        return track.proposed_tags.get('title'), track.suffixes, track.proposed_filename
+
+    def camel(track):
+        camel_case([track], settings_manager, rules)
+        return track.proposed_tags.get('title'), track.proposed_filename
+
+    def filename(track):
+        return generate_filename_from_tags(track, settings_manager, rules).proposed_filename
+
+    return {
+        'extract_suffixes': extract,
+        'name_to_title': to_title,
+        'camel_case': camel,
+        'generate_filename_from_tags': filename,
+    }
+
+
+def percentile(sorted_values, fraction):
+    """Nearest rank percentile of already sorted values."""
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def measure(function, titles, seed, repeat):
+    """
+    Times `function` on fresh tracks of the corpus, keeping the fastest of `repeat` runs.
+    The garbage collector is paused while timing, so its pauses do not land on random titles.
+    """
+    best = None
+    for _ in range(repeat):
+        tracks = generate_tracks(titles, seed)
+        SUFFIX_MEMO.clear()
+        latencies = []
+        results = []
+        clock = time.perf_counter_ns
+        gc.collect()
+        gc.disable()
+        try:
+            for track in tracks:
+                start = clock()
+                result = function(track)
+                latencies.append(clock() - start)
+                results.append(result)
+        finally:
+            gc.enable()
+        if best is None or sum(latencies) < sum(best[0]):
+            best = latencies, results
+    latencies, results = best
+    latencies.sort()
+    return {
+        'titles_per_second': round(len(latencies) / (sum(latencies) / 1e9)),
+        'p50_us': round(percentile(latencies, 0.50) / 1e3, 2),
+        'p90_us': round(percentile(latencies, 0.90) / 1e3, 2),
+        'p99_us': round(percentile(latencies, 0.99) / 1e3, 2),
+        'digest': hashlib.sha1(repr(results).encode('utf-8')).hexdigest(),
+    }
+
+
+def compare(results, baseline, corpus, tolerance):
+    """Prints the differences with the baseline and returns the names of the regressed functions."""
+    if baseline.get('corpus') != corpus:
+        print(f"The baseline was saved for another corpus ({baseline.get('corpus')}), not compared.")
+        return []
+    regressions = []
+    for name, result in results.items():
+        expected = baseline['results'].get(name)
+        if expected is None:
+            print(f"{name}: not in the baseline")
+            continue
+        problems = []
+        if result['digest'] != expected['digest']:
+            problems.append("results changed")
+        if result['titles_per_second'] * (1 + tolerance) < expected['titles_per_second']:
+            problems.append(f"throughput {result['titles_per_second']} < {expected['titles_per_second']} titles/s")
+        if result['p50_us'] > expected['p50_us'] * (1 + tolerance):
+            problems.append(f"p50 {result['p50_us']} > {expected['p50_us']} us")
+        ratio = result['titles_per_second'] / expected['titles_per_second']
+        print(f"{name:28} {ratio:5.2f}x baseline throughput" + (f"  REGRESSION: {', '.join(problems)}" if problems else ""))
+        if problems:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the title cleaning pipeline against a baseline.")
+    parser.add_argument('--titles', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help="Save this run as the baseline.")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed slowdown, as a fraction of the baseline.")
+    args = parser.parse_args()
+
+    corpus = {'titles': args.titles, 'seed': args.seed}
+    results = {}
+    print(f"{'':28} {'titles/s':>10} {'p50 us':>8} {'p90 us':>8} {'p99 us':>8}")
+    for name, function in suite(default_settings_manager()).items():
+        result = results[name] = measure(function, args.titles, args.seed, args.repeat)
+        print(f"{name:28} {result['titles_per_second']:10d} {result['p50_us']:8.2f} {result['p90_us']:8.2f} {result['p99_us']:8.2f}")
+
+    if args.save_baseline:
+        baseline = {
+            'corpus': corpus,
+            'machine': {'python': platform.python_version(), 'platform': platform.platform(), 'processor': platform.machine()},
+            'results': results,
+        }
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2)
+            f.write('\n')
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; save one with --save-baseline.")
+        return
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    print()
+    if compare(results, baseline, corpus, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+# Times the duplicate name check after each edit of a new name in a large view: the previous
+# check, which gathered the album's tracks from the whole view, rebuilt a TrackStore of them and
+# then looked for any duplicate in the view, against DuplicateNameIndex.update. Both flags are
+# compared after every edit.
+#
+# Usage: python benchmarks/bench_duplicate_index.py [--tracks N] [--album-size N] [--edits N]
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from utils.data_models import Track
+from utils.track_store import TrackStore
+from utils.duplicate_names import DuplicateNameIndex
+
+
+def legacy_check(view, track):
+    """FileBrowser._check_duplicates_for_album before the index."""
+    album_path = os.path.dirname(track.path)
+    album_tracks = [t for t in view if os.path.dirname(t.path) == album_path]
+    duplicates = TrackStore.from_tracks(album_tracks).duplicates('folder', 'new_name')
+    for t, is_duplicate in zip(album_tracks, duplicates):
+        t.has_duplicate = bool(is_duplicate)
+    return any(t.has_duplicate for t in view)
+
+
+def make_view(count, album_size):
+    return [Track(path=f"/music/Artist/Album {i // album_size}/{i:05d}.mp3", filename=f"{i:05d}.mp3", clean_title="",
+                  proposed_filename=f"Artist - Song {i % album_size}.mp3") for i in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the duplicate name check after each edit.")
+    parser.add_argument('--tracks', type=int, default=5000)
+    parser.add_argument('--album-size', type=int, default=12)
+    parser.add_argument('--edits', type=int, default=500)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    edits = [(rng.randrange(args.tracks), f"Artist - Song {rng.randrange(args.album_size * 2)}.mp3")
+             for _ in range(args.edits)]
+
+    view = make_view(args.tracks, args.album_size)
+    start = time.perf_counter()
+    expected = []
+    for index, name in edits:
+        view[index].proposed_filename = name
+        has_duplicates = legacy_check(view, view[index])
+        expected.append((has_duplicates, [t.has_duplicate for t in view[index - index % args.album_size:][:args.album_size]]))
+    before = (time.perf_counter() - start) / len(edits) * 1e6
+
+    view = make_view(args.tracks, args.album_size)
+    duplicate_index = DuplicateNameIndex()
+    duplicate_index.build(view)
+    start = time.perf_counter()
+    results = []
+    for index, name in edits:
+        view[index].proposed_filename = name
+        duplicate_index.update(view[index])
+        results.append((duplicate_index.has_duplicates, [t.has_duplicate for t in view[index - index % args.album_size:][:args.album_size]]))
+    after = (time.perf_counter() - start) / len(edits) * 1e6
+
+    print(f"Tracks in view: {args.tracks}, edits: {len(edits)}")
+    print(f"rescan of the view: {before:9.1f} us/edit")
+    print(f"index update:       {after:9.1f} us/edit ({before / after:.0f}x)")
+    if results != expected:
+        sys.exit("The index and the rescan disagree")
+
+
+if __name__ == '__main__':
+    main()
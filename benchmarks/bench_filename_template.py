@@ -0,0 +1,78 @@
+# Measures the CPU time of generating the filenames of a whole library with the compiled
+# filename template, one call per album (generate_filenames), against the previous
+# generate_filename_from_tags, copied below, which filtered the artist and title one character
+# at a time and ran a regex over the result. Both produce the same names, which is checked.
+# An album holds tracks of one artist folder, each proposing the folder artist, as after a scan.
+#
+# Usage: python benchmarks/bench_filename_template.py [--tracks N] [--album-size N]
+
+import os
+import re
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from corpus import generate_tracks
+from bench_cleaning_suite import default_settings_manager
+from tools.special_cleaner import get_cleaning_rules, normalize_apostrophes
+from tools.name_to_tags import name_to_title
+from tools.filename_generators import generate_filenames
+
+ILLEGAL_FILENAME_CHARS_REGEX = re.compile(r'[\\/:*?"<>|]')
+
+
+def legacy_generate_filename(track, rules):
+    """generate_filename_from_tags before the filename template."""
+    artist = normalize_apostrophes(track.proposed_tags.get('artist', track.tags.get('artist', 'Unknown Artist')))
+    title = normalize_apostrophes(track.proposed_tags.get('title', track.clean_title))
+    title = title.replace(' / ', '-').replace(' \\ ', '-').replace('/', '-').replace('\\', '-')
+    artist = rules.remove_banned_words(artist).strip()
+    title = rules.remove_banned_words(title).strip()
+    _, ext = os.path.splitext(track.filename)
+    safe_artist = "".join(c for c in artist if c.isalnum() or c in " _-()!'&.+@#$%^=;").rstrip()
+    safe_title = "".join(c for c in title if c.isalnum() or c in " _-()!'&.+@#$%^=;").rstrip()
+    suffixes_formatted = ''.join(track.suffixes).replace('/', '-').replace('\\', '-')
+    return ILLEGAL_FILENAME_CHARS_REGEX.sub('', f"{safe_artist} - {safe_title}{suffixes_formatted}{ext}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the filename generation of a whole library.")
+    parser.add_argument('--tracks', type=int, default=100000)
+    parser.add_argument('--album-size', type=int, default=12)
+    args = parser.parse_args()
+
+    settings_manager = default_settings_manager()
+    rules = get_cleaning_rules(settings_manager)
+    tracks = generate_tracks(args.tracks)
+    for track in tracks[::3]:
+        name_to_title(track, settings_manager, rules)
+    by_artist = {}
+    for track in tracks:
+        artist = track.path.split('/')[2]
+        track.proposed_tags['artist'] = artist
+        by_artist.setdefault(artist, []).append(track)
+    albums = [
+        artist_tracks[i:i + args.album_size]
+        for artist_tracks in by_artist.values() for i in range(0, len(artist_tracks), args.album_size)
+    ]
+
+    start = time.process_time()
+    expected = [legacy_generate_filename(track, rules) for track in tracks]
+    before = time.process_time() - start
+
+    start = time.process_time()
+    for album in albums:
+        generate_filenames(album, settings_manager, rules)
+    after = time.process_time() - start
+
+    print(f"Tracks: {len(tracks)} in albums of {args.album_size}")
+    print(f"before: {before:6.3f}s CPU")
+    print(f"after:  {after:6.3f}s CPU ({before / after:.1f}x)")
+    if [track.proposed_filename for track in tracks] != expected:
+        sys.exit("The filenames differ")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+# Compares removing the words to remove with KeywordMatcher and with a single regex alternation
+# of them, as the number of words grows. The regex tries every word at every position, so its
+# cost grows with the number of words; the automaton's does not. Both results are compared.
+#
+# Usage: python benchmarks/bench_keyword_matcher.py [--texts N] [--words N [N ...]]
+
+import os
+import re
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from utils.keyword_matcher import KeywordMatcher
+from utils.user_defaults import DEFAULT_BANNED_WORDS
+
+TEXT_WORDS = ['Love', 'Night', 'Official', 'Video', 'HD', 'Remix', 'feat.', 'Some', 'One', '(Live)', '[Radio Edit]']
+
+
+def make_words(count):
+    """The default words to remove, padded with generated ones up to `count`."""
+    words = list(DEFAULT_BANNED_WORDS)[:count]
+    words.extend(f"Extra Word {i}" for i in range(count - len(words)))
+    return words
+
+
+def per_text(function, texts):
+    start = time.perf_counter()
+    results = [function(text) for text in texts]
+    return (time.perf_counter() - start) / len(texts) * 1e6, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare KeywordMatcher with a regex alternation.")
+    parser.add_argument('--texts', type=int, default=20000)
+    parser.add_argument('--words', type=int, nargs='+', default=[len(DEFAULT_BANNED_WORDS), 200, 1000])
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    texts = [' '.join(rng.choice(TEXT_WORDS) for _ in range(rng.randint(2, 7))) for _ in range(args.texts)]
+    for count in args.words:
+        words = make_words(count)
+        regex = re.compile(r'\b(?:' + '|'.join(map(re.escape, words)) + r')\b', re.IGNORECASE)
+        matcher = KeywordMatcher(words, whole_words=True)
+        regex_time, expected = per_text(lambda text: regex.sub('', text), texts)
+        matcher_time, results = per_text(lambda text: matcher.sub('', text), texts)
+        print(f"{count:5d} words: regex {regex_time:6.1f} us/text, KeywordMatcher {matcher_time:6.1f} us/text")
+        if results != expected:
+            sys.exit("KeywordMatcher and the regex disagree")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+# Times saving a library where most proposed tags already match the files, as after a rescan
+# or re-applying a tool: first writing every proposed tag, as the save did before, then with
+# plan_save, which only writes the tags that differ from the file and skips files that already
+# match. Reports the number of files rewritten by each, and checks the tags left on disk agree.
+#
+# Usage: python benchmarks/bench_save_noop.py [--files N] [--changed F] [--workers N]
+
+import os
+import sys
+import time
+import random
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from mutagen.id3 import ID3, TIT2, TPE1, TALB
+from utils.data_models import Track
+from utils.file_operations import SaveJob, plan_save, iter_save_jobs
+from bench_save_pipeline import MP3_FRAME, library_state
+
+
+def make_library(root, count, changed, seed=1):
+    """Creates the files and returns their tracks, a `changed` share of them with a real change."""
+    rng = random.Random(seed)
+    folder = os.path.join(root, "Album")
+    os.makedirs(folder)
+    tracks = []
+    for i in range(count):
+        filename = f"{i:04d} track.mp3"
+        path = os.path.join(folder, filename)
+        with open(path, 'wb') as f:
+            f.write(MP3_FRAME * 4)
+        tags = ID3()
+        tags.add(TIT2(encoding=3, text=f"Song {i}"))
+        tags.add(TPE1(encoding=3, text="Artist"))
+        tags.add(TALB(encoding=3, text="Album"))
+        tags.save(path)
+        track = Track(path=path, filename=filename, clean_title=f"Song {i}",
+                      tags={'title': f"Song {i}", 'artist': "Artist", 'album': "Album"})
+        # The folder artist and album are proposed again, as they already are
+        track.proposed_tags.update({'artist': "Artist", 'album': "Album"})
+        if rng.random() < changed:
+            track.proposed_tags['genre'] = "Jazz"
+        tracks.append(track)
+    return tracks
+
+
+def run(count, changed, workers, plan):
+    root = tempfile.mkdtemp(prefix='bench_save_noop_')
+    try:
+        jobs = [plan(track) for track in make_library(root, count, changed)]
+        start = time.perf_counter()
+        for _ in iter_save_jobs(jobs, workers):
+            pass
+        elapsed = time.perf_counter() - start
+        written = sum(1 for job in jobs if job.tags is not None)
+        return elapsed, written, library_state(root)
+    finally:
+        shutil.rmtree(root)
+
+
+def write_all(track):
+    """The job the save made before plan_save compared the tags: every proposed tag is written."""
+    return SaveJob(track, track.path, dict(track.proposed_tags), None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time a save of mostly unchanged tags, with and without the tag diff.")
+    parser.add_argument('--files', type=int, default=1000)
+    parser.add_argument('--changed', type=float, default=0.05, help="Share of the files with a real change.")
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    before, written_before, expected = run(args.files, args.changed, args.workers, write_all)
+    after, written_after, state = run(args.files, args.changed, args.workers, plan_save)
+
+    print(f"Files: {args.files}, with a real change: {args.changed:.0%}")
+    print(f"write every proposed tag: {before:6.3f}s, {written_before} files rewritten")
+    print(f"write the differences:    {after:6.3f}s, {written_after} files rewritten ({before / after:.1f}x)")
+    if state != expected:
+        sys.exit("The saved tags differ")
+
+
+if __name__ == '__main__':
+    main()
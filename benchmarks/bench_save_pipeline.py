@@ -0,0 +1,97 @@
+# Times saving the tag changes and renames of a generated library, one file at a time as
+# before (a single save worker) against the save pipeline with several workers. On local disks
+# tag writes are short and the gain is small; on network shares each file costs a round trip,
+# which --latency simulates by adding a delay to every tag write. The files, their tags and
+# the errors of both runs are compared.
+#
+# Usage: python benchmarks/bench_save_pipeline.py [--albums N] [--album-size N] [--workers N] [--latency MS]
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import mutagen
+from mutagen.id3 import ID3, TIT2, TPE1
+import utils.file_operations as file_operations
+from utils.data_models import Track
+from utils.library_cleanup import save_tracks
+
+# One MPEG1 Layer III frame, so mutagen can open the files
+MP3_FRAME = bytes([0xFF, 0xFB, 0x90, 0x64]) + b'\x00' * 413
+
+
+def make_library(root, albums, album_size):
+    """Creates the files and returns tracks with a tag change and a rename each."""
+    tracks = []
+    for a in range(albums):
+        folder = os.path.join(root, f"Album {a}")
+        os.makedirs(folder)
+        for t in range(album_size):
+            filename = f"{t:02d} track.mp3"
+            path = os.path.join(folder, filename)
+            with open(path, 'wb') as f:
+                f.write(MP3_FRAME * 4)
+            tags = ID3()
+            tags.add(TIT2(encoding=3, text=f"Song {t}"))
+            tags.add(TPE1(encoding=3, text="Artist"))
+            tags.save(path)
+            track = Track(path=path, filename=filename, clean_title=f"Song {t}", tags={'title': f"Song {t}", 'artist': "Artist"})
+            track.proposed_tags['genre'] = "Jazz"
+            # Every other album is renumbered onto the names of its own files (a chain)
+            track.proposed_filename = f"{t + 1:02d} track.mp3" if a % 2 else f"Artist - Song {t}.mp3"
+            tracks.append(track)
+    return tracks
+
+
+def library_state(root):
+    state = []
+    for folder, _, files in sorted(os.walk(root)):
+        for filename in sorted(files):
+            path = os.path.join(folder, filename)
+            state.append((os.path.relpath(path, root), sorted(mutagen.File(path, easy=True).items())))
+    return state
+
+
+def run(albums, album_size, workers):
+    root = tempfile.mkdtemp(prefix='bench_save_')
+    try:
+        tracks = make_library(root, albums, album_size)
+        start = time.perf_counter()
+        _, errors, _ = save_tracks(tracks, workers=workers)
+        elapsed = time.perf_counter() - start
+        return elapsed, library_state(root), [error.replace(root, '') for error in errors]
+    finally:
+        shutil.rmtree(root)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time saving a library one file at a time and with the save pipeline.")
+    parser.add_argument('--albums', type=int, default=20)
+    parser.add_argument('--album-size', type=int, default=12)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=5.0, help="Delay added to each tag write, in ms.")
+    args = parser.parse_args()
+
+    write_tags = file_operations._write_tags
+    def slow_write_tags(job):
+        time.sleep(args.latency / 1000)
+        write_tags(job)
+    file_operations._write_tags = slow_write_tags
+
+    before, expected, expected_errors = run(args.albums, args.album_size, 1)
+    after, state, errors = run(args.albums, args.album_size, args.workers)
+
+    print(f"Files: {args.albums * args.album_size}, latency: {args.latency} ms per tag write")
+    print(f"1 worker:   {before:6.3f}s")
+    print(f"{args.workers} workers: {after:6.3f}s ({before / after:.1f}x)")
+    if state != expected or errors != expected_errors:
+        sys.exit("The saved libraries differ")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+# Benchmarks the os.scandir library walker against the previous os.listdir walker.
+# Builds a synthetic Artist/Album/Track tree of empty files in a temporary folder and times
+# both walks, including the stat and read-only checks each one needs per file.
+#
+# Usage: python benchmarks/bench_scan_walker.py [--artists N] [--albums N] [--tracks N] [--repeat N]
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from utils.library_scanner import _walk_library, file_status
+from utils.settings_manager import SettingsManager
+
+
+def build_tree(root, artists, albums, tracks):
+    """Creates the synthetic library, including a few entries that produce warnings."""
+    for a in range(artists):
+        artist_path = os.path.join(root, f"Artist {a:04d}")
+        os.makedirs(artist_path)
+        if a % 10 == 0:
+            open(os.path.join(artist_path, "notes.txt"), 'w').close()
+        for b in range(albums):
+            album_path = os.path.join(artist_path, f"Album {b:02d}")
+            os.makedirs(album_path)
+            if b == 0:
+                open(os.path.join(album_path, "cover.jpg"), 'w').close()
+            for t in range(tracks):
+                open(os.path.join(album_path, f"{t:02d}. Artist {a} - Track {t}.mp3"), 'w').close()
+
+
+def legacy_walk(root_path, settings_manager):
+    """The previous walker: os.listdir plus isdir/isfile/stat/access calls for every entry."""
+    general = settings_manager.get("general", {})
+    excluded_folders = general.get("excluded_folders", [])
+    supported_formats = general.get("supported_audio_formats", [])
+    warnings = []
+    files = 0
+    for artist_name in os.listdir(root_path):
+        artist_path = os.path.join(root_path, artist_name)
+        if not os.path.isdir(artist_path) or artist_name in excluded_folders:
+            continue
+        for item_name in os.listdir(artist_path):
+            item_path = os.path.join(artist_path, item_name)
+            if os.path.isfile(item_path):
+                warnings.append(f"File in artist folder: {item_path}")
+                continue
+            for filename in os.listdir(item_path):
+                file_path = os.path.join(item_path, filename)
+                if os.path.isdir(file_path):
+                    warnings.append(f"Folder in album folder: {file_path}")
+                    continue
+                if os.path.splitext(filename)[1].lower() not in supported_formats:
+                    warnings.append(f"Unsupported audio format: {file_path}")
+                    continue
+                os.stat(file_path)  # size/mtime for the tag cache key
+                if not os.access(file_path, os.W_OK):
+                    warnings.append(f"Read-only file: {file_path}")
+                files += 1
+    return files, len(warnings)
+
+
+def scandir_walk(root_path, settings_manager):
+    """The current walker, followed by the per-file stat/read-only check done by the scan workers."""
+    warnings = 0
+    files = 0
+    for _, artist_entries in _walk_library(root_path, settings_manager, {}):
+        for album_entry in artist_entries:
+            if isinstance(album_entry, str):
+                warnings += 1
+                continue
+            for entry in album_entry[1]:
+                if isinstance(entry, str):
+                    warnings += 1
+                    continue
+                _, is_read_only = file_status(entry[0])
+                warnings += is_read_only
+                files += 1
+    return files, warnings
+
+
+def time_walk(walk, root, settings_manager, repeat):
+    """Returns (best time in seconds, result) over `repeat` runs."""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = walk(root, settings_manager)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the os.scandir library walker against the os.listdir walker.")
+    parser.add_argument('--artists', type=int, default=200)
+    parser.add_argument('--albums', type=int, default=5)
+    parser.add_argument('--tracks', type=int, default=12)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    settings_manager = SettingsManager(os.path.join(os.path.dirname(__file__), '..', 'src', 'settings.json'))
+    with tempfile.TemporaryDirectory() as root:
+        build_tree(root, args.artists, args.albums, args.tracks)
+
+        legacy_time, legacy_result = time_walk(legacy_walk, root, settings_manager, args.repeat)
+        scandir_time, scandir_result = time_walk(scandir_walk, root, settings_manager, args.repeat)
+        if legacy_result != scandir_result:
+            print(f"Mismatch: legacy {legacy_result} vs scandir {scandir_result}")
+            sys.exit(1)
+
+        files, warnings = scandir_result
+        print(f"Tree: {files} audio files, {warnings} warnings (best of {args.repeat})")
+        print(f"listdir walker: {legacy_time * 1000:8.1f} ms")
+        print(f"scandir walker: {scandir_time * 1000:8.1f} ms  ({legacy_time / scandir_time:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+# Benchmarks the header-only tag reader against the mutagen reader used before it.
+# Builds a corpus of MP3 (ID3v2.3 and 2.4 with APIC), FLAC (with a PICTURE block) and Opus
+# (with a METADATA_BLOCK_PICTURE comment) files with large embedded cover art in a temporary
+# folder, checks that both readers return the same tags and reports tags/second for each.
+#
+# Usage: python benchmarks/bench_tag_reader.py [--files N] [--art-kb N] [--repeat N]
+
+import os
+import sys
+import time
+import base64
+import struct
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from mutagen.id3 import ID3, TIT2, TPE1, TALB, TCON, TRCK, TDRC, APIC
+from mutagen.flac import FLAC, Picture
+from mutagen.ogg import OggPage
+from mutagen.oggopus import OggOpus
+
+from utils.library_scanner import read_metadata
+
+COVER_ART_KEYS = {'metadata_block_picture', 'coverart'}
+
+
+def mp3_bytes(frames=200):
+    """A stream of silent MPEG-1 Layer III frames (128 kbps, 44.1 kHz)."""
+    return (bytes([0xFF, 0xFB, 0x90, 0x64]) + b'\x00' * 413) * frames
+
+
+def flac_bytes():
+    """A FLAC header with only a STREAMINFO block."""
+    streaminfo = bytearray(34)
+    struct.pack_into('>HH', streaminfo, 0, 4096, 4096)
+    streaminfo[10:18] = ((44100 << 44) | (1 << 41) | (15 << 36)).to_bytes(8, 'big')
+    return b'fLaC' + bytes([0x80, 0, 0, 34]) + bytes(streaminfo)
+
+
+def write_opus(path):
+    """Writes an Opus stream with an empty comment header and a single audio page."""
+    head = OggPage()
+    head.serial, head.sequence, head.first, head.position = 1, 0, True, 0
+    head.packets = [b'OpusHead' + struct.pack('<BBHIhB', 1, 2, 312, 48000, 0, 0)]
+    tags = OggPage()
+    tags.serial, tags.sequence, tags.position = 1, 1, 0
+    tags.packets = [b'OpusTags' + struct.pack('<II', 0, 0)]
+    audio = OggPage()
+    audio.serial, audio.sequence, audio.position, audio.last = 1, 2, 48000 * 200, True
+    audio.packets = [b'\x00' * 4000]
+    with open(path, 'wb') as f:
+        for page in (head, tags, audio):
+            f.write(page.write())
+
+
+def build_corpus(root, files, art_size):
+    """Creates `files` tagged files, cycling through the formats, each with `art_size` bytes of cover art."""
+    art = os.urandom(art_size)
+    paths = []
+    for i in range(files):
+        title, artist, album = f"Track {i} (Official Video)", f"Artist {i % 7}", f"Album {i % 3}"
+        kind = i % 4
+        if kind in (0, 1):
+            path = os.path.join(root, f"{i:04d}.mp3")
+            with open(path, 'wb') as f:
+                f.write(mp3_bytes())
+            tags = ID3()
+            for frame in (TIT2(encoding=3, text=title), TPE1(encoding=3, text=artist), TALB(encoding=3, text=album),
+                          TCON(encoding=3, text='(17)'), TRCK(encoding=3, text=f"{i % 12 + 1}/12"),
+                          TDRC(encoding=3, text='2020'), APIC(encoding=3, mime='image/jpeg', type=3, desc='', data=art)):
+                tags.add(frame)
+            tags.save(path, v2_version=4 if kind == 0 else 3)
+        elif kind == 2:
+            path = os.path.join(root, f"{i:04d}.flac")
+            with open(path, 'wb') as f:
+                f.write(flac_bytes())
+            audio = FLAC(path)
+            picture = Picture()
+            picture.type, picture.mime, picture.data = 3, 'image/jpeg', art
+            audio.add_picture(picture)
+            audio['title'], audio['artist'], audio['album'] = title, artist, album
+            audio.save()
+        else:
+            path = os.path.join(root, f"{i:04d}.opus")
+            write_opus(path)
+            audio = OggOpus(path)
+            picture = Picture()
+            picture.type, picture.mime, picture.data = 3, 'image/jpeg', art
+            audio['title'], audio['artist'], audio['album'] = title, artist, album
+            audio['metadata_block_picture'] = base64.b64encode(picture.write()).decode('ascii')
+            audio.save()
+        paths.append(path)
+    return paths
+
+
+def time_reader(paths, fast, repeat):
+    """Returns (best time in seconds, tags per file) over `repeat` runs."""
+    best = None
+    results = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = [read_metadata(path, fast=fast) for path in paths]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the header-only tag reader against mutagen.")
+    parser.add_argument('--files', type=int, default=400)
+    parser.add_argument('--art-kb', type=int, default=1024, help="Size of the embedded cover art in KiB")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        paths = build_corpus(root, args.files, args.art_kb * 1024)
+
+        mutagen_time, mutagen_results = time_reader(paths, False, args.repeat)
+        fast_time, fast_results = time_reader(paths, True, args.repeat)
+        # The fast reader leaves out base64 cover art comments, which are never displayed
+        expected = [{k: v for k, v in tags.items() if k not in COVER_ART_KEYS} for tags in mutagen_results]
+        if expected != fast_results:
+            mismatches = [path for path, a, b in zip(paths, expected, fast_results) if a != b]
+            print(f"Mismatch in {len(mismatches)} files, e.g. {mismatches[0]}")
+            sys.exit(1)
+
+        print(f"Corpus: {len(paths)} files with {args.art_kb} KiB of cover art each (best of {args.repeat})")
+        print(f"mutagen reader:     {len(paths) / mutagen_time:9.0f} tags/s")
+        print(f"header-only reader: {len(paths) / fast_time:9.0f} tags/s  ({mutagen_time / fast_time:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
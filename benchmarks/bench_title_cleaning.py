@@ -0,0 +1,157 @@
+# Measures the cost per title of extract_suffixes and generate_filename_from_tags, before and
+# after the cleaning rules were compiled once per settings version. The previous versions,
+# which built a regex for every word to remove and every tag mapping on each bracketed group,
+# are copied below. Both produce the same results on the generated titles, which is checked.
+#
+# Usage: python benchmarks/bench_title_cleaning.py [--titles N] [--settings FILE]
+
+import os
+import re
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from utils.settings_manager import SettingsManager
+from utils.data_models import Track
+from tools.special_cleaner import (_extract_suffixes, get_cleaning_rules, SUFFIX_CONTENT_REGEX, FT_REGEX,
+                                   INLINE_FT_REGEX, REMIX_REGEX, _format_artist_names)
+from tools.filename_generators import generate_filename_from_tags
+
+WORDS = ["Love", "Night", "City", "Dream", "Fire", "Gold", "Rain", "Heart", "Run", "Home"]
+BRACKETS = ["(Official Video)", "[HD]", "(feat. Some One & Other)", "(Live)", "(DJ Snake Remix)",
+            "[Remastered 2011]", "(Acoustic Version)", "(Radio Edit)", "(Instrumental)", "(Lyric Video)",
+            "[Bonus Track]", "(Part 2)"]
+
+
+def legacy_clean_suffix_content(content, settings_manager=None):
+    content = content.strip()
+    words_to_remove = []
+    if settings_manager:
+        words_to_remove = settings_manager.get('general', {}).get('words_to_remove', [])
+    for banned_word in words_to_remove:
+        pattern = re.compile(r'\b' + re.escape(banned_word) + r'\b', re.IGNORECASE)
+        content = pattern.sub('', content)
+    return re.sub(r'\s+', ' ', content).strip()
+
+
+def legacy_extract_suffixes(title, artist="", settings_manager=None):
+    """extract_suffixes before the compiled cleaning rules."""
+    suffixes = []
+    parts_to_remove = []
+    tag_mappings = {}
+    if settings_manager:
+        tag_mappings = settings_manager.get('general', {}).get('tag_mappings', {})
+
+    for match in SUFFIX_CONTENT_REGEX.finditer(title):
+        original_match_text = match.group(0)
+        cleaned_content = legacy_clean_suffix_content(match.group('content'), settings_manager)
+        found_tags = []
+        ft_match = FT_REGEX.search(cleaned_content)
+        if ft_match:
+            artists = _format_artist_names(ft_match.group(2).strip())
+            if artists:
+                found_tags.append(f"[Ft. {artists}]")
+        remix_match = REMIX_REGEX.search(cleaned_content)
+        if remix_match:
+            remixer = re.sub(r'\b\w', lambda m: m.group(0).upper(), remix_match.group(1).strip())
+            found_tags.append(f"[{remixer} Remix]" if remixer else "[Remix]")
+        for pattern_str, result_tag in tag_mappings.items():
+            try:
+                if re.compile(pattern_str, re.IGNORECASE).search(cleaned_content):
+                    found_tags.append(result_tag)
+            except re.error:
+                pass
+        if found_tags:
+            suffixes.extend(found_tags)
+            parts_to_remove.append(original_match_text)
+        elif not cleaned_content.strip():
+            parts_to_remove.append(original_match_text)
+
+    clean_title = title
+    for part in parts_to_remove:
+        clean_title = clean_title.replace(part, '')
+    if artist:
+        clean_title = re.sub(re.escape(artist), '', clean_title, flags=re.IGNORECASE)
+    inline_ft_match = INLINE_FT_REGEX.match(clean_title.strip())
+    if inline_ft_match:
+        featured_artists = _format_artist_names(inline_ft_match.group('artists').strip())
+        if featured_artists:
+            suffixes.append(f"[Ft. {featured_artists}]")
+            clean_title = inline_ft_match.group('title').strip()
+    clean_title = re.sub(r'\(\s*\)|\[\s*\]', '', clean_title)
+    clean_title = re.sub(r'\s+', ' ', clean_title).strip()
+    clean_title = clean_title.strip(' -')
+    return clean_title, sorted(list(dict.fromkeys(suffixes)), key=str.lower)
+
+
+def legacy_generate_filename(track, settings_manager):
+    """The words to remove step of generate_filename_from_tags before the compiled cleaning rules."""
+    artist = track.tags.get('artist', 'Unknown Artist')
+    title = track.clean_title
+    for word in settings_manager.get('general', {}).get('words_to_remove', []):
+        artist = re.sub(r'\b' + re.escape(word) + r'\b', '', artist, flags=re.IGNORECASE).strip()
+        title = re.sub(r'\b' + re.escape(word) + r'\b', '', title, flags=re.IGNORECASE).strip()
+    return artist, title
+
+
+def make_titles(count, seed=1):
+    rng = random.Random(seed)
+    titles = []
+    for _ in range(count):
+        title = ' '.join(rng.sample(WORDS, rng.randint(1, 3)))
+        for bracket in rng.sample(BRACKETS, rng.randint(0, 3)):
+            title += ' ' + bracket
+        titles.append(title)
+    return titles
+
+
+def per_title(function, titles):
+    start = time.perf_counter()
+    results = [function(title) for title in titles]
+    return (time.perf_counter() - start) / len(titles) * 1e6, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the cost per title of the title cleaning.")
+    parser.add_argument('--titles', type=int, default=20000)
+    parser.add_argument('--settings', default=os.path.join(os.path.dirname(__file__), '..', 'src', 'settings.json'))
+    args = parser.parse_args()
+
+    settings_manager = SettingsManager(args.settings)
+    titles = make_titles(args.titles)
+    general = settings_manager.get('general', {})
+    print(f"Titles: {len(titles)}, words to remove: {len(general.get('words_to_remove', []))}, "
+          f"tag mappings: {len(general.get('tag_mappings', {}))}")
+
+    # The memo of extract_suffixes is bypassed, as the generated titles repeat
+    rules = get_cleaning_rules(settings_manager)
+    before, expected = per_title(lambda title: legacy_extract_suffixes(title, "Artist", settings_manager), titles)
+    after, results = per_title(lambda title: _extract_suffixes(title, "Artist", rules), titles)
+    print(f"extract_suffixes:  before {before:7.1f} us/title, after {after:7.1f} us/title ({before / after:.1f}x)")
+    if results != expected:
+        sys.exit("extract_suffixes results differ")
+
+    tracks = [Track(path=f"/music/{i}.mp3", filename=f"{i}.mp3", clean_title=title, tags={'artist': 'Artist HD'})
+              for i, title in enumerate(titles)]
+    start = time.perf_counter()
+    expected = [legacy_generate_filename(track, settings_manager) for track in tracks]
+    before = (time.perf_counter() - start) / len(tracks) * 1e6
+    start = time.perf_counter()
+    results = [(rules.remove_banned_words(track.tags['artist']).strip(), rules.remove_banned_words(track.clean_title).strip())
+               for track in tracks]
+    after = (time.perf_counter() - start) / len(tracks) * 1e6
+    print(f"words to remove:   before {before:7.1f} us/title, after {after:7.1f} us/title ({before / after:.1f}x)")
+    if results != expected:
+        sys.exit("Words to remove results differ")
+
+    start = time.perf_counter()
+    for track in tracks:
+        generate_filename_from_tags(track, settings_manager)
+    print(f"generate_filename_from_tags: {(time.perf_counter() - start) / len(tracks) * 1e6:7.1f} us/title")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+# Measures the memory held per track by the library model, before and after the compact Track.
+# Builds the same synthetic tracks twice, from tag dicts made of fresh strings as a tag reader
+# returns them: once with a copy of the previous Track dataclass, and once with build_track,
+# which makes a slotted Track and interns repeated strings. Both hold a proposed_tags dict for
+# every track, as the folder artist is always proposed, so the sparse proposed_tags overlay
+# saves nothing here: the difference comes from the slots and the interning.
+# Memory is measured with tracemalloc.
+#
+# Usage: python benchmarks/bench_track_memory.py [--tracks N]
+
+import os
+import sys
+import argparse
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import List, Dict, Any
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from utils.library_scanner import build_track
+from utils.settings_manager import SettingsManager
+from tools.special_cleaner import extract_suffixes
+
+TRACKS_PER_ALBUM = 12
+ALBUMS_PER_ARTIST = 4
+
+
+@dataclass
+class LegacyTrack:
+    """The previous Track model."""
+    path: str
+    filename: str
+    clean_title: str
+    tags: Dict[str, Any] = field(default_factory=dict)
+    proposed_tags: Dict[str, Any] = field(default_factory=dict)
+    proposed_filename: str = ""
+    is_manual_rename: bool = False
+    suffixes: List[str] = field(default_factory=list)
+    has_error: bool = False
+    has_duplicate: bool = False
+    size: int = 0
+    mtime_ns: int = 0
+
+
+def fresh(text):
+    """Returns a copy of a string that is not shared with any other, as read from a file."""
+    return (text + '.')[:-1]
+
+
+def iter_inputs(count):
+    """Yields (path, filename, artist, album, tags) for `count` synthetic tracks."""
+    for i in range(count):
+        album_index = i // TRACKS_PER_ALBUM
+        artist = f"Artist {album_index // ALBUMS_PER_ARTIST}"
+        album = f"Album {album_index % ALBUMS_PER_ARTIST}"
+        number = i % TRACKS_PER_ALBUM + 1
+        title = f"Song Number {i}" + (" (feat. Guest)" if i % 5 == 0 else "")
+        filename = f"{number:02d}. {title}.mp3"
+        tags = {
+            fresh('title'): fresh(title), fresh('artist'): fresh(artist), fresh('album'): fresh(album),
+            fresh('tracknumber'): fresh(f"{number}/{TRACKS_PER_ALBUM}"), fresh('date'): fresh('2019'),
+            fresh('genre'): fresh('Hip-Hop'),
+        }
+        yield os.path.join('/music', artist, album, filename), filename, artist, album, tags
+
+
+def build_legacy(path, filename, artist, album, tags, settings_manager):
+    """The previous build_track, minus the metadata read."""
+    clean_title, suffixes = extract_suffixes(tags.get('title', ''), artist, settings_manager)
+    track = LegacyTrack(path=path, filename=filename, tags=tags, suffixes=suffixes, clean_title=clean_title)
+    track.proposed_tags['artist'] = artist
+    if tags.get('album') != album:
+        track.proposed_tags['album'] = album
+    if clean_title + ''.join(suffixes) != tags.get('title', ''):
+        track.proposed_tags['title'] = clean_title
+    return track
+
+
+def build_compact(path, filename, artist, album, tags, settings_manager):
+    return build_track(path, filename, artist, album, settings_manager, original_tags=tags)
+
+
+def measure(builder, count, settings_manager):
+    """Returns the bytes held per track once `count` tracks have been built, tags included."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    # The folder names are shared by all the tracks of an artist or album, as in a scan
+    names = {}
+    tracks = [
+        builder(path, filename, names.setdefault(artist, artist), names.setdefault(album, album), tags, settings_manager)
+        for path, filename, artist, album, tags in iter_inputs(count)
+    ]
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return held / len(tracks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the memory used per Track by the library model.")
+    parser.add_argument('--tracks', type=int, default=50000)
+    args = parser.parse_args()
+
+    settings_manager = SettingsManager()
+    legacy = measure(build_legacy, args.tracks, settings_manager)
+    compact = measure(build_compact, args.tracks, settings_manager)
+    print(f"Tracks: {args.tracks}")
+    print(f"previous Track: {legacy:8.0f} bytes/track")
+    print(f"compact Track:  {compact:8.0f} bytes/track  ({100 * (1 - compact / legacy):.0f}% less)")
+
+
+if __name__ == '__main__':
+    main()
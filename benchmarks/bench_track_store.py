@@ -0,0 +1,99 @@
+# Times library-wide questions asked of a TrackStore against walking the Track objects of
+# the library: tracks missing a title, albums with mixed artist tags, suffix distribution,
+# duplicate new names per album and keyword highlights. Both answers are compared.
+#
+# Usage: python benchmarks/bench_track_store.py [--tracks N]
+
+import os
+import sys
+import time
+import argparse
+from collections import Counter
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from utils.data_models import Track, Album, Artist, Library
+from utils.track_store import TrackStore
+
+TRACKS_PER_ALBUM = 12
+ALBUMS_PER_ARTIST = 4
+KEYWORDS = ['remix', 'live', 'instrumental']
+
+
+def build_library(count):
+    """A synthetic library of `count` tracks, with some missing titles, mixed artist tags and duplicates."""
+    library = Library('/music')
+    for i in range(count):
+        album_index = i // TRACKS_PER_ALBUM
+        artist_name = f"Artist {album_index // ALBUMS_PER_ARTIST}"
+        album_name = f"Album {album_index % ALBUMS_PER_ARTIST}"
+        if artist_name not in library:
+            library[artist_name] = Artist(name=artist_name, path=os.path.join('/music', artist_name))
+        artist = library[artist_name]
+        if not artist.albums or artist.albums[-1].name != album_name:
+            artist.albums.append(Album(name=album_name, path=os.path.join(artist.path, album_name)))
+        album = artist.albums[-1]
+
+        number = i % TRACKS_PER_ALBUM + 1
+        title = f"Song {i}" + (" (Live)" if i % 7 == 0 else "")
+        tags = {'artist': artist_name if i % 50 else 'Someone Else', 'album': album_name, 'tracknumber': str(number)}
+        if i % 13:
+            tags['title'] = title
+        filename = f"{number:02d}. {title}.mp3"
+        track = Track(path=os.path.join(album.path, filename), filename=filename, clean_title=title, tags=tags,
+                      suffixes=["(Live)"] if i % 7 == 0 else [])
+        track.proposed_filename = f"{artist_name} - Song {i + 1 if i % 97 == 0 else i}.mp3"
+        album.tracks.append(track)
+    return library
+
+
+def walk_queries(library):
+    tracks = [(artist, album, track) for artist in library.values() for album in artist.albums for track in album.tracks]
+    missing = sum(1 for _, _, track in tracks if not track.tags.get('title', '').strip())
+    artists_per_album = {}
+    for _, album, track in tracks:
+        artists_per_album.setdefault(album.path, set()).add(track.tags.get('artist'))
+    mixed = sorted(path for path, artists in artists_per_album.items() if len(artists) > 1)
+    suffixes = Counter(''.join(track.suffixes) for _, _, track in tracks)
+    names = Counter((album.path, track.proposed_filename or track.filename) for _, album, track in tracks)
+    duplicates = sum(1 for _, album, track in tracks if names[(album.path, track.proposed_filename or track.filename)] > 1)
+    highlighted = sum(1 for _, _, track in tracks if any(k in track.filename.lower() for k in KEYWORDS))
+    return missing, mixed, dict(suffixes), duplicates, highlighted
+
+
+def store_queries(store):
+    missing = store.missing('tag:title').count()
+    mixed = sorted(folder for folder, count in store.distinct_count('folder', 'tag:artist').items() if count > 1)
+    duplicates = store.duplicates('folder', 'new_name').count()
+    highlighted = store.contains_any('filename', KEYWORDS).count()
+    return missing, mixed, store.group_count('suffixes'), duplicates, highlighted
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time library-wide queries on a TrackStore.")
+    parser.add_argument('--tracks', type=int, default=200000)
+    args = parser.parse_args()
+
+    library = build_library(args.tracks)
+    start = time.perf_counter()
+    store = TrackStore.from_library(library)
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    expected = walk_queries(library)
+    walk_time = time.perf_counter() - start
+    start = time.perf_counter()
+    result = store_queries(store)
+    store_time = time.perf_counter() - start
+
+    print(f"Tracks: {len(store)}  (missing titles {result[0]}, mixed albums {len(result[1])}, "
+          f"duplicates {result[3]}, highlighted {result[4]})")
+    print(f"build store:   {build_time:7.3f}s")
+    print(f"object walk:   {walk_time:7.3f}s")
+    print(f"store queries: {store_time:7.3f}s  ({walk_time / store_time:.1f}x)")
+    if result != expected:
+        sys.exit("The store and the object walk disagree")
+
+
+if __name__ == '__main__':
+    main()
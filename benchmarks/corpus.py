@@ -0,0 +1,126 @@
+# Seeded generator of realistic messy track titles and filenames for the cleaning benchmarks:
+# feat/ft variants, remixes, nested brackets, "Official Video" noise, unicode apostrophes,
+# track numbers, odd casing, underscores and accented or non-latin names. The same seed
+# always produces the same corpus, so runs can be compared with each other.
+
+import os
+import sys
+import random
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from utils.data_models import Track
+
+ARTISTS = ["Daft Punk", "Beyoncé", "The Weeknd", "AC/DC", "Sigur Rós", "Mötley Crüe", "DJ Snake", "Run-D.M.C.",
+           "Guns N' Roses", "Florence + The Machine", "Björk", "Zé Ramalho", "坂本龍一", "Kraftwerk", "Nina Simone",
+           "Earth, Wind & Fire", "A$AP Rocky", "Sade", "MØ", "Los Tigres del Norte"]
+FEATURED = ["Pharrell Williams", "Kendrick Lamar", "Dua Lipa", "Justin Bieber", "Lil Jon", "Rosalía",
+            "Tiësto", "Major Lazer", "Tyla", "Mø"]
+WORDS = ["Love", "Night", "City", "Dream", "Fire", "Gold", "Rain", "Heart", "Run", "Home", "Summer", "Lights",
+         "Don't", "Can't", "I'm", "Forever", "Midnight", "Électrique", "Señorita", "Tonight", "Baby", "Wild",
+         "Ocean", "Part", "II", "IV", "U.S.A.", "Me", "You", "We", "Back", "Again"]
+APOSTROPHES = ["'", "’", "‘", "ʼ", "`"]
+FEAT_FORMATS = ["feat. {}", "ft. {}", "Feat {}", "FT {}", "featuring {}", "Ft. {}", "with {}"]
+REMIX_FORMATS = ["{} Remix", "{} remix", "{} Extended Remix", "Remix", "{} Club Mix", "{} Edit"]
+NOISE = ["Official Video", "Official Music Video", "Official Audio", "HD", "HQ", "Lyric Video", "Lyrics",
+         "Visualizer", "4K", "Audio", "Official Lyric Video", "Explicit", "Clean"]
+VERSIONS = ["Live", "Acoustic", "Acoustic Version", "Radio Edit", "Instrumental", "Remastered 2011", "Demo",
+            "Bonus Track", "Live at Wembley", "Extended Mix", "Original Mix", "Part 2", "Mono", "Unplugged"]
+BRACKETS = [("(", ")"), ("[", "]"), ("{", "}")]
+EXTENSIONS = [".mp3", ".mp3", ".mp3", ".flac", ".m4a", ".ogg", ".opus"]
+
+
+def _bracket(rng, content):
+    opening, closing = rng.choice(BRACKETS[:2]) if rng.random() < 0.95 else rng.choice(BRACKETS)
+    return f"{opening}{content}{closing}"
+
+
+def _base_title(rng):
+    words = [rng.choice(WORDS) for _ in range(rng.randint(1, 4))]
+    title = ' '.join(words)
+    apostrophe = rng.choice(APOSTROPHES)
+    title = title.replace("'", apostrophe)
+    case = rng.random()
+    if case < 0.08:
+        title = title.upper()
+    elif case < 0.16:
+        title = title.lower()
+    return title
+
+
+def _decorations(rng):
+    """The bracketed or inline parts following the base title."""
+    parts = []
+    if rng.random() < 0.35:
+        featured = ' & '.join(rng.sample(FEATURED, rng.randint(1, 2)))
+        feat = rng.choice(FEAT_FORMATS).format(featured)
+        parts.append(feat if rng.random() < 0.3 else _bracket(rng, feat))
+    if rng.random() < 0.25:
+        remix = rng.choice(REMIX_FORMATS).format(rng.choice(ARTISTS + FEATURED))
+        parts.append(_bracket(rng, remix) if rng.random() < 0.8 else f"- {remix}")
+    if rng.random() < 0.2:
+        version = rng.choice(VERSIONS)
+        if rng.random() < 0.2:
+            # Nested brackets
+            version = f"{version} ({rng.choice(VERSIONS)})"
+        parts.append(_bracket(rng, version))
+    if rng.random() < 0.4:
+        for noise in rng.sample(NOISE, rng.randint(1, 2)):
+            parts.append(_bracket(rng, noise))
+    rng.shuffle(parts)
+    return parts
+
+
+def generate_title(rng):
+    """One messy title tag."""
+    parts = [_base_title(rng)] + _decorations(rng)
+    separator = '  ' if rng.random() < 0.05 else ' '
+    return separator.join(parts)
+
+
+def generate_titles(count, seed=1):
+    """`count` messy titles from `seed`."""
+    rng = random.Random(seed)
+    return [generate_title(rng) for _ in range(count)]
+
+
+def generate_filename(rng, artist, title):
+    """A filename as found in the wild for a track of `artist`: track numbers, underscores, artist prefix..."""
+    style = rng.random()
+    if style < 0.35:
+        name = f"{artist} - {title}"
+    elif style < 0.55:
+        name = f"{rng.randint(1, 20):02d} - {artist} - {title}"
+    elif style < 0.7:
+        name = f"{rng.randint(1, 20):02d}. {title}"
+    elif style < 0.8:
+        name = f"{artist} - {title}".replace(' ', '_')
+    elif style < 0.9:
+        name = f"{artist.lower()} -- {title}"
+    else:
+        name = title
+    # Characters that are illegal in a filename
+    return name.replace('/', '-').replace('?', '').replace('"', '') + rng.choice(EXTENSIONS)
+
+
+def generate_tracks(count, seed=1):
+    """`count` tracks with messy filenames and tags, from `seed`. A few have no title or artist tag."""
+    rng = random.Random(seed)
+    tracks = []
+    for i in range(count):
+        artist = rng.choice(ARTISTS)
+        title = generate_title(rng)
+        filename = generate_filename(rng, artist, title)
+        tags = {}
+        if rng.random() < 0.9:
+            tags['artist'] = artist
+        if rng.random() < 0.85:
+            tags['title'] = title
+        tracks.append(Track(path=f"/music/{artist}/Album/{i:06d} {filename}", filename=filename,
+                            clean_title=title, tags=tags))
+    return tracks
+
+
+if __name__ == '__main__':
+    for track in generate_tracks(int(sys.argv[1]) if len(sys.argv) > 1 else 20):
+        print(f"{track.filename!r:90} {track.tags.get('title')!r}")
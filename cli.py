@@ -0,0 +1,132 @@
+import sys
+import os
+import json
+import argparse
+
+# Add src directory to Python path
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), 'src'))
+sys.path.insert(0, SRC_DIR)
+
+# Only Qt-free modules are imported, so the CLI can run on a headless server
+from utils.settings_manager import SettingsManager
+from utils.library_scanner import scan_library
+from utils.library_cleanup import plan_library, save_tracks, get_save_workers, format_plan_entry
+from utils.tag_cache import TagCache
+from utils.duplicate_names import find_rename_collisions
+from tools.special_cleaner import SUFFIX_MEMO
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        description="Cleans and renames a music library without the GUI, using the saved settings."
+    )
+    parser.add_argument('command', choices=['plan', 'apply'],
+                        help="'plan' prints the proposed changes, 'apply' also saves them")
+    parser.add_argument('root', help="Root folder of the library (Artist/Album/Track)")
+    parser.add_argument('--settings', default=os.path.join(SRC_DIR, 'settings.json'),
+                        help="Path of the settings.json to use (default: the app's settings)")
+    parser.add_argument('--report', metavar='FILE',
+                        help="Write a JSON report to FILE ('-' for stdout, which silences the plan)")
+    parser.add_argument('--workers', type=int, help="Number of scan workers (default: from the settings)")
+    parser.add_argument('--no-cache', action='store_true', help="Read every file instead of using the tag cache")
+    return parser.parse_args(argv)
+
+
+def count_tracks(library):
+    return sum(len(album.tracks) for artist in library.values() for album in artist.albums)
+
+
+def build_report(args, library, plan, read_errors, warnings, collisions, success_count=None, save_errors=None, save_counts=None):
+    """Builds the machine-readable report of a run."""
+    report = {
+        'command': args.command,
+        'root': os.path.abspath(args.root),
+        'artists': len(library),
+        'albums': sum(len(artist.albums) for artist in library.values()),
+        'tracks': count_tracks(library),
+        'changes': [
+            {
+                'artist': entry['artist'],
+                'album': entry['album'],
+                'path': entry['path'],
+                'new_filename': entry['new_filename'],
+                'tags': {tag: {'old': old, 'new': new} for tag, (old, new) in entry['tags'].items()},
+            }
+            for entry in plan
+        ],
+        'warnings': warnings,
+        'read_errors': read_errors,
+        # Renames that would clash; when there are any, 'apply' saves nothing
+        'rename_collisions': [{'path': track.path, 'error': message} for track, message in collisions],
+        # Title cleaning results reused in this process (scan worker processes count their own)
+        'title_memo': SUFFIX_MEMO.stats(),
+    }
+    if success_count is not None:
+        report['saved'] = success_count
+        # Saved files whose tags were rewritten, that were only renamed, or that already matched
+        report['written'], report['renamed_only'], report['skipped'] = save_counts
+        report['save_errors'] = save_errors
+        # Renamed tracks, with their path after saving
+        report['renamed'] = {
+            entry['path']: entry['track'].path for entry in plan if entry['track'].path != entry['path']
+        }
+    return report
+
+
+def main(argv=None):
+    """Scans a library, proposes the automatic changes and optionally saves them."""
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    if not os.path.isdir(args.root):
+        print(f"Not a folder: {args.root}", file=sys.stderr)
+        return 2
+
+    settings_manager = SettingsManager(args.settings)
+    tag_cache = None
+    if not args.no_cache:
+        # The tag cache lives next to settings.json, as in the app
+        settings_dir = os.path.dirname(os.path.abspath(args.settings))
+        tag_cache = TagCache(os.path.join(settings_dir, 'tag_cache.db'))
+
+    read_errors = []
+    # Every album is cleaned, so there is no point in scanning lazily
+    library, warnings = scan_library(args.root, settings_manager, errors=read_errors, workers=args.workers,
+                                     tag_cache=tag_cache, lazy=False)
+    plan = plan_library(library, settings_manager)
+    collisions = find_rename_collisions([entry['track'] for entry in plan])
+
+    to_stdout = args.report == '-'
+    if not to_stdout:
+        for entry in plan:
+            print('\n'.join(format_plan_entry(entry)))
+        print(f"{len(plan)} of {count_tracks(library)} tracks have changes.")
+        for _, message in collisions:
+            print(message, file=sys.stderr)
+        if collisions:
+            print(f"{len(collisions)} renames would clash" + (", nothing was saved." if args.command == 'apply' else "."),
+                  file=sys.stderr)
+
+    success_count = save_errors = save_counts = None
+    if args.command == 'apply' and not collisions:
+        success_count, save_errors, save_counts = save_tracks([entry['track'] for entry in plan], tag_cache,
+                                                              get_save_workers(settings_manager))
+        if not to_stdout:
+            for error in save_errors:
+                print(error, file=sys.stderr)
+            written, renamed_only, skipped = save_counts
+            print(f"Saved {success_count} files ({written} written, {renamed_only} renamed only, {skipped} unchanged), "
+                  f"{len(save_errors)} errors.")
+
+    if args.report:
+        report = build_report(args, library, plan, read_errors, warnings, collisions, success_count, save_errors, save_counts)
+        if to_stdout:
+            json.dump(report, sys.stdout, indent=2, ensure_ascii=False)
+            print()
+        else:
+            with open(args.report, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+
+    return 1 if save_errors or (collisions and args.command == 'apply') else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
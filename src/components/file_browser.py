@@ -7,6 +7,9 @@ import subprocess
 import re
 from utils.color_utils import get_contrasting_text_color
 from tools.filename_generators import generate_filename_from_tags
+from utils.track_store import TrackStore
+from utils.duplicate_names import DuplicateNameIndex
+from utils.keyword_matcher import KeywordMatcher
 
 class FileBrowser(QTableWidget):
     """
@@ -30,7 +33,15 @@ class FileBrowser(QTableWidget):
         self.album_row_map = {}
         self.is_handling_change = False
         self.highlight_rules = None
-        self.has_duplicates = False
+        # The keyword rules of highlight_rules, compiled once per populate_files
+        self.keyword_rules = []
+        self.keyword_rule_indexes = [] # Rule index of each keyword of the matcher
+        self.highlight_matcher = None
+        self.row_colors = {}
+        self.track_rows = {} # id(track) -> row
+        # Kept up to date row by row as tracks are edited, so validation does not rescan the view
+        self.duplicate_index = DuplicateNameIndex()
+        self.missing_title_rows = set()
 
         self.setStyleSheet("""
             QHeaderView::section {
@@ -73,14 +84,23 @@ class FileBrowser(QTableWidget):
     def populate_files(self, tracks, highlight_rules=None):
         self.is_handling_change = True
         self.highlight_rules = highlight_rules
+        self._compile_highlight_rules(highlight_rules)
         self.setRowCount(0)
         self.track_map.clear()
         self.album_row_map.clear()
-        self.has_duplicates = False
+        self.row_colors.clear()
+        self.track_rows.clear()
+        self.duplicate_index.clear()
+        self.missing_title_rows.clear()
         if not tracks:
             self.is_handling_change = False
             return
 
+        # Duplicate names and highlights are found for all the tracks at once
+        self.duplicate_index.build(tracks)
+        store = TrackStore.from_tracks(tracks)
+        colors = {id(track): color for track, color in zip(tracks, self.get_row_colors(store))}
+
         row_count = 0
         albums = {}
         for track in tracks:
@@ -104,21 +124,11 @@ class FileBrowser(QTableWidget):
             album_header_row = row_count
             row_count += 1
 
-            # Check for duplicate names in this album
-            for t in album_tracks:
-                t.has_duplicate = False
-            name_counts = {}
-            for t in album_tracks:
-                new_name = t.proposed_filename or t.filename
-                name_counts[new_name] = name_counts.get(new_name, 0) + 1
-            for t in album_tracks:
-                new_name = t.proposed_filename or t.filename
-                t.has_duplicate = name_counts[new_name] > 1
-            self.has_duplicates = self.has_duplicates or any(t.has_duplicate for t in album_tracks)
-
             for track in sorted(album_tracks, key=lambda t: t.filename):
                 self.insertRow(row_count)
                 self.track_map[row_count] = track
+                self.track_rows[id(track)] = row_count
+                self.row_colors[row_count] = colors[id(track)]
                 self.album_row_map[album_header_row].append(row_count)
                 
                 for col_idx, col_name in enumerate(self.columns):
@@ -158,24 +168,58 @@ class FileBrowser(QTableWidget):
         self.is_handling_change = False
         self.validate_rows()
 
-    def get_row_color(self, track, highlight_rules):
-        if not highlight_rules: return None
-
-        if not track.tags.get('title'):
-            missing_title_color = highlight_rules.get("missing_title_highlight", {}).get("color")
-            if missing_title_color:
-                return QColor(missing_title_color)
+    def _compile_highlight_rules(self, highlight_rules):
+        """Builds the matcher of the keywords of all the rules, looked for in a single pass over each name."""
+        rules = [rule_data for rule_name, rule_data in (highlight_rules or {}).items() if rule_name != "missing_title_highlight"]
+        keywords, keyword_rule_indexes = [], []
+        for rule_index, rule_data in enumerate(rules):
+            for keyword in rule_data.get("keywords", []):
+                keywords.append(keyword)
+                keyword_rule_indexes.append(rule_index)
+        self.keyword_rules = rules
+        self.keyword_rule_indexes = keyword_rule_indexes
+        self.highlight_matcher = KeywordMatcher(keywords)
+
+    def _first_keyword_rule(self, name):
+        """Index of the first keyword rule matching a name, or len(self.keyword_rules) if none does."""
+        matches = self.highlight_matcher.matches(name or '')
+        return min((self.keyword_rule_indexes[index] for index in matches), default=len(self.keyword_rules))
+
+    def _keyword_rule_color(self, rule_index):
+        if rule_index < len(self.keyword_rules):
+            return QColor(self.keyword_rules[rule_index].get("color"))
+        return None
 
-        for rule_name, rule_data in highlight_rules.items():
-            if rule_name == "missing_title_highlight":
+    def get_row_colors(self, store):
+        """
+        Returns the highlight color of each row of a TrackStore, or None for rows without one.
+        A missing title comes first, then the keyword rules in order, matched against the
+        current and the new filename.
+        """
+        colors = [None] * len(store)
+        if not self.highlight_rules: return colors
+
+        missing_title_color = self.highlight_rules.get("missing_title_highlight", {}).get("color")
+        missing_title = store.where('tag:title', lambda title: not title) if missing_title_color else bytes(len(store))
+        filename_rules = store.map_values('filename', self._first_keyword_rule)
+        new_name_rules = store.map_values('new_name', self._first_keyword_rule)
+        for row in range(len(store)):
+            if missing_title[row]:
+                colors[row] = QColor(missing_title_color)
                 continue
-            color = rule_data.get("color")
-            keywords = rule_data.get("keywords", [])
-            
-            if any(keyword.lower() in track.filename.lower() for keyword in keywords) or \
-               (track.proposed_filename and any(keyword.lower() in track.proposed_filename.lower() for keyword in keywords)):
-                return QColor(color)
-        return None
+            colors[row] = self._keyword_rule_color(min(filename_rules[row], new_name_rules[row]))
+        return colors
+
+    def get_row_color(self, track):
+        """The highlight color of a single track, as get_row_colors gives it, or None."""
+        if not self.highlight_rules: return None
+
+        missing_title_color = self.highlight_rules.get("missing_title_highlight", {}).get("color")
+        if missing_title_color and not track.tags.get('title'):
+            return QColor(missing_title_color)
+        rule_index = min(self._first_keyword_rule(track.filename),
+                         self._first_keyword_rule(track.proposed_filename or track.filename))
+        return self._keyword_rule_color(rule_index)
 
     def create_table_item(self, track, col_name):
         cell_value, font, background_color = "", QFont(), None
@@ -252,9 +296,13 @@ class FileBrowser(QTableWidget):
         if not track:
             return
 
-        row_color = self.get_row_color(track, self.highlight_rules)
+        row_color = self.row_colors.get(row)
         title = track.proposed_tags.get('title', track.tags.get('title', ''))
         is_invalid = not title.strip()
+        if is_invalid:
+            self.missing_title_rows.add(row)
+        else:
+            self.missing_title_rows.discard(row)
 
         for col_idx, col_name in enumerate(self.columns):
             item = self.item(row, col_idx)
@@ -273,35 +321,13 @@ class FileBrowser(QTableWidget):
             elif row_color:
                 item.setForeground(get_contrasting_text_color(row_color))
 
-    def _check_duplicates_for_album(self, track):
-        album_path = os.path.dirname(track.path)
-        album_tracks = [t for t in self.track_map.values() if os.path.dirname(t.path) == album_path]
-
-        # Clear duplicates for album
-        for t in album_tracks:
-            t.has_duplicate = False
-
-        # Check duplicates
-        name_counts = {}
-        for t in album_tracks:
-            new_name = t.proposed_filename or t.filename
-            name_counts[new_name] = name_counts.get(new_name, 0) + 1
-
-        for t in album_tracks:
-            new_name = t.proposed_filename or t.filename
-            t.has_duplicate = name_counts[new_name] > 1
-
-        self.has_duplicates = any(t.has_duplicate for t in self.track_map.values())
+    @property
+    def has_duplicates(self):
+        return self.duplicate_index.has_duplicates
 
     def validate_rows(self):
-        """Checks all tracks for validation errors and emits a signal."""
-        has_missing_title = False
-        for track in self.track_map.values():
-            title = track.proposed_tags.get('title', track.tags.get('title', ''))
-            if not title.strip():
-                has_missing_title = True
-                break
-        self.has_invalid_rows.emit(has_missing_title or self.has_duplicates)
+        """Emits whether any track in view has no title or a duplicate new name."""
+        self.has_invalid_rows.emit(bool(self.missing_title_rows) or self.duplicate_index.has_duplicates)
 
     def handle_item_changed(self, item):
         if self.is_handling_change: return
@@ -321,7 +347,6 @@ class FileBrowser(QTableWidget):
             background_color = QColor(bg_settings.get('background', '#FFFF99'))
             item.setBackground(background_color)
             item.setForeground(get_contrasting_text_color(background_color))
-            self._check_duplicates_for_album(track)
         elif upper_col_name == '[SUFFIXES]':
             track.suffixes = [s.strip() for s in new_value.split(',') if s.strip()]
             if not track.is_manual_rename:
@@ -333,7 +358,6 @@ class FileBrowser(QTableWidget):
                 track.clean_title = new_value  # Update clean_title to reflect manual title change
                 if not track.is_manual_rename:
                     generate_filename_from_tags(track, self.settings_manager)
-                    self._check_duplicates_for_album(track)
         
         self.is_handling_change = False
         
@@ -390,20 +414,28 @@ class FileBrowser(QTableWidget):
         selection_model.select(selection, QItemSelectionModel.SelectionFlag.Select | QItemSelectionModel.SelectionFlag.Rows)
 
     def refresh_row(self, row):
-        """Refreshes a single row in the table to reflect updated track data."""
+        """
+        Refreshes a single row in the table to reflect updated track data, and the rows of the
+        tracks whose new name started or stopped clashing with it.
+        """
         if row not in self.track_map:
             return
 
         self.is_handling_change = True
         track = self.track_map[row]
+        changed = self.duplicate_index.update(track)
         for col_idx, col_name in enumerate(self.columns):
             item = self.create_table_item(track, col_name)
             self.setItem(row, col_idx, item)
         
+        self.row_colors[row] = self.get_row_color(track)
         self._style_row_items(row)
-        self._check_duplicates_for_album(track)
         self.is_handling_change = False
 
+        for other in changed:
+            if other is not track:
+                self.refresh_row(self.track_rows[id(other)])
+
     def contextMenuEvent(self, event):
         item = self.itemAt(event.pos())
         if not item:
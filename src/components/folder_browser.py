@@ -1,3 +1,4 @@
+import os
 from PyQt6.QtWidgets import QTreeWidget, QTreeWidgetItem, QTreeWidgetItemIterator
 
 class FolderBrowser(QTreeWidget):
@@ -8,6 +9,7 @@ class FolderBrowser(QTreeWidget):
         super().__init__(parent)
         self.setHeaderLabel("Music Library")
         self.setIndentation(15)
+        self.artist_items = {}
 
     def populate_tree(self, root_path, folder_structure):
         """
@@ -17,16 +19,57 @@ class FolderBrowser(QTreeWidget):
             root_path (str): The root path of the library.
             folder_structure (dict): A nested dictionary representing the folder structure.
         """
+        self.begin_tree(root_path)
+        for artist, albums in folder_structure.items():
+            self.add_artist(artist, albums)
+
+    def begin_tree(self, root_path):
+        """Clears the tree for a new library. Artists are then added with add_artist."""
         self.root_path = root_path # Set root_path here
         self.clear()
-        for artist, albums in folder_structure.items():
-            artist_item = QTreeWidgetItem(self, [artist])
-            if albums:
-                for album in albums:
-                    album_item = QTreeWidgetItem(artist_item, [album])
-                    # You can store the full path in the item for later use
-                    # album_item.setData(0, Qt.ItemDataRole.UserRole, os.path.join(root_path, artist, album))
-            artist_item.setExpanded(False) # Collapse artists by default
+        self.artist_items = {}
+
+    def add_artist(self, artist, albums):
+        """
+        Appends an artist and its albums to the tree.
+        Used to populate the tree progressively while the library is being scanned.
+        """
+        artist_item = QTreeWidgetItem(self, [artist])
+        if albums:
+            for album in albums:
+                album_item = QTreeWidgetItem(artist_item, [album])
+                # You can store the full path in the item for later use
+                # album_item.setData(0, Qt.ItemDataRole.UserRole, os.path.join(root_path, artist, album))
+        artist_item.setExpanded(False) # Collapse artists by default
+        self.artist_items[artist] = artist_item
+        return artist_item
+
+    def update_artist(self, artist, albums):
+        """
+        Brings an artist's album list up to date, adding the artist if it is not in the tree yet.
+        Existing album items are kept, so the current selection survives when possible.
+        """
+        artist_item = self.artist_items.get(artist)
+        if artist_item is None:
+            return self.add_artist(artist, albums)
+
+        albums = list(albums)
+        wanted = set(albums)
+        for i in reversed(range(artist_item.childCount())):
+            if artist_item.child(i).text(0) not in wanted:
+                artist_item.removeChild(artist_item.child(i))
+
+        existing = {artist_item.child(i).text(0) for i in range(artist_item.childCount())}
+        for index, album in enumerate(albums):
+            if album not in existing:
+                artist_item.insertChild(index, QTreeWidgetItem([album]))
+        return artist_item
+
+    def remove_artist(self, artist):
+        """Removes an artist and its albums from the tree."""
+        artist_item = self.artist_items.pop(artist, None)
+        if artist_item is not None:
+            self.takeTopLevelItem(self.indexOfTopLevelItem(artist_item))
 
     def get_path_from_item(self, item):
         """
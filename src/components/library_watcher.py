@@ -0,0 +1,102 @@
+import os
+import sys
+import time
+from PyQt6.QtCore import QObject, QFileSystemWatcher, QTimer, pyqtSignal
+from utils.user_defaults import DEFAULT_MAX_WATCHED_FOLDERS
+
+class LibraryWatcher(QObject):
+    """
+    Watches the root, artist and album folders of a library for changes made by other programs.
+    Change events are debounced and emitted in batches, so a program writing many files
+    results in a few targeted refreshes instead of one per file.
+    """
+    folders_changed = pyqtSignal(set) # Paths of the folders that changed
+
+    DEBOUNCE_MS = 500 # Quiet time before a batch is emitted
+    MAX_DELAY_S = 5.0 # A batch is emitted after this long even if events keep coming
+
+    def __init__(self, parent=None, max_watched_folders=DEFAULT_MAX_WATCHED_FOLDERS):
+        super().__init__(parent)
+        self.max_watched_folders = max_watched_folders
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.on_directory_changed)
+        self.watched = set()
+        self.unwatched_count = 0 # Folders left out because of the watch budget
+        self.pending = set()
+        self.pending_since = None
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.flush)
+
+    def watch_budget(self):
+        """
+        Returns the number of folders that can be watched.
+        On Linux each folder uses an inotify watch, and the per-user limit is shared with every
+        other program, so at most half of it is used.
+        """
+        budget = self.max_watched_folders
+        if sys.platform.startswith('linux'):
+            try:
+                with open('/proc/sys/fs/inotify/max_user_watches') as f:
+                    budget = min(budget, int(f.read()) // 2)
+            except (OSError, ValueError):
+                pass
+        return budget
+
+    @staticmethod
+    def library_folders(library):
+        """Returns the folders of a library in watch priority order: root, artists, then albums."""
+        folders = [library.root_path]
+        artists = list(library.all_artists())
+        folders.extend(artist.path for artist in artists)
+        for artist in artists:
+            folders.extend(album.path for album in artist.albums + artist.empty_albums)
+        return folders
+
+    def watch_library(self, library):
+        """Watches the folders of a library, replacing the current watches where they differ."""
+        folders = self.library_folders(library)
+        budget = self.watch_budget()
+        wanted = set(folders[:budget])
+        self.unwatched_count = max(0, len(folders) - budget)
+
+        stale = self.watched - wanted
+        if stale:
+            self.watcher.removePaths(list(stale))
+        new = [path for path in folders[:budget] if path not in self.watched]
+        if new:
+            # Paths that could not be watched, e.g. because the system limit was reached
+            failed = set(self.watcher.addPaths(new))
+            self.unwatched_count += len(failed)
+            wanted -= failed
+        self.watched = wanted
+
+    def clear(self):
+        """Stops watching and drops any pending changes."""
+        if self.watched:
+            self.watcher.removePaths(list(self.watched))
+        self.watched = set()
+        self.unwatched_count = 0
+        self.pending = set()
+        self.pending_since = None
+        self.timer.stop()
+
+    def on_directory_changed(self, path):
+        self.pending.add(path)
+        # The watch is dropped when a folder is removed
+        if not os.path.isdir(path):
+            self.watched.discard(path)
+        now = time.monotonic()
+        if self.pending_since is None:
+            self.pending_since = now
+        if now - self.pending_since < self.MAX_DELAY_S:
+            self.timer.start(self.DEBOUNCE_MS)
+        elif not self.timer.isActive():
+            self.timer.start(0)
+
+    def flush(self):
+        """Emits the pending changes as one batch."""
+        if not self.pending:
+            return
+        changed, self.pending, self.pending_since = self.pending, set(), None
+        self.folders_changed.emit(changed)
@@ -0,0 +1,31 @@
+from PyQt6.QtCore import QObject, pyqtSignal
+from utils.file_operations import iter_save_jobs
+
+class SaveWorker(QObject):
+    """
+    Writes a batch of SaveJobs, captured on the UI thread, on a background thread. The outcome
+    of each file is recorded on its job, for the UI to apply to the tracks when it is done.
+    """
+    progress = pyqtSignal(int, int) # Files done, files total
+    finished = pyqtSignal(bool, str) # True if the save ran to completion, False if it was cancelled or failed; error message
+
+    def __init__(self, jobs, workers):
+        super().__init__()
+        self.jobs = jobs
+        self.workers = workers
+        self._cancelled = False
+
+    def cancel(self):
+        """Requests the save to stop; files already started are still completed."""
+        self._cancelled = True
+
+    def run(self):
+        completed, error = False, ""
+        try:
+            for _, done, total in iter_save_jobs(self.jobs, self.workers, lambda: self._cancelled):
+                self.progress.emit(done, total)
+            completed = not self._cancelled
+        except Exception as e:
+            error = str(e) or type(e).__name__
+        finally:
+            self.finished.emit(completed, error)
@@ -0,0 +1,85 @@
+from PyQt6.QtCore import QObject, pyqtSignal
+from utils.library_scanner import iter_scan_library, plan_refresh
+from utils.library_snapshot import find_changed_folders
+
+class ScanWorker(QObject):
+    """
+    Scans the library on a background thread.
+    Emits each artist as soon as it has been scanned, so the UI can be populated progressively.
+    """
+    artist_scanned = pyqtSignal(object, list) # Artist (or None if the root could not be listed), warnings
+    progress = pyqtSignal(int, int) # Artists done, artists total
+    finished = pyqtSignal(bool) # True if the scan ran to completion, False if it was cancelled or failed
+
+    def __init__(self, root_path, settings_manager, tag_cache=None):
+        super().__init__()
+        self.root_path = root_path
+        self.settings_manager = settings_manager
+        self.tag_cache = tag_cache
+        self._cancelled = False
+
+    def cancel(self):
+        """Requests the scan to stop after the artist currently being scanned."""
+        self._cancelled = True
+
+    def run(self):
+        completed = False
+        scan = iter_scan_library(self.root_path, self.settings_manager, tag_cache=self.tag_cache)
+        try:
+            for artist_obj, warnings, done, total in scan:
+                if self._cancelled:
+                    break
+                self.artist_scanned.emit(artist_obj, warnings)
+                self.progress.emit(done, total)
+            completed = not self._cancelled
+        except Exception as e:
+            # A failed scan is reported as incomplete, so it is neither refreshed nor saved as a snapshot
+            self.artist_scanned.emit(None, [f"Error scanning {self.root_path}: {e}"])
+        finally:
+            scan.close()
+            self.finished.emit(completed)
+
+
+class FolderCheckWorker(QObject):
+    """
+    Checks the folders and files of a library restored from a snapshot against the disk on a
+    background thread, comparing folder mtimes and file sizes and mtimes, so the library can
+    then be refreshed where it changed.
+    """
+    finished = pyqtSignal(set) # Paths of the folders that changed or are gone
+
+    def __init__(self, folders):
+        super().__init__()
+        self.folders = folders # (path, mtime_ns, files) from library_folder_states
+        self._cancelled = False
+
+    def cancel(self):
+        """Requests the check to stop; the folders found so far are still emitted."""
+        self._cancelled = True
+
+    def run(self):
+        self.finished.emit(find_changed_folders(self.folders, lambda: self._cancelled))
+
+
+class RefreshWorker(QObject):
+    """
+    Lists the library folders that changed on disk and reads their new and changed files on a
+    background thread (see plan_refresh), for the UI to patch the library with the result.
+    """
+    finished = pyqtSignal(object, str) # LibraryRefresh (None if it failed), error message
+
+    def __init__(self, library, settings_manager, tag_cache, dirs):
+        super().__init__()
+        self.library = library
+        self.settings_manager = settings_manager
+        self.tag_cache = tag_cache
+        self.dirs = dirs
+
+    def run(self):
+        refresh, error = None, ""
+        try:
+            refresh = plan_refresh(self.library, self.settings_manager, tag_cache=self.tag_cache, dirs=self.dirs)
+        except Exception as e:
+            error = str(e)
+        finally:
+            self.finished.emit(refresh, error)
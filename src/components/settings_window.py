@@ -1,4 +1,5 @@
-from PyQt6.QtWidgets import QDialog, QVBoxLayout, QTabWidget, QWidget, QFormLayout, QLineEdit, QCheckBox, QPushButton, QDialogButtonBox, QHBoxLayout, QFileDialog, QPlainTextEdit, QLabel
+from PyQt6.QtWidgets import QDialog, QVBoxLayout, QTabWidget, QWidget, QFormLayout, QLineEdit, QCheckBox, QPushButton, QDialogButtonBox, QHBoxLayout, QFileDialog, QPlainTextEdit, QLabel, QSpinBox, QComboBox
+from utils.user_defaults import DEFAULT_SCAN_WORKERS, DEFAULT_SAVE_WORKERS, DEFAULT_SCAN_ENGINE, DEFAULT_LAZY_SCAN, DEFAULT_WATCH_LIBRARY, DEFAULT_FILENAME_TEMPLATE
 
 class SettingsWindow(QDialog):
     """
@@ -52,6 +53,42 @@ class SettingsWindow(QDialog):
         self.auto_apply_check.setChecked(is_auto_apply)
         layout.addRow(self.auto_apply_check)
 
+        # Layout of the generated filenames
+        self.filename_template_field = QLineEdit(self.settings_manager.get('general', {}).get('filename_template', DEFAULT_FILENAME_TEMPLATE))
+        self.filename_template_field.setToolTip("Fields: {artist}, {title}, {suffixes} or any tag, e.g. {album} or {tracknumber:02}.\n"
+                                                "The extension of the file is kept.")
+        layout.addRow("Filename Template:", self.filename_template_field)
+
+        # Number of threads used to read tags when scanning
+        self.scan_workers_field = QSpinBox()
+        self.scan_workers_field.setRange(1, 64)
+        self.scan_workers_field.setValue(self.settings_manager.get('general', {}).get('scan_workers', DEFAULT_SCAN_WORKERS))
+        layout.addRow("Scan Workers (1 = sequential):", self.scan_workers_field)
+
+        # Number of threads used to write tags when saving
+        self.save_workers_field = QSpinBox()
+        self.save_workers_field.setRange(1, 64)
+        self.save_workers_field.setValue(self.settings_manager.get('general', {}).get('save_workers', DEFAULT_SAVE_WORKERS))
+        layout.addRow("Save Workers (1 = sequential):", self.save_workers_field)
+
+        # Threads share one CPU core for tag parsing; processes use one core per worker
+        self.scan_engine_field = QComboBox()
+        self.scan_engine_field.addItem("Threads", "threads")
+        self.scan_engine_field.addItem("Processes (one per CPU core)", "processes")
+        scan_engine = self.settings_manager.get('general', {}).get('scan_engine', DEFAULT_SCAN_ENGINE)
+        self.scan_engine_field.setCurrentIndex(max(0, self.scan_engine_field.findData(scan_engine)))
+        layout.addRow("Scan Engine:", self.scan_engine_field)
+
+        # Structure-first scan for large libraries
+        self.lazy_scan_check = QCheckBox("Only list folders when loading, read tags when an album is opened")
+        self.lazy_scan_check.setChecked(self.settings_manager.get('general', {}).get('lazy_scan', DEFAULT_LAZY_SCAN))
+        layout.addRow(self.lazy_scan_check)
+
+        # Live updates when other programs add, remove or edit files in the library
+        self.watch_library_check = QCheckBox("Watch the library folders for changes")
+        self.watch_library_check.setChecked(self.settings_manager.get('general', {}).get('watch_library', DEFAULT_WATCH_LIBRARY))
+        layout.addRow(self.watch_library_check)
+
     def create_blocklist_tab(self):
         layout = QVBoxLayout(self.blocklist_tab)
         
@@ -99,6 +136,16 @@ class SettingsWindow(QDialog):
         # Save auto-apply setting
         self.settings_manager.settings['general']['auto_apply_name_to_title'] = self.auto_apply_check.isChecked()
 
+        # Save the filename template; a malformed one is replaced by the default when used
+        self.settings_manager.settings['general']['filename_template'] = self.filename_template_field.text().strip() or DEFAULT_FILENAME_TEMPLATE
+
+        # Save scan worker count
+        self.settings_manager.settings['general']['scan_workers'] = self.scan_workers_field.value()
+        self.settings_manager.settings['general']['save_workers'] = self.save_workers_field.value()
+        self.settings_manager.settings['general']['scan_engine'] = self.scan_engine_field.currentData()
+        self.settings_manager.settings['general']['lazy_scan'] = self.lazy_scan_check.isChecked()
+        self.settings_manager.settings['general']['watch_library'] = self.watch_library_check.isChecked()
+
         # Save words to remove (split by newline)
         words_text = self.words_to_remove_field.toPlainText()
         words_to_remove = [line.strip() for line in words_text.split('\n') if line.strip()]
@@ -136,8 +183,6 @@ class SettingsWindow(QDialog):
             self.settings_manager.settings['tagging_and_columns']['default_tags'][tag] = checkbox.isChecked()
 
         # Persist to file
-        with open(self.settings_manager.settings_path, 'w') as f:
-            import json
-            json.dump(self.settings_manager.settings, f, indent=4)
+        self.settings_manager.save_settings()
         
         self.accept()
@@ -0,0 +1,23 @@
+from PyQt6.QtCore import QObject, pyqtSignal
+
+class ToolWorker(QObject):
+    """
+    Runs a batch title tool (see tools.batch_tools) on a background thread, over TrackStates
+    captured on the UI thread, and emits the resulting change set for the UI to apply.
+    """
+    finished = pyqtSignal(object, str) # Change set ({position in the batch: TrackChange}, None if the tool failed), error message
+
+    def __init__(self, batch_tool, states, *args):
+        super().__init__()
+        self.batch_tool = batch_tool
+        self.states = states
+        self.args = args
+
+    def run(self):
+        changes, error = None, ""
+        try:
+            changes = self.batch_tool(self.states, *self.args)
+        except Exception as e:
+            error = str(e) or type(e).__name__
+        finally:
+            self.finished.emit(changes, error)
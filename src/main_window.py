@@ -1,32 +1,41 @@
 
 import sys
 import os
-import re
-import mutagen
-import copy
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout,
-    QSplitter, QToolBar, QFileDialog, QTreeWidgetItem, QMessageBox
+    QSplitter, QToolBar, QFileDialog, QTreeWidgetItem, QMessageBox,
+    QProgressBar, QPushButton
 )
 from PyQt6.QtGui import QAction, QIcon
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QThread, QTimer
 
 from components.folder_browser import FolderBrowser
 from components.file_browser import FileBrowser
 from components.tools_panel import ToolsPanel
 from components.settings_window import SettingsWindow
 from components.warnings_window import WarningsWindow
+from components.scan_worker import ScanWorker, FolderCheckWorker, RefreshWorker
+from components.library_watcher import LibraryWatcher
+from components.tool_worker import ToolWorker
+from components.save_worker import SaveWorker
 from utils.settings_manager import SettingsManager
-from utils.data_models import Track, Album, Artist
-from utils.file_operations import save_track_changes
+from utils.data_models import Track, Album, Artist, Library
+from utils.library_cleanup import (prepare_tracks, has_pending_changes, get_save_workers, apply_save_jobs, count_saved_files,
+                                   update_library_paths, mark_tracks_changed)
+from utils.file_operations import plan_save, iter_save_jobs, BACKGROUND_SAVE_SIZE
+from utils.edit_session import EditSession
+from utils.duplicate_names import find_rename_collisions
+from utils.library_snapshot import save_snapshot, load_snapshot, library_folder_states
+from utils.library_scanner import (scan_library, read_metadata, refresh_library, apply_refresh, add_scanned_artist, load_album,
+                                   repartition_albums)
+from utils.tag_cache import TagCache
+from utils.user_defaults import DEFAULT_WATCH_LIBRARY, DEFAULT_MAX_WATCHED_FOLDERS
 from tools.tag_generators import generate_tags_from_filename
 from tools.filename_generators import generate_filename_from_tags
 from tools.preview_utils import clear_preview
-from tools.special_cleaner import extract_suffixes, normalize_apostrophes
 from tools.clear_hidden_tags import clear_hidden_tags
-from tools.camel_case import camel_case
-from tools.find_replace import find_replace_in_title
-from tools.name_to_tags import name_to_title
+from tools.batch_tools import (capture_tracks, apply_changes, batch_name_to_title, batch_camel_case, batch_find_replace,
+                               batch_generate_filenames, BACKGROUND_BATCH_SIZE)
 from components.find_replace_dialog import FindReplaceDialog
 
 class MainWindow(QMainWindow):
@@ -47,17 +56,49 @@ class MainWindow(QMainWindow):
 
         # Application state
         self.root_path = None
-        self.library = {}
+        self.library = Library()
+        # Pending edits of the library's tracks; the file browser shows views of them
+        self.edit_session = EditSession()
         self.current_tracks_in_view = []
         self.is_highlighting_active = False
         self.warnings = []
         self.side_panels_visible = True
         self.last_splitter_sizes = [126, 1000, 88]
+        self.scan_thread = None
+        self.scan_worker = None
+        self.scan_finished_callbacks = []
+        self.folder_check_thread = None
+        self.folder_check_worker = None
+        self.refresh_thread = None
+        self.refresh_worker = None
+        self.pending_refresh_folders = set() # Folders that changed while a refresh was running
+        self.refresh_saves_snapshot = False
+        self.tool_thread = None
+        self.tool_worker = None
+        self.tool_batch = None # Tracks, view and selected paths of the running batch tool
+        self.save_thread = None
+        self.save_worker = None
 
         # Managers and Components
         self.settings_manager = SettingsManager()
+        # The tag cache lives next to settings.json
+        settings_dir = os.path.dirname(os.path.abspath(self.settings_manager.settings_path))
+        self.tag_cache = TagCache(os.path.join(settings_dir, 'tag_cache.db'))
+        # So is the snapshot of the last scanned library
+        self.snapshot_path = os.path.join(settings_dir, 'library_snapshot.json')
+        # Older versions pickled it to library_snapshot.bin, which is no longer read
+        try:
+            os.remove(os.path.join(settings_dir, 'library_snapshot.bin'))
+        except OSError:
+            pass
+        self.library_watcher = LibraryWatcher(self)
+        self.library_watcher.folders_changed.connect(self.on_library_folders_changed)
         self.create_toolbar()
         self.setup_central_widget()
+        self.setup_status_bar()
+
+        # Show the last folder from its snapshot once the window is up
+        QTimer.singleShot(0, self.restore_last_folder)
 
     def setup_central_widget(self):
         """Initializes the main three-column layout with splitters."""
@@ -87,6 +128,28 @@ class MainWindow(QMainWindow):
         self.main_splitter.setSizes([126, 1000, 88])
         main_layout.addWidget(self.main_splitter)
 
+    def setup_status_bar(self):
+        """Creates the status bar with the (initially hidden) scan and save progress indicators."""
+        self.scan_progress_bar = QProgressBar()
+        self.scan_progress_bar.setMaximumWidth(300)
+        self.scan_progress_bar.setFormat("Scanning %v/%m artists")
+        self.scan_cancel_button = QPushButton("Cancel")
+        self.scan_cancel_button.clicked.connect(self.cancel_scan)
+        self.statusBar().addPermanentWidget(self.scan_progress_bar)
+        self.statusBar().addPermanentWidget(self.scan_cancel_button)
+        self.scan_progress_bar.hide()
+        self.scan_cancel_button.hide()
+
+        self.save_progress_bar = QProgressBar()
+        self.save_progress_bar.setMaximumWidth(300)
+        self.save_progress_bar.setFormat("Saving %v/%m files")
+        self.save_cancel_button = QPushButton("Cancel")
+        self.save_cancel_button.clicked.connect(self.cancel_save)
+        self.statusBar().addPermanentWidget(self.save_progress_bar)
+        self.statusBar().addPermanentWidget(self.save_cancel_button)
+        self.save_progress_bar.hide()
+        self.save_cancel_button.hide()
+
     def create_toolbar(self):
         """Creates the main toolbar and its actions."""
         toolbar = QToolBar("Main Toolbar")
@@ -157,18 +220,211 @@ class MainWindow(QMainWindow):
         """Opens a dialog to select the root music folder and scans the library."""
         path = QFileDialog.getExistingDirectory(self, "Select Root Music Folder")
         if path:
+            if path != self.root_path:
+                self.edit_session.clear()
             self.root_path = path
             # Save this as the last open folder
             self.settings_manager.settings.setdefault('general', {})['last_open_folder'] = path
             self.settings_manager.save_settings()
             self.rescan_library()
 
-    def rescan_library(self):
-        """Scans the library folder, updates the model, and refreshes the UI."""
-        self.library, self.warnings = self.scan_library(self.root_path)
+    def rescan_library(self, on_finished=None):
+        """
+        Scans the library folder on a background thread.
+        The model and the folder tree are filled in artist by artist as the scan progresses.
+        `on_finished` is called once the scan has completed or been cancelled.
+        """
+        self.cancel_scan()
+        self.cancel_folder_check()
+        self.cancel_library_refresh()
+        if on_finished:
+            self.scan_finished_callbacks.append(on_finished)
+
+        # The root mtime is taken before listing, so changes made during the scan are seen by the next refresh
+        try:
+            root_mtime = os.stat(self.root_path).st_mtime_ns
+        except OSError:
+            root_mtime = 0
+        self.library_watcher.clear()
+        self.library, self.warnings = Library(self.root_path, root_mtime), []
+        self.warnings_action.setText("Warnings (0)")
+        self.folder_browser.begin_tree(self.root_path)
+
+        self.scan_thread = QThread(self)
+        self.scan_worker = ScanWorker(self.root_path, self.settings_manager, self.tag_cache)
+        self.scan_worker.moveToThread(self.scan_thread)
+        self.scan_thread.started.connect(self.scan_worker.run)
+        self.scan_worker.artist_scanned.connect(self.on_artist_scanned)
+        self.scan_worker.progress.connect(self.on_scan_progress)
+        self.scan_worker.finished.connect(self.on_scan_finished)
+        self.scan_worker.finished.connect(self.scan_thread.quit)
+        self.scan_thread.finished.connect(self.scan_worker.deleteLater)
+        self.scan_thread.finished.connect(self.scan_thread.deleteLater)
+
+        self.scan_progress_bar.setRange(0, 0) # Busy indicator until the artist count is known
+        self.scan_progress_bar.show()
+        self.scan_cancel_button.show()
+        self.scan_thread.start()
+
+    def cancel_scan(self):
+        """Stops a running scan and waits for its thread, keeping the artists loaded so far."""
+        if not self.scan_worker:
+            return
+        worker, thread = self.scan_worker, self.scan_thread
+        # Detach first, so late signals from the old scan are ignored
+        self.scan_worker = None
+        self.scan_thread = None
+        worker.cancel()
+        thread.quit()
+        thread.wait()
+        self._finish_scan()
+
+    def on_artist_scanned(self, artist_obj, warnings):
+        """Adds a freshly scanned artist to the model and the folder tree."""
+        if self.sender() is not self.scan_worker:
+            return
+        self.warnings.extend(warnings)
         self.warnings_action.setText(f"Warnings ({len(self.warnings)})")
-        folder_structure = {artist.name: [album.name for album in artist.albums] for artist in self.library.values()}
-        self.folder_browser.populate_tree(self.root_path, folder_structure)
+        if artist_obj is None:
+            return
+        add_scanned_artist(self.library, artist_obj)
+        if artist_obj.albums:
+            self.folder_browser.add_artist(artist_obj.name, [album.name for album in artist_obj.albums])
+
+    def on_scan_progress(self, done, total):
+        """Updates the scan progress indicator."""
+        if self.sender() is not self.scan_worker:
+            return
+        self.scan_progress_bar.setRange(0, total)
+        self.scan_progress_bar.setValue(done)
+
+    def on_scan_finished(self, completed):
+        """Called when the background scan has completed or been cancelled."""
+        if self.sender() is not self.scan_worker:
+            return
+        self.library.is_complete = completed
+        self.edit_session.rebase(self.library)
+        self.scan_worker = None
+        self.scan_thread = None
+        self.update_library_watches()
+        self.save_library_snapshot()
+        self._finish_scan()
+
+    def _finish_scan(self):
+        """Hides the progress indicator and runs the pending scan callbacks."""
+        self.scan_progress_bar.hide()
+        self.scan_cancel_button.hide()
+        callbacks, self.scan_finished_callbacks = self.scan_finished_callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def restore_last_folder(self):
+        """Shows the last opened folder at startup, if a snapshot of it was saved."""
+        last_path = self.settings_manager.get('general', {}).get('last_open_folder', '')
+        if last_path and os.path.isdir(last_path):
+            self.restore_library_snapshot(last_path)
+
+    def restore_library_snapshot(self, root_path):
+        """
+        Shows the library saved in the snapshot of `root_path` right away, then checks its
+        folders against the disk in the background and refreshes the ones that changed.
+        Returns False if there is no usable snapshot of that folder.
+        """
+        snapshot = load_snapshot(self.snapshot_path, root_path)
+        if snapshot is None:
+            return False
+        self.cancel_scan()
+        self.cancel_folder_check()
+        self.cancel_library_refresh()
+        self.library_watcher.clear()
+        if root_path != self.root_path:
+            self.edit_session.clear()
+        self.root_path = root_path
+        self.library, self.warnings = snapshot
+        self.edit_session.rebase(self.library)
+        self.warnings_action.setText(f"Warnings ({len(self.warnings)})")
+        self.folder_browser.begin_tree(root_path)
+        for artist in self.library.values():
+            self.folder_browser.add_artist(artist.name, [album.name for album in artist.albums])
+        self.update_library_watches()
+
+        self.folder_check_thread = QThread(self)
+        self.folder_check_worker = FolderCheckWorker(library_folder_states(self.library))
+        self.folder_check_worker.moveToThread(self.folder_check_thread)
+        self.folder_check_thread.started.connect(self.folder_check_worker.run)
+        self.folder_check_worker.finished.connect(self.on_folder_check_finished)
+        self.folder_check_worker.finished.connect(self.folder_check_thread.quit)
+        self.folder_check_thread.finished.connect(self.folder_check_worker.deleteLater)
+        self.folder_check_thread.finished.connect(self.folder_check_thread.deleteLater)
+        self.folder_check_thread.start()
+        return True
+
+    def cancel_folder_check(self):
+        """Stops a running snapshot check and waits for its thread."""
+        if not self.folder_check_worker:
+            return
+        worker, thread = self.folder_check_worker, self.folder_check_thread
+        # Detach first, so the result of the old check is ignored
+        self.folder_check_worker = None
+        self.folder_check_thread = None
+        worker.cancel()
+        thread.quit()
+        thread.wait()
+
+    def on_folder_check_finished(self, changed_folders):
+        """Refreshes the folders of a restored snapshot that changed on disk since it was saved."""
+        if self.sender() is not self.folder_check_worker:
+            return
+        self.folder_check_worker = None
+        self.folder_check_thread = None
+        if changed_folders:
+            self.refresh_library_folders(changed_folders, save_snapshot=True)
+
+    def save_library_snapshot(self):
+        """Saves the library to the snapshot shown at the next startup, if it is a complete scan."""
+        if not self.can_refresh_incrementally():
+            return
+        try:
+            save_snapshot(self.snapshot_path, self.library, self.warnings)
+        except OSError as e:
+            self.statusBar().showMessage(f"Could not save the library snapshot: {e}", 5000)
+
+    def _get_library_tracks_for_item(self, selected_item):
+        """
+        Returns the library tracks of the artist or album shown by a folder tree item.
+        Albums left unloaded by a lazy scan are loaded first.
+        """
+        if selected_item.parent() is None: # Artist selected
+            artist_name = selected_item.text(0)
+            albums = self.library[artist_name].albums if artist_name in self.library else []
+        else: # Album selected
+            album_name = selected_item.text(0)
+            artist_name = selected_item.parent().text(0)
+            albums = [album for album in self.library[artist_name].albums if album.name == album_name] if artist_name in self.library else []
+
+        self.load_albums(artist_name, albums)
+        tracks = []
+        for album in albums:
+            tracks.extend(album.tracks)
+        return tracks
+
+    def load_albums(self, artist_name, albums):
+        """Reads the tracks of lazily scanned albums, once per album."""
+        unloaded = [album for album in albums if not album.is_loaded]
+        if not unloaded:
+            return
+        for album in unloaded:
+            self.warnings.extend(load_album(album, artist_name, self.settings_manager, errors=self.warnings, tag_cache=self.tag_cache))
+            self.library.index_album(album)
+        self.warnings_action.setText(f"Warnings ({len(self.warnings)})")
+
+        artist = self.library[artist_name]
+        if repartition_albums(artist):
+            if not artist.albums:
+                del self.library[artist_name]
+                self.library.empty_artists[artist_name] = artist
+            # Albums without any tracks are removed from the tree once the selection change is handled
+            QTimer.singleShot(0, lambda: self.apply_library_changes({artist_name}, set()))
 
     def on_folder_selected(self):
         """Handles selection changes in the folder browser to update the file browser."""
@@ -180,43 +436,8 @@ class MainWindow(QMainWindow):
             self.update_tags_panel_with_selected_tracks() # Add this line
             return
 
-        selected_item = selected_items[0]
-        self.current_tracks_in_view = []
+        self.current_tracks_in_view = self.show_library_tracks(self._get_library_tracks_for_item(selected_items[0]))
 
-        if selected_item.parent() is None: # Artist selected
-            artist_name = selected_item.text(0)
-            if artist_name in self.library:
-                for album in self.library[artist_name].albums:
-                    self.current_tracks_in_view.extend(copy.deepcopy(album.tracks))
-        else: # Album selected
-            album_name = selected_item.text(0)
-            artist_name = selected_item.parent().text(0)
-            if artist_name in self.library:
-                for album in self.library[artist_name].albums:
-                    if album.name == album_name:
-                        self.current_tracks_in_view.extend(copy.deepcopy(album.tracks))
-        
-        # --- Auto-apply Name > Title Logic ---
-        # Check setting
-        auto_apply = self.settings_manager.get('general', {}).get('auto_apply_name_to_title', False)
-        if auto_apply and self.current_tracks_in_view:
-            # Count tracks with missing/empty titles (checking the original tags or if clean_title is also empty initially)
-            # We check the 'title' from tags.
-            missing_title_count = sum(1 for t in self.current_tracks_in_view if not t.tags.get('title', '').strip())
-            total_tracks = len(self.current_tracks_in_view)
-            
-            if total_tracks > 0:
-                percentage_missing = (missing_title_count / total_tracks) * 100
-                # If > 80% are missing titles, run name_to_title
-                if percentage_missing > 80:
-                    for track in self.current_tracks_in_view:
-                        name_to_title(track, self.settings_manager)
-
-        # Auto-generate filename preview
-        # Auto-generate filename preview
-        for track in self.current_tracks_in_view:
-            generate_filename_from_tags(track, self.settings_manager)
-        
         self.refresh_file_browser()
         self.update_tags_panel_with_selected_tracks()
         # Manually trigger the count update after refreshing the view
@@ -239,56 +460,83 @@ class MainWindow(QMainWindow):
     # --- TOOL HANDLERS ---
     def handle_name_to_title(self):
         """Applies the 'name to title' tool to selected tracks."""
-        selected_tracks = self.file_browser.get_selected_tracks()
-        selected_paths = [track.path for track in selected_tracks]
-
-        # Temporarily disconnect the signal to prevent premature refresh
-        self.tools_panel.tag_editor_widget.tags_applied.disconnect(self.refresh_file_browser)
-
-        try:
-            # First, apply any pending changes from the tag editor to the data model
-            self.tools_panel.tag_editor_widget.apply_tags_to_selected()
-
-            # Then, generate title from the filename
-            tracks_to_operate_on = self._get_tracks_for_tool_operation()
-            if tracks_to_operate_on:
-                for track in tracks_to_operate_on:
-                    name_to_title(track, self.settings_manager)
-
-            # Finally, manually refresh the browser to show all changes
-            self.refresh_file_browser()
-            self.file_browser.select_tracks_by_path(selected_paths)
-
-        finally:
-            # Always reconnect the signal
-            self.tools_panel.tag_editor_widget.tags_applied.connect(self.refresh_file_browser)
+        self.run_batch_tool(batch_name_to_title, self.settings_manager, apply_tag_editor=True)
 
     def handle_generate_filename_from_tags(self):
         """Applies the 'filename from tags' tool to selected tracks."""
-        selected_tracks = self.file_browser.get_selected_tracks()
-        selected_paths = [track.path for track in selected_tracks]
+        self.run_batch_tool(batch_generate_filenames, self.settings_manager, apply_tag_editor=True)
 
-        # Temporarily disconnect the signal to prevent premature refresh
-        self.tools_panel.tag_editor_widget.tags_applied.disconnect(self.refresh_file_browser)
+    def run_batch_tool(self, batch_tool, *args, tracks=None, apply_tag_editor=False):
+        """
+        Runs a batch title tool over the tracks to operate on and applies its change set.
+        Large batches run on a background thread; the tools stay disabled until it is done.
+        If `apply_tag_editor` is set, pending changes of the tag editor are applied first.
+        """
+        if self.tool_worker:
+            return
+        selected_paths = [track.path for track in self.file_browser.get_selected_tracks()]
+
+        if apply_tag_editor:
+            # Temporarily disconnect the signal to prevent premature refresh
+            self.tools_panel.tag_editor_widget.tags_applied.disconnect(self.refresh_file_browser)
+            try:
+                self.tools_panel.tag_editor_widget.apply_tags_to_selected()
+            finally:
+                self.tools_panel.tag_editor_widget.tags_applied.connect(self.refresh_file_browser)
+
+        if tracks is None:
+            tracks = self._get_tracks_for_tool_operation()
+        if not tracks:
+            return
+        self.tool_batch = (tracks, self.current_tracks_in_view, selected_paths)
+        states = capture_tracks(tracks)
+        if len(states) < BACKGROUND_BATCH_SIZE:
+            self.apply_batch_changes(batch_tool(states, *args))
+            return
 
+        self.tools_panel.tools_group.setEnabled(False)
+        self.statusBar().showMessage(f"Processing {len(states)} tracks...")
+        self.tool_thread = QThread(self)
+        self.tool_worker = ToolWorker(batch_tool, states, *args)
+        self.tool_worker.moveToThread(self.tool_thread)
+        self.tool_thread.started.connect(self.tool_worker.run)
+        self.tool_worker.finished.connect(self.on_batch_tool_finished)
+        self.tool_worker.finished.connect(self.tool_thread.quit)
+        self.tool_thread.finished.connect(self.tool_worker.deleteLater)
+        self.tool_thread.finished.connect(self.tool_thread.deleteLater)
+        self.tool_thread.start()
+
+    def on_batch_tool_finished(self, changes, error):
+        """
+        Applies the change set of a batch tool run on the background thread, or reports why the
+        tool failed. The tools are enabled again in either case.
+        """
+        if self.sender() is not self.tool_worker:
+            return
+        self.tool_worker = None
+        self.tool_thread = None
         try:
-            # First, apply any pending changes from the tag editor to the data model
-            self.tools_panel.tag_editor_widget.apply_tags_to_selected()
-
-            # Then, generate the new filename from the updated tags
-            tracks_to_operate_on = self._get_tracks_for_tool_operation()
-            if tracks_to_operate_on:
-                for track in tracks_to_operate_on:
-                    if not track.is_manual_rename:
-                        generate_filename_from_tags(track, self.settings_manager)
-            
-            # Finally, manually refresh the browser to show all changes
-            self.refresh_file_browser()
-            self.file_browser.select_tracks_by_path(selected_paths)
-
+            if changes is None:
+                self.statusBar().showMessage(f"The tool failed, nothing was changed: {error}", 10000)
+            else:
+                self.statusBar().clearMessage()
+                self.apply_batch_changes(changes)
         finally:
-            # Always reconnect the signal
-            self.tools_panel.tag_editor_widget.tags_applied.connect(self.refresh_file_browser)
+            self.tool_batch = None
+            self.update_tools_state()
+
+    def apply_batch_changes(self, changes):
+        """
+        Applies the change set of the running batch tool to its tracks in one go, then refreshes
+        the file browser. It is dropped if another folder was shown in the meantime.
+        """
+        tracks, view, selected_paths = self.tool_batch
+        self.tool_batch = None
+        if view is not self.current_tracks_in_view:
+            return
+        apply_changes(tracks, changes)
+        self.refresh_file_browser()
+        self.file_browser.select_tracks_by_path(selected_paths)
 
     def handle_clear_preview(self):
         """Clears all proposed changes for selected tracks."""
@@ -317,16 +565,7 @@ class MainWindow(QMainWindow):
 
     def handle_camel_case_title(self):
         """Applies camel case formatting to the Title tag of selected tracks."""
-        selected_tracks = self.file_browser.get_selected_tracks()
-        selected_paths = [track.path for track in selected_tracks]
-
-        tracks_to_operate_on = self._get_tracks_for_tool_operation()
-        if not tracks_to_operate_on:
-            return
-        
-        camel_case(tracks_to_operate_on, self.settings_manager)
-        self.refresh_file_browser()
-        self.file_browser.select_tracks_by_path(selected_paths)
+        self.run_batch_tool(batch_camel_case, self.settings_manager)
 
     def handle_find_replace(self):
         """Opens a dialog for find/replace and applies it to the Title tag."""
@@ -338,19 +577,29 @@ class MainWindow(QMainWindow):
         if dialog.exec():
             find_text, replace_text = dialog.get_values()
             if find_text:  # Only proceed if there's something to find
-                selected_paths = [track.path for track in self.file_browser.get_selected_tracks()]
-
-                find_replace_in_title(tracks_to_operate_on, find_text, replace_text, self.settings_manager)
-
-                self.refresh_file_browser()
-                self.file_browser.select_tracks_by_path(selected_paths)
+                self.run_batch_tool(batch_find_replace, find_text, replace_text, self.settings_manager,
+                                    tracks=tracks_to_operate_on)
 
     def handle_clean_special_folder_name(self):
         """Placeholder for cleaning special folder name."""
         pass
 
+    def show_library_tracks(self, lib_tracks):
+        """
+        Returns the views of library tracks shown in the file browser, with their pending edits.
+        The automatic changes (Name > Title and the filename preview) are proposed on the library
+        tracks themselves; tracks edited by hand get their filename preview from their edits.
+        """
+        prepare_tracks(lib_tracks, self.settings_manager)
+        views = self.edit_session.views(lib_tracks)
+        for view in views:
+            if not view.is_manual_rename and self.edit_session.get_edit(view.base) is not None:
+                generate_filename_from_tags(view, self.settings_manager)
+        return views
+
     def handle_revert_changes(self):
         """Reloads the current view, discarding all pending changes."""
+        self.edit_session.discard([track.base for track in self.current_tracks_in_view])
         self.on_folder_selected()
 
     def handle_clear_hidden_tags(self):
@@ -373,6 +622,7 @@ class MainWindow(QMainWindow):
         selected_paths = [track.path for track in selected_tracks]
 
         cleared_count, errors = clear_hidden_tags(tracks_to_operate_on, tags_to_keep)
+        self.tag_cache.invalidate([track.path for track in tracks_to_operate_on])
 
         if errors:
             warnings_text = "\n".join(errors)
@@ -380,24 +630,156 @@ class MainWindow(QMainWindow):
             dialog.exec()
             self.tools_panel.save_status_label.setText(f"{len(errors)} errors occurred.")
         else:
-            # Update the main library object
-            for track in tracks_to_operate_on:
-                for artist in self.library.values():
-                    for album in artist.albums:
-                        for i, t in enumerate(album.tracks):
-                            if t.path == track.path:
-                                album.tracks[i] = track
-                                break
+            # The tags were removed from the library tracks through the views
+            mark_tracks_changed(self.library, tracks_to_operate_on)
+            self.save_library_snapshot()
 
             self.refresh_file_browser()
             self.file_browser.select_tracks_by_path(selected_paths)
             self.tools_panel.save_status_label.setText(f"Cleared {cleared_count} hidden tags.")
 
     def handle_refresh(self):
-        """Refreshes and reloads the current folder and files."""
-        if self.root_path:
+        """Refreshes the current folder, rescanning only what changed on disk when possible."""
+        if not self.root_path:
+            return
+        if self.can_refresh_incrementally():
+            self.refresh_library_incrementally(check_files=True)
+        else:
             self.rescan_library()
 
+    def can_refresh_incrementally(self):
+        """True if the loaded library is a complete scan of the current root folder."""
+        return (isinstance(self.library, Library) and self.library.is_complete
+                and self.library.root_path == self.root_path and self.scan_worker is None)
+
+    def refresh_library_incrementally(self, force=False, reclean=False, check_files=False):
+        """
+        Rescans only the folders and files that changed since the last scan and patches the
+        library in place, keeping pending changes on untouched tracks. With `check_files`, the
+        files of unchanged folders are stat'ed too, to find files edited in place.
+        """
+        # A running refresh of a few folders would be applied over this one; this one covers them
+        self.cancel_library_refresh()
+        changed_artists, changed_albums = refresh_library(
+            self.library, self.settings_manager, tag_cache=self.tag_cache, force=force, reclean=reclean,
+            check_files=check_files
+        )
+        self.apply_library_changes(changed_artists, changed_albums)
+        self.update_library_watches()
+        self.save_library_snapshot()
+
+    def update_library_watches(self):
+        """Watches the folders of a complete library, if enabled in the settings."""
+        if self.settings_manager.get('general', {}).get('watch_library', DEFAULT_WATCH_LIBRARY) and self.can_refresh_incrementally():
+            self.library_watcher.max_watched_folders = self.settings_manager.get('general', {}).get('max_watched_folders', DEFAULT_MAX_WATCHED_FOLDERS)
+            self.library_watcher.watch_library(self.library)
+        else:
+            self.library_watcher.clear()
+
+    def on_library_folders_changed(self, folders):
+        """Applies changes made to the library folders by other programs."""
+        self.refresh_library_folders(folders)
+
+    def refresh_library_folders(self, folders, save_snapshot=False):
+        """
+        Refreshes the given library folders on a background thread, then patches the library
+        with what changed (see on_library_refresh_finished). Folders that change while a refresh
+        is running are refreshed once it is done. With `save_snapshot`, the snapshot is saved
+        after the library was patched.
+        """
+        if not self.can_refresh_incrementally():
+            return
+        self.refresh_saves_snapshot = self.refresh_saves_snapshot or save_snapshot
+        if self.refresh_worker:
+            self.pending_refresh_folders.update(folders)
+            return
+
+        self.refresh_thread = QThread(self)
+        self.refresh_worker = RefreshWorker(self.library, self.settings_manager, self.tag_cache, set(folders))
+        self.refresh_worker.moveToThread(self.refresh_thread)
+        self.refresh_thread.started.connect(self.refresh_worker.run)
+        self.refresh_worker.finished.connect(self.on_library_refresh_finished)
+        self.refresh_worker.finished.connect(self.refresh_thread.quit)
+        self.refresh_thread.finished.connect(self.refresh_worker.deleteLater)
+        self.refresh_thread.finished.connect(self.refresh_thread.deleteLater)
+        self.refresh_thread.start()
+
+    def cancel_library_refresh(self):
+        """Waits for a running folder refresh and drops its result, and the folders still pending."""
+        self.pending_refresh_folders = set()
+        self.refresh_saves_snapshot = False
+        if not self.refresh_worker:
+            return
+        thread = self.refresh_thread
+        # Detach first, so the result of the old refresh is ignored
+        self.refresh_worker = None
+        self.refresh_thread = None
+        thread.quit()
+        thread.wait()
+
+    def on_library_refresh_finished(self, refresh, error):
+        """Patches the library with the changes found by a background folder refresh."""
+        if self.sender() is not self.refresh_worker:
+            return
+        self.refresh_worker = None
+        self.refresh_thread = None
+        if refresh is None:
+            # The root folder itself is gone
+            self.warnings.append(f"Error refreshing {self.root_path}: {error}")
+            self.warnings_action.setText(f"Warnings ({len(self.warnings)})")
+        else:
+            changed_artists, changed_albums = apply_refresh(
+                self.library, refresh, self.settings_manager, tag_cache=self.tag_cache
+            )
+            self.apply_library_changes(changed_artists, changed_albums)
+            if changed_artists:
+                self.update_library_watches()
+
+        folders, self.pending_refresh_folders = self.pending_refresh_folders, set()
+        if folders:
+            self.refresh_library_folders(folders)
+        elif self.refresh_saves_snapshot:
+            self.refresh_saves_snapshot = False
+            self.save_library_snapshot()
+
+    def apply_library_changes(self, changed_artists, changed_albums):
+        """Updates the folder tree, the warnings and the current view after the library was patched."""
+        self.edit_session.rebase(self.library)
+        for artist_name in changed_artists:
+            if artist_name in self.library:
+                artist = self.library[artist_name]
+                self.folder_browser.update_artist(artist_name, [album.name for album in artist.albums])
+            else:
+                self.folder_browser.remove_artist(artist_name)
+
+        self.warnings = self.library.get_warnings()
+        self.warnings_action.setText(f"Warnings ({len(self.warnings)})")
+
+        # Update the view if it shows any of the changed folders
+        selected_items = self.folder_browser.selectedItems()
+        if not selected_items:
+            return
+        selected_item = selected_items[0]
+        artist_item = selected_item.parent() or selected_item
+        selected_path = os.path.join(self.root_path, artist_item.text(0))
+        if selected_item is not artist_item:
+            selected_path = os.path.join(selected_path, selected_item.text(0))
+        if artist_item.text(0) in changed_artists or any(
+            path == selected_path or path.startswith(selected_path + os.sep) for path in changed_albums
+        ):
+            self.merge_library_into_view(selected_item)
+
+    def merge_library_into_view(self, selected_item):
+        """
+        Brings the current view up to date with the library after it was patched.
+        Tracks that did not change on disk keep their pending changes in the view.
+        """
+        selected_paths = [track.path for track in self.file_browser.get_selected_tracks()]
+        self.current_tracks_in_view = self.show_library_tracks(self._get_library_tracks_for_item(selected_item))
+        self.refresh_file_browser()
+        self.file_browser.select_tracks_by_path(selected_paths)
+        self.update_tags_panel_with_selected_tracks()
+
     def handle_highlight_special(self):
         pass
 
@@ -429,6 +811,8 @@ class MainWindow(QMainWindow):
 
     def handle_open_settings(self):
         """Opens the settings dialog and applies changes if saved."""
+        general = self.settings_manager.get('general', {})
+        scan_settings = (list(general.get('excluded_folders', [])), list(general.get('supported_audio_formats', [])))
         dialog = SettingsWindow(self, self.settings_manager)
         if dialog.exec():
             # Store current state to restore after refresh
@@ -438,42 +822,26 @@ class MainWindow(QMainWindow):
                 # Assuming the first selected item is the relevant one
                 current_selected_folder_path = self.folder_browser.get_path_from_item(selected_items[0])
 
-            # Store current proposed changes for all tracks
-            # This is a simplified approach; a more robust solution might involve
-            # deep copying or a dedicated state management system.
-            # For now, we'll store proposed changes for tracks that have them.
-            proposed_changes_map = {}
-            for artist in self.library.values():
-                for album in artist.albums:
-                    for track in album.tracks:
-                        if track.proposed_tags or track.proposed_filename:
-                            proposed_changes_map[track.path] = {
-                                'proposed_tags': track.proposed_tags.copy(),
-                                'proposed_filename': track.proposed_filename,
-                                'is_manual_rename': track.is_manual_rename
-                            }
-
             self.settings_manager.load_settings()
             self.update_file_browser_columns()
-            
-            if self.root_path:
-                self.rescan_library() # This will re-populate self.library and clear proposed changes
-
-                # Reapply proposed changes
-                for artist in self.library.values():
-                    for album in artist.albums:
-                        for track in album.tracks:
-                            if track.path in proposed_changes_map:
-                                changes = proposed_changes_map[track.path]
-                                track.proposed_tags = changes['proposed_tags']
-                                track.proposed_filename = changes['proposed_filename']
-                                track.is_manual_rename = changes['is_manual_rename']
-                
-                # Re-select the previously selected folder
-                if current_selected_folder_path:
-                    self.folder_browser.select_path(current_selected_folder_path)
-                
-                self.refresh_file_browser() # Refresh file browser to show reapplied changes
+
+            if self.root_path and self.can_refresh_incrementally():
+                # Only re-list everything if the folders or files to include changed
+                general = self.settings_manager.get('general', {})
+                structure_changed = scan_settings != (general.get('excluded_folders', []), general.get('supported_audio_formats', []))
+                self.refresh_library_incrementally(force=structure_changed, reclean=True)
+                self.on_folder_selected()
+            elif self.root_path:
+                def reapply_changes():
+                    # The pending edits were moved to the rescanned tracks when the scan finished
+                    # Re-select the previously selected folder
+                    if current_selected_folder_path:
+                        self.folder_browser.select_path(current_selected_folder_path)
+
+                    self.refresh_file_browser() # Refresh file browser to show reapplied changes
+
+                # This will re-populate self.library with the automatic changes of the new settings
+                self.rescan_library(on_finished=reapply_changes)
 
     def handle_show_warnings(self):
         """Displays the list of structural library warnings."""
@@ -488,14 +856,20 @@ class MainWindow(QMainWindow):
         """Loads the folder that was last opened."""
         last_path = self.settings_manager.get('general', {}).get('last_open_folder', '')
         if last_path and os.path.exists(last_path) and os.path.isdir(last_path):
-            self.root_path = last_path
-            self.rescan_library()
+            if not self.restore_library_snapshot(last_path):
+                self.root_path = last_path
+                self.rescan_library()
             
         else:
             QMessageBox.warning(self, "Load Error", f"Last folder not found or not set: {last_path}")
 
     def handle_save_changes(self):
-        """Saves all proposed tag and filename changes to disk for the selected artist's folder."""
+        """
+        Saves all proposed tag and filename changes to disk for the selected artist's folder.
+        Tags are written on the save workers; large saves run in the background (see finish_save).
+        """
+        if self.save_worker:
+            return
         selected_items = self.folder_browser.selectedItems()
         if not selected_items:
             self.tools_panel.save_status_label.setText("Select an artist/album to save.")
@@ -518,48 +892,131 @@ class MainWindow(QMainWindow):
         # Get the tracks to operate on, respecting the current selection
         tracks_to_operate_on = self._get_tracks_for_tool_operation()
 
-        tracks_with_changes = [
-            track for track in tracks_to_operate_on
-            if track.proposed_tags or (track.proposed_filename and track.proposed_filename != track.filename)
-        ]
-
-        # Store old paths for library update
-        for track in tracks_with_changes:
-            track.old_path = track.path
+        tracks_with_changes = [track for track in tracks_to_operate_on if has_pending_changes(track)]
 
         if not tracks_with_changes:
             self.tools_panel.save_status_label.setText("No changes to save.")
             return
 
-        errors = []
-        success_count = 0
-        for track in tracks_with_changes:
-            success, error_message = save_track_changes(track)
-            if success:
-                success_count += 1
-                track.has_error = False
-            else:
-                errors.append(error_message)
+        # Renames are checked against each other and the files on disk before anything is written
+        collisions = find_rename_collisions(tracks_with_changes)
+        if collisions:
+            for track, _ in collisions:
                 track.has_error = True
-
-        if errors:
-            warnings_text = "\n".join(errors)
-            dialog = WarningsWindow(self, warnings_text)
+            dialog = WarningsWindow(self, "\n".join(message for _, message in collisions))
             dialog.exec()
-            self.tools_panel.save_status_label.setText(f"{len(errors)} errors occurred.")
-        else:
-            self.tools_panel.save_status_label.setText(f"Saved {success_count} files successfully.")
+            self.tools_panel.save_status_label.setText(f"{len(collisions)} rename collisions, nothing was saved.")
+            selected_paths = [track.path for track in self.file_browser.get_selected_tracks()]
+            self.refresh_file_browser()
+            self.file_browser.select_tracks_by_path(selected_paths)
+            return
+
+        jobs = [plan_save(track) for track in tracks_with_changes]
+        workers = get_save_workers(self.settings_manager)
+        if len(jobs) <= BACKGROUND_SAVE_SIZE:
+            for _ in iter_save_jobs(jobs, workers):
+                pass
+            self.finish_save(jobs)
+            return
+
+        # Large saves run on a background thread; the tools stay disabled until it is done
+        self.tools_panel.setEnabled(False)
+        self.save_thread = QThread(self)
+        self.save_worker = SaveWorker(jobs, workers)
+        self.save_worker.moveToThread(self.save_thread)
+        self.save_thread.started.connect(self.save_worker.run)
+        self.save_worker.progress.connect(self.on_save_progress)
+        self.save_worker.finished.connect(self.on_save_finished)
+        self.save_worker.finished.connect(self.save_thread.quit)
+        self.save_thread.finished.connect(self.save_worker.deleteLater)
+        self.save_thread.finished.connect(self.save_thread.deleteLater)
+
+        self.save_progress_bar.setRange(0, len(jobs))
+        self.save_progress_bar.setValue(0)
+        self.save_progress_bar.show()
+        self.save_cancel_button.show()
+        self.save_thread.start()
+
+    def on_save_progress(self, done, total):
+        """Updates the save progress indicator."""
+        if self.sender() is not self.save_worker:
+            return
+        self.save_progress_bar.setRange(0, total)
+        self.save_progress_bar.setValue(done)
+
+    def cancel_save(self, interactive=True):
+        """
+        Stops a running save after the files already started. The progress indicator stays up,
+        with Cancel disabled, until on_save_finished applies the files saved so far; the others
+        keep their pending changes. Without `interactive`, for when the window closes, it waits
+        for the save thread and applies them at once, reporting and refreshing nothing.
+        """
+        if not self.save_worker:
+            return
+        self.save_worker.cancel()
+        if interactive:
+            self.save_cancel_button.setEnabled(False)
+            self.tools_panel.save_status_label.setText("Cancelling the save...")
+            return
+        worker, thread = self.save_worker, self.save_thread
+        # Detach first, so the late finished signal is ignored
+        self.save_worker = None
+        self.save_thread = None
+        thread.quit()
+        thread.wait()
+        self._end_save(worker.jobs, False, interactive)
+
+    def on_save_finished(self, completed, error):
+        """Called when the background save has completed, been cancelled or failed."""
+        # A save cancelled as the window closes is detached, and its worker may be deleted
+        # before this signal arrives
+        if self.save_worker is None or self.sender() is not self.save_worker:
+            return
+        jobs = self.save_worker.jobs
+        self.save_worker = None
+        self.save_thread = None
+        self._end_save(jobs, completed)
+        if error:
+            self.tools_panel.save_status_label.setText(
+                f"The save failed, the files not saved keep their changes: {error}")
+
+    def _end_save(self, jobs, completed, interactive=True):
+        """Hides the save progress indicator and applies the outcome of the save."""
+        self.save_progress_bar.hide()
+        self.save_cancel_button.hide()
+        self.save_cancel_button.setEnabled(True)
+        self.tools_panel.setEnabled(True)
+        self.finish_save(jobs, completed, interactive)
+
+    def finish_save(self, jobs, completed=True, interactive=True):
+        """
+        Applies the outcome of the saved files to their tracks and the library, reports the
+        errors and refreshes the view. Files a cancelled save did not reach are left as they were.
+        """
+        saved_tracks, errors = apply_save_jobs(jobs, self.tag_cache)
+        success_count = len(saved_tracks) - len(errors)
+
+        if interactive:
+            if errors:
+                warnings_text = "\n".join(errors)
+                dialog = WarningsWindow(self, warnings_text)
+                dialog.exec()
+                self.tools_panel.save_status_label.setText(f"{len(errors)} errors occurred.")
+            elif not completed:
+                self.tools_panel.save_status_label.setText(f"Saved {success_count} of {len(jobs)} files, the save was cancelled.")
+            else:
+                written, renamed_only, skipped = count_saved_files(jobs)
+                self.tools_panel.save_status_label.setText(
+                    f"Saved {success_count} files successfully ({written} written, {renamed_only} renamed only, {skipped} unchanged).")
 
         # Update self.library with new filenames and paths to reflect changes when navigating back
-        for track in tracks_with_changes:
-            old_path = getattr(track, 'old_path', track.path)
-            for artist in self.library.values():
-                for album in artist.albums:
-                    for i, lib_track in enumerate(album.tracks):
-                        if lib_track.path == old_path:
-                            lib_track.filename = track.filename
-                            lib_track.path = track.path
-                            break
+        update_library_paths(self.library, saved_tracks)
+        for track in saved_tracks:
+            if not track.has_error:
+                self.edit_session.commit(track.base)
+        self.save_library_snapshot()
+        if not interactive:
+            return
 
         # Save selection before refresh
         selected_tracks = self.file_browser.get_selected_tracks()
@@ -615,97 +1072,11 @@ class MainWindow(QMainWindow):
     # --- DATA MODELING ---
     def scan_library(self, root_path):
         """Scans the given root path and builds a library of Artist, Album, and Track objects."""
-        library = {}
-        warnings = []
-        excluded_folders = self.settings_manager.get("general", {}).get("excluded_folders", [])
-        
-        for artist_name in os.listdir(root_path):
-            artist_path = os.path.join(root_path, artist_name)
-            if not os.path.isdir(artist_path) or artist_name in excluded_folders:
-                continue
-            
-            artist_obj = Artist(name=artist_name, path=artist_path)
-            for item_name in os.listdir(artist_path):
-                item_path = os.path.join(artist_path, item_name)
-                if os.path.isfile(item_path):
-                    warnings.append(f"File in artist folder: {item_path}")
-                    continue
-                
-                album_obj = Album(name=item_name, path=item_path)
-                supported_formats = self.settings_manager.get("general", {}).get("supported_audio_formats", [])
-                for filename in os.listdir(item_path):
-                    file_path = os.path.join(item_path, filename)
-                    if os.path.isdir(file_path):
-                        warnings.append(f"Folder in album folder: {file_path}")
-                        continue
-                    
-                    # Check if the file extension is in the supported formats list
-                    file_extension = os.path.splitext(filename)[1].lower()
-                    if file_extension not in supported_formats:
-                        warnings.append(f"Unsupported audio format: {file_path}")
-                        continue
-                    
-                    original_tags = self.read_metadata(file_path)
-
-                    # Normalize apostrophes in the loaded metadata
-                    if 'title' in original_tags:
-                        original_tags['title'] = normalize_apostrophes(original_tags['title'])
-                    if 'artist' in original_tags:
-                        original_tags['artist'] = normalize_apostrophes(original_tags['artist'])
-
-                    # Check for read-only files and add warning
-                    if not os.access(file_path, os.W_OK):
-                        warnings.append(f"Read-only file: {file_path}")
-
-                    # The folder structure is the source of truth for artist/album
-                    folder_artist = artist_name
-                    folder_album = album_obj.name
-                    
-                    # The raw title is from the original file tags
-                    raw_title = original_tags.get('title', '')
-                    
-                    # Clean the title using folder-derived artist/album for accuracy
-                    clean_title, suffixes = extract_suffixes(raw_title, folder_artist, self.settings_manager)
-
-                    # Create the track object. 'tags' MUST be the original file tags.
-                    track_obj = Track(path=file_path, filename=filename, tags=original_tags, suffixes=suffixes, clean_title=clean_title)
-                    
-                    # --- LOGIC TO PROPOSE CHANGES ---
-                    # Always propose artist to be the folder artist
-                    track_obj.proposed_tags['artist'] = folder_artist
-
-                    # Propose album change if it differs from the original file tag
-                    if original_tags.get('album') != folder_album:
-                        track_obj.proposed_tags['album'] = folder_album
-
-                    # Propose title change if cleaning it resulted in a difference
-                    reconstructed_title = f"{clean_title}{''.join(suffixes)}"
-                    normalized_reconstructed = re.sub(r'[\s\[\]\(\)]', '', reconstructed_title).lower()
-                    normalized_raw = re.sub(r'[\s\[\]\(\)]', '', raw_title).lower()
-                    if normalized_reconstructed != normalized_raw:
-                        track_obj.proposed_tags['title'] = clean_title
-                    
-                    album_obj.tracks.append(track_obj)
-                
-                if album_obj.tracks: artist_obj.albums.append(album_obj)
-            
-            if artist_obj.albums: library[artist_name] = artist_obj
-        return library, warnings
+        return scan_library(root_path, self.settings_manager, errors=self.warnings, tag_cache=self.tag_cache)
 
     def read_metadata(self, file_path):
         """Reads metadata from a single audio file using mutagen."""
-        try:
-            audio = mutagen.File(file_path, easy=True)
-            if audio is None: return {}
-            
-            tags = {}
-            for key, value in audio.items():
-                tags[key] = value[0] if value else ''
-            return tags
-        except Exception as e:
-            error_message = f"Error reading metadata for {file_path}: {e}"
-            self.warnings.append(error_message) # Add to warnings list
-            return {}
+        return read_metadata(file_path, self.warnings)
 
     def _get_tracks_for_tool_operation(self):
         """Returns the list of tracks to operate on for a tool.
@@ -734,6 +1105,23 @@ class MainWindow(QMainWindow):
         else:
             super().keyPressEvent(event)
 
+    def closeEvent(self, event):
+        """Stops a running scan, save, snapshot check, folder refresh and the folder watches before the window closes."""
+        self.cancel_scan()
+        self.cancel_folder_check()
+        self.cancel_library_refresh()
+        # The files saved so far are applied to the library and its snapshot, without dialogs
+        self.cancel_save(interactive=False)
+        if self.tool_thread:
+            # A batch tool cannot be interrupted, its result is dropped
+            thread = self.tool_thread
+            self.tool_worker = None
+            self.tool_thread = None
+            thread.quit()
+            thread.wait()
+        self.library_watcher.clear()
+        super().closeEvent(event)
+
     def toggle_side_panels(self):
         """Toggles the visibility of the side panels."""
         if self.side_panels_visible:
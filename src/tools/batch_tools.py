@@ -0,0 +1,105 @@
+from typing import NamedTuple, Optional, List, Dict
+from tools.name_to_tags import name_to_title
+from tools.camel_case import camel_case
+from tools.find_replace import find_replace_in_title
+from tools.filename_generators import generate_filename_from_tags
+from tools.special_cleaner import get_cleaning_rules
+
+# Batches of at least this many tracks are run on a background thread by the UI
+BACKGROUND_BATCH_SIZE = 2000
+
+
+class TrackChange(NamedTuple):
+    """
+    The changes a title tool made to one track. Fields left unchanged by the tool are None.
+    `title` is the proposed title tag.
+    """
+    title: Optional[str]
+    clean_title: Optional[str]
+    suffixes: Optional[List[str]]
+    proposed_filename: Optional[str]
+
+
+class TrackState:
+    """
+    A detached copy of the fields of a track the title tools read and write, so a batch can
+    run on a worker thread while the tracks themselves are only changed on the UI thread.
+    """
+    __slots__ = ('path', 'filename', 'tags', 'proposed_tags', 'clean_title', 'suffixes',
+                 'proposed_filename', 'is_manual_rename')
+
+    def __init__(self, track):
+        self.path = track.path
+        self.filename = track.filename
+        self.tags = dict(track.tags)
+        self.proposed_tags = dict(track.proposed_tags) if track.has_proposed_tags else {}
+        self.clean_title = track.clean_title
+        self.suffixes = list(track.suffixes)
+        self.proposed_filename = track.proposed_filename
+        self.is_manual_rename = track.is_manual_rename
+
+    @property
+    def has_proposed_tags(self):
+        return bool(self.proposed_tags)
+
+
+def capture_tracks(tracks):
+    """Returns the TrackState of each track, in order. Call it on the thread that owns the tracks."""
+    return [TrackState(track) for track in tracks]
+
+
+def _changes(states, run):
+    """
+    Runs a tool over copies of the states and returns the change set: a dict mapping the
+    position of each changed track in the batch to its TrackChange.
+    """
+    changes = {}
+    for index, state in enumerate(states):
+        before = (state.proposed_tags.get('title'), state.clean_title, state.suffixes, state.proposed_filename)
+        run(state)
+        after = (state.proposed_tags.get('title'), state.clean_title, state.suffixes, state.proposed_filename)
+        if after != before:
+            changes[index] = TrackChange(*(new if new != old else None for old, new in zip(before, after)))
+    return changes
+
+
+def batch_name_to_title(states, settings_manager) -> Dict[int, TrackChange]:
+    """name_to_title over a batch of TrackStates, returning the change set."""
+    rules = get_cleaning_rules(settings_manager)
+    return _changes(states, lambda state: name_to_title(state, settings_manager, rules))
+
+
+def batch_camel_case(states, settings_manager) -> Dict[int, TrackChange]:
+    """camel_case over a batch of TrackStates, returning the change set."""
+    rules = get_cleaning_rules(settings_manager)
+    return _changes(states, lambda state: camel_case([state], settings_manager, rules))
+
+
+def batch_find_replace(states, find_text, replace_text, settings_manager) -> Dict[int, TrackChange]:
+    """find_replace_in_title over a batch of TrackStates, returning the change set."""
+    rules = get_cleaning_rules(settings_manager)
+    return _changes(states, lambda state: find_replace_in_title([state], find_text, replace_text, settings_manager, rules))
+
+
+def batch_generate_filenames(states, settings_manager) -> Dict[int, TrackChange]:
+    """generate_filename_from_tags over a batch of TrackStates, skipping manual renames, returning the change set."""
+    rules = get_cleaning_rules(settings_manager)
+
+    def run(state):
+        if not state.is_manual_rename:
+            generate_filename_from_tags(state, settings_manager, rules)
+    return _changes(states, run)
+
+
+def apply_changes(tracks, changes):
+    """Applies a change set to the tracks it was computed for, in the same order."""
+    for index, change in changes.items():
+        track = tracks[index]
+        if change.title is not None:
+            track.proposed_tags['title'] = change.title
+        if change.clean_title is not None:
+            track.clean_title = change.clean_title
+        if change.suffixes is not None:
+            track.suffixes = change.suffixes
+        if change.proposed_filename is not None:
+            track.proposed_filename = change.proposed_filename
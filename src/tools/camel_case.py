@@ -1,14 +1,19 @@
 import re
 from tools.filename_generators import generate_filename_from_tags
-from .special_cleaner import normalize_apostrophes
+from .special_cleaner import normalize_apostrophes, get_cleaning_rules
 
-def camel_case(tracks, settings_manager):
+ROMAN_NUMERAL_REGEX = re.compile(r'\b(II|III|IV|VII|VIII|IX|XI|XII|XIII|XIV|XVI|XVII|XVIII)\b', re.I)
+WORD_REGEX = re.compile(r"\b[\w''\u2019]+")
+
+def camel_case(tracks, settings_manager, rules=None):
     """
     Applies camel case formatting to the 'Title' tag of the given tracks
     and regenerates the proposed filename.
     Spaces are preserved.
+    The cleaning rules (CleaningRules) are those of the settings if `rules` is None.
     """
-    roman_pattern = re.compile(r'\b(II|III|IV|VII|VIII|IX|XI|XII|XIII|XIV|XVI|XVII|XVIII)\b', re.I)
+    if rules is None:
+        rules = get_cleaning_rules(settings_manager)
 
     def roman_replacer(m):
         roman_matches.append(m.group(0))
@@ -24,11 +29,11 @@ def camel_case(tracks, settings_manager):
         title = normalize_apostrophes(title)
         if title:
             # Preserve Roman numerals by replacing with lowercase placeholders
-            title_with_placeholders = roman_pattern.sub(roman_replacer, title)
+            title_with_placeholders = ROMAN_NUMERAL_REGEX.sub(roman_replacer, title)
 
             # Capitalize the first letter of each word, including inside parentheses
             # Include both straight and smart quotes in the regex to handle Unicode apostrophes
-            camel_cased_title = re.sub(r"\b[\w''\u2019]+", lambda m: m.group(0) if m.group(0).startswith("roman") else m.group(0).capitalize(), title_with_placeholders.lower())
+            camel_cased_title = WORD_REGEX.sub(lambda m: m.group(0) if m.group(0).startswith("roman") else m.group(0).capitalize(), title_with_placeholders.lower())
 
             # Restore Roman numerals in uppercase
             for i, roman in enumerate(roman_matches):
@@ -40,4 +45,4 @@ def camel_case(tracks, settings_manager):
 
             # Regenerate the proposed filename to reflect the title change
             if not track.is_manual_rename:
-                generate_filename_from_tags(track, settings_manager)
\ No newline at end of file
+                generate_filename_from_tags(track, settings_manager, rules)
\ No newline at end of file
@@ -0,0 +1,149 @@
+import re
+import string
+from utils.user_defaults import DEFAULT_FILENAME_TEMPLATE
+from .special_cleaner import normalize_apostrophes
+
+# Characters kept in the artist, title and tag values of a filename, besides letters and digits
+SAFE_PUNCTUATION = " _-()!'&.+@#$%^=;"
+# Characters no filename may contain
+ILLEGAL_FILENAME_CHARS = '\\/:*?"<>|'
+
+# Any character but those, for the names kept in filenames. \w is str.isalnum() plus '_', so
+# the whole class is handled by the regex engine in one pass
+UNSAFE_CHARS_REGEX = re.compile('[^\\w' + re.escape(SAFE_PUNCTUATION) + ']')
+# Path separators in suffixes become hyphens, the other illegal characters are deleted
+SUFFIX_CHARS = str.maketrans({'/': '-', '\\': '-', **{c: None for c in ILLEGAL_FILENAME_CHARS if c not in '/\\'}})
+ILLEGAL_CHARS = str.maketrans({c: None for c in ILLEGAL_FILENAME_CHARS})
+_NO_TAGS = {}
+
+
+def _format_value(value, spec):
+    """
+    Applies a format spec to a field value. Numeric tags such as tracknumber ('3/12') are
+    formatted as their number, so {tracknumber:02} gives '03'. Values the spec does not
+    apply to are left as they are.
+    """
+    number = value.split('/', 1)[0].strip()
+    try:
+        if number.isdigit():
+            return format(int(number), spec)
+        return format(value, spec)
+    except ValueError:
+        return value
+
+
+class FilenameTemplate:
+    """
+    A filename template such as '{artist} - {title}{suffixes}' or '{tracknumber:02} {title}',
+    compiled once. The extension of the file is always kept.
+
+    {artist} and {title} are the proposed or current artist and clean title, without the words to
+    remove; {suffixes} are the track's suffixes; any other field is the tag of that name.
+    Field values keep only letters, digits and SAFE_PUNCTUATION. Use get_filename_template to
+    get the template of the current settings.
+    """
+    __slots__ = ('template', '_parts', '_fields', '_format')
+
+    def __init__(self, template=DEFAULT_FILENAME_TEMPLATE):
+        """Raises ValueError if the template is malformed, e.g. has an unclosed '{'."""
+        self.template = template
+        self._parts = []
+        for literal, field, spec, _ in string.Formatter().parse(template):
+            if field is not None and not field.strip():
+                raise ValueError(f"Empty field in filename template: {template!r}")
+            self._parts.append((literal.translate(ILLEGAL_CHARS), field.strip().lower() if field else None, spec or ''))
+        self._fields = {field for _, field, _ in self._parts if field}
+        # The literal parts with a '{}' for each field, to build a name in one str.format call
+        self._format = ''.join(
+            literal.replace('{', '{{').replace('}', '}}') + ('{}' if field else '')
+            for literal, field, _ in self._parts
+        )
+
+    @classmethod
+    def from_settings(cls, settings_manager):
+        """The template of the settings, or the default one if it is missing or malformed."""
+        template = settings_manager.get('general', {}).get('filename_template') or DEFAULT_FILENAME_TEMPLATE
+        try:
+            return cls(template)
+        except ValueError:
+            return cls(DEFAULT_FILENAME_TEMPLATE)
+
+    def format(self, track, rules):
+        """Returns the filename of a track. `rules` (CleaningRules) gives the words to remove."""
+        return self.format_tracks((track,), rules)[0]
+
+    def format_tracks(self, tracks, rules):
+        """
+        Returns the filenames of a batch of tracks, such as a whole album, in order, built in a
+        single pass over the batch. What the tracks share is worked out once per batch: the
+        fields of the template, the cleaned artist names (most tracks of an album have the same
+        one) and the cleaned extensions; the words to remove are removed from all the titles
+        in one call.
+        """
+        fields = self._fields
+        parts = self._parts
+        has_artist = 'artist' in fields
+        has_title = 'title' in fields
+        has_suffixes = 'suffixes' in fields
+        remove_banned_words = rules.remove_banned_words
+        unsafe_sub = UNSAFE_CHARS_REGEX.sub
+        name_format = self._format.format
+        artists = {} # Artist -> cleaned artist
+        extensions = {} # Extension -> extension without illegal characters
+        if has_title:
+            titles = []
+            for track in tracks:
+                title = normalize_apostrophes(track.proposed_tags['title'] if track.has_proposed_tags and 'title' in track.proposed_tags else track.clean_title)
+                # Replace certain separators with hyphens for better filename compatibility
+                if '/' in title or '\\' in title:
+                    title = title.replace(' / ', '-').replace(' \\ ', '-').replace('/', '-').replace('\\', '-')
+                titles.append(title)
+            titles = iter(rules.remove_banned_words_all(titles))
+        names = []
+        for track in tracks:
+            # Tracks without proposed tags are read without creating their proposed tags dict
+            proposed = track.proposed_tags if track.has_proposed_tags else _NO_TAGS
+            tags = track.tags
+            values = {}
+            if has_artist:
+                artist = proposed['artist'] if 'artist' in proposed else tags.get('artist', 'Unknown Artist')
+                cleaned = artists.get(artist)
+                if cleaned is None:
+                    cleaned = artists[artist] = unsafe_sub('', remove_banned_words(normalize_apostrophes(artist)).strip()).rstrip()
+                values['artist'] = cleaned
+            if has_title:
+                values['title'] = unsafe_sub('', next(titles).strip()).rstrip()
+            if has_suffixes:
+                values['suffixes'] = ''.join(track.suffixes).translate(SUFFIX_CHARS) if track.suffixes else ''
+
+            name = []
+            for _, field, spec in parts:
+                if field is None:
+                    continue
+                value = values.get(field)
+                if value is None:
+                    # Tags are formatted before they are sanitized, so '3/12' is still track 3
+                    value = proposed[field] if field in proposed else tags.get(field, '')
+                    value = normalize_apostrophes(str(value)).strip()
+                    value = unsafe_sub('', _format_value(value, spec) if spec else value)
+                elif spec:
+                    value = _format_value(value, spec)
+                name.append(value)
+            name = name_format(*name)
+
+            # The extension is kept, as os.path.splitext gives it, without illegal characters
+            filename = track.filename
+            dot = filename.rfind('.')
+            if dot > 0 and (filename[0] != '.' or filename[:dot].strip('.')):
+                extension = filename[dot:]
+                cleaned = extensions.get(extension)
+                if cleaned is None:
+                    cleaned = extensions[extension] = extension.translate(ILLEGAL_CHARS)
+                name += cleaned
+            names.append(name)
+        return names
+
+
+def get_filename_template(settings_manager) -> FilenameTemplate:
+    """Returns the compiled filename template of the settings, rebuilt only after they are saved."""
+    return settings_manager.get_compiled('filename_template', FilenameTemplate.from_settings)
@@ -1,13 +1,16 @@
 from tools.filename_generators import generate_filename_from_tags
-from tools.special_cleaner import extract_suffixes, normalize_apostrophes
+from tools.special_cleaner import extract_suffixes, normalize_apostrophes, get_cleaning_rules
 
-def find_replace_in_title(tracks, find_text, replace_text, settings_manager):
+def find_replace_in_title(tracks, find_text, replace_text, settings_manager, rules=None):
     """
     Performs a find and replace operation on the displayed title (title + suffixes)
     of the given tracks and regenerates the proposed filename.
+    The cleaning rules (CleaningRules) are those of the settings if `rules` is None.
     """
     if not tracks or not find_text:
         return
+    if rules is None:
+        rules = get_cleaning_rules(settings_manager)
 
     for track in tracks:
         # 1. Get the full displayed title
@@ -24,7 +27,7 @@ def find_replace_in_title(tracks, find_text, replace_text, settings_manager):
             # 3. Re-extract suffixes from the modified string
             artist = track.proposed_tags.get('artist', track.tags.get('artist', ''))
             album = track.proposed_tags.get('album', track.tags.get('album', ''))
-            new_clean_title, new_suffixes = extract_suffixes(new_displayed_title, artist, settings_manager)
+            new_clean_title, new_suffixes = extract_suffixes(new_displayed_title, artist, settings_manager, rules)
 
             # 4. Update the track object
             track.proposed_tags['title'] = new_clean_title
@@ -32,4 +35,4 @@ def find_replace_in_title(tracks, find_text, replace_text, settings_manager):
             
             # Regenerate the proposed filename to reflect the changes
             if not track.is_manual_rename:
-                generate_filename_from_tags(track, settings_manager)
\ No newline at end of file
+                generate_filename_from_tags(track, settings_manager, rules)
\ No newline at end of file
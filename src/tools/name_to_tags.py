@@ -1,14 +1,22 @@
 import re
 from utils.data_models import Track
-from .special_cleaner import extract_suffixes, normalize_apostrophes
+from .special_cleaner import extract_suffixes, normalize_apostrophes, get_cleaning_rules
 from utils.settings_manager import SettingsManager
 
-def name_to_title(track: Track, settings_manager):
+LEADING_NON_LETTERS_REGEX = re.compile(r'^[^a-zA-Z]+')
+QUOTE_WRAPPED_REGEX = re.compile(r"^\s*'([^']+)'\s*$")
+ACRONYM_REGEX = re.compile(r'\b(?:[A-Za-z]\.){2,}(?:[A-Za-z]\.?)?\b')
+WORD_START_REGEX = re.compile(r'(^|[\s\-\(\[\{])([a-z])')
+
+def name_to_title(track: Track, settings_manager, rules=None):
     """
     Converts the original filename to a title, extracting suffixes.
     Ignores non-letter characters at the start (numbers, periods, etc.).
     Ignores file extension.
+    The cleaning rules (CleaningRules) are those of the settings if `rules` is None.
     """
+    if rules is None:
+        rules = get_cleaning_rules(settings_manager)
     # Remove file extension
     import os
     original_name = os.path.splitext(track.filename)[0]
@@ -17,7 +25,7 @@ def name_to_title(track: Track, settings_manager):
     original_name = normalize_apostrophes(original_name)
 
     # Step 1: Ignore leading non-letter characters
-    cleaned_name = re.sub(r'^[^a-zA-Z]+', '', original_name)
+    cleaned_name = LEADING_NON_LETTERS_REGEX.sub('', original_name)
 
     # Step 2: Extract suffixes and get clean title
     artist = track.tags.get('artist', track.proposed_tags.get('artist', ''))
@@ -28,18 +36,16 @@ def name_to_title(track: Track, settings_manager):
     existing_title = track.tags.get('title', track.proposed_tags.get('title', ''))
     if existing_title:
         normalized_title = normalize_apostrophes(existing_title)
-        track.tags['title'] = normalized_title
         track.proposed_tags['title'] = normalized_title
 
-    clean_title, extracted_suffixes = extract_suffixes(cleaned_name, artist, settings_manager)
+    clean_title, extracted_suffixes = extract_suffixes(cleaned_name, artist, settings_manager, rules)
 
     # Remove wrapping single quotes when the full title is enclosed (e.g. 'LEGEND' -> LEGEND)
-    quote_wrapped_match = re.match(r"^\s*'([^']+)'\s*$", clean_title)
+    quote_wrapped_match = QUOTE_WRAPPED_REGEX.match(clean_title)
     if quote_wrapped_match:
         clean_title = quote_wrapped_match.group(1).strip()
 
     # Preserve dotted acronyms/initialisms (e.g. I.F.O.Y.G.) through casing.
-    acronym_pattern = re.compile(r'\b(?:[A-Za-z]\.){2,}(?:[A-Za-z]\.?)?\b')
     acronym_map = {}
 
     def _acronym_replacer(match):
@@ -47,11 +53,10 @@ def name_to_title(track: Track, settings_manager):
         acronym_map[key] = match.group(0)
         return key
 
-    title_for_case = acronym_pattern.sub(_acronym_replacer, clean_title)
+    title_for_case = ACRONYM_REGEX.sub(_acronym_replacer, clean_title)
 
     # Step 3: Apply title case formatting without capitalizing after apostrophes (can't -> Can't)
-    title_cased = re.sub(
-        r'(^|[\s\-\(\[\{])([a-z])',
+    title_cased = WORD_START_REGEX.sub(
         lambda m: f"{m.group(1)}{m.group(2).upper()}",
         title_for_case.lower()
     )
@@ -68,4 +73,4 @@ def name_to_title(track: Track, settings_manager):
     # Step 5: Regenerate the proposed filename to reflect the title change
     from .filename_generators import generate_filename_from_tags
     if not track.is_manual_rename:
-        generate_filename_from_tags(track, settings_manager)
+        generate_filename_from_tags(track, settings_manager, rules)
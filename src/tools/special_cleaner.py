@@ -1,5 +1,11 @@
 import re
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from itertools import islice
 from typing import List, Tuple
+from utils.keyword_matcher import KeywordMatcher
 
 # This list contains words that should be removed from any captured suffix.
 # The matching is case-insensitive and looks for whole words.
@@ -15,6 +21,11 @@ FT_REGEX = re.compile(r'(feat|ft|featuring)\.?(.*)', re.I)
 INLINE_FT_REGEX = re.compile(r'^(?P<title>.*?)(?:\s+[-,]?\s*)(?:feat|ft|featuring)\.?\s+(?P<artists>.+)$', re.I)
 REMIX_REGEX = re.compile(r'(.*)(remix|r3m1x|rmx)', re.I)
 
+WORD_START_REGEX = re.compile(r'\b\w')
+ARTIST_SEPARATOR_REGEX = re.compile(r'\s*&\s*|\s+and\s+', re.I)
+EMPTY_BRACKETS_REGEX = re.compile(r'\(\s*\)|\[\s*\]')
+WHITESPACE_REGEX = re.compile(r'\s+')
+
 # Normalize apostrophes to standard format
 def normalize_apostrophes(text: str) -> str:
     """
@@ -23,49 +34,184 @@ def normalize_apostrophes(text: str) -> str:
     """
     return text.replace('\u00B4', "'")
 
-def _clean_suffix_content(content: str, settings_manager=None) -> str:
+class CleaningRules:
+    """
+    The cleaning settings, compiled once: the words to remove as a single KeywordMatcher,
+    and the tag mapping patterns. Use get_cleaning_rules to get those of the current settings.
+    """
+    __slots__ = ('banned_words', 'tag_mappings', 'fingerprint')
+
+    def __init__(self, words_to_remove=(), tag_mappings=None):
+        # Of the words found at the same place, the first in the settings is removed, as when
+        # they used to be removed one by one
+        words = [word for word in dict.fromkeys(words_to_remove) if word]
+        tag_mappings = tag_mappings or {}
+        # Identifies the rules, the same in every process, to key memoized results
+        self.fingerprint = hashlib.sha1(json.dumps([words, list(tag_mappings.items())]).encode('utf-8')).hexdigest()
+        self.banned_words = KeywordMatcher(words, whole_words=True)
+
+        # (compiled pattern, tag) for each tag mapping. Patterns are matched case-insensitively.
+        self.tag_mappings = []
+        for pattern_str, result_tag in tag_mappings.items():
+            try:
+                self.tag_mappings.append((re.compile(pattern_str, re.IGNORECASE), result_tag))
+            except re.error:
+                # Should log this or handle it, for now just skip invalid regexes
+                pass
+
+    @classmethod
+    def from_settings(cls, settings_manager):
+        general = settings_manager.get('general', {})
+        return cls(general.get('words_to_remove', []), general.get('tag_mappings', {}))
+
+    def remove_banned_words(self, text: str) -> str:
+        """Removes the words to remove from a text, leaving the surrounding spaces."""
+        if not self.banned_words:
+            return text
+        return self.banned_words.sub('', text)
+
+    def remove_banned_words_all(self, texts):
+        """remove_banned_words for a batch of texts, such as the titles of an album, in one call."""
+        if not self.banned_words:
+            return list(texts)
+        return self.banned_words.sub_all('', texts)
+
+
+NO_CLEANING_RULES = CleaningRules()
+
+# Number of titles whose cleaning results are kept by SUFFIX_MEMO
+SUFFIX_MEMO_SIZE = 50000
+
+
+def get_cleaning_rules(settings_manager=None) -> CleaningRules:
+    """Returns the compiled cleaning rules of the settings, rebuilt only after they are saved."""
+    if settings_manager is None:
+        return NO_CLEANING_RULES
+    return settings_manager.get_compiled('cleaning_rules', CleaningRules.from_settings)
+
+def _clean_suffix_content(content: str, rules: CleaningRules) -> str:
     """Removes banned words from suffix content."""
-    content = content.strip()
-    
-    words_to_remove = []
-    if settings_manager:
-        words_to_remove = settings_manager.get('general', {}).get('words_to_remove', [])
-    
-    # Fallback/Safety if settings failing or empty, though ideally shouldn't happen if initialized correctly
-    if not words_to_remove:
-        # Minimal fallback could go here, or just do nothing
-        pass
-
-    for banned_word in words_to_remove:
-        pattern = re.compile(r'\b' + re.escape(banned_word) + r'\b', re.IGNORECASE)
-        content = pattern.sub('', content)
-    return re.sub(r'\s+', ' ', content).strip()
+    content = rules.remove_banned_words(content.strip())
+    return WHITESPACE_REGEX.sub(' ', content).strip()
 
 def _format_artist_names(artists_str: str) -> str:
     """Formats a string of artist names, handling multiple separators."""
-    artists_str = re.sub(r'\s*&\s*|\s+and\s+', ', ', artists_str, flags=re.I)
+    artists_str = ARTIST_SEPARATOR_REGEX.sub(', ', artists_str)
     artists = [' '.join(word.title() for word in artist.strip().split())
                for artist in artists_str.split(',') if artist.strip()]
     return ', '.join(artists)
 
-def extract_suffixes(title: str, artist: str = "", settings_manager=None) -> Tuple[str, List[str]]:
+class SuffixMemo:
+    """
+    A bounded LRU memo of extract_suffixes results, keyed on (title, artist, rules fingerprint).
+    The same titles come back on every rescan and in compilations, so most are cleaned once.
+    When the rules change, the results of the previous rules are dropped.
+
+    Scan worker processes get a copy of the most recently used entries (`entries`) and send
+    back the ones they added (`take_added`, once `record_added` is set), which are merged with `update`.
+    """
+    def __init__(self, maxsize=SUFFIX_MEMO_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.fingerprint = None
+        self.record_added = False
+        self._entries = OrderedDict()
+        self._added = []
+        # Scan threads clean titles concurrently
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _use_rules(self, fingerprint):
+        if fingerprint != self.fingerprint:
+            self._entries.clear()
+            self._added = []
+            self.fingerprint = fingerprint
+
+    def get(self, title, artist, rules):
+        """Returns (clean_title, suffixes) for a title, cleaning it only if it is not memoized."""
+        key = (title, artist, rules.fingerprint)
+        with self._lock:
+            self._use_rules(rules.fingerprint)
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        if result is None:
+            clean_title, suffixes = _extract_suffixes(title, artist, rules)
+            result = (clean_title, tuple(suffixes))
+            with self._lock:
+                self.misses += 1
+                if rules.fingerprint == self.fingerprint:
+                    self._store(key, result)
+                    if self.record_added:
+                        self._added.append((key, result))
+        return result[0], list(result[1])
+
+    def _store(self, key, result):
+        self._entries[key] = result
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def entries(self, limit=None):
+        """
+        Returns the memoized entries, least recently used first. If `limit` is given, only the
+        `limit` most recently used ones are returned.
+        """
+        with self._lock:
+            if limit is None:
+                return list(self._entries.items())
+            return list(islice(reversed(self._entries.items()), limit))[::-1]
+
+    def update(self, entries):
+        """Adds entries returned by `entries` or `take_added`. Those of other rules are ignored."""
+        with self._lock:
+            for key, result in entries:
+                if self.fingerprint is None:
+                    self.fingerprint = key[2]
+                if key[2] == self.fingerprint:
+                    self._store(key, result)
+
+    def take_added(self):
+        """Returns the entries added since the last call, if `record_added` is set."""
+        with self._lock:
+            added, self._added = self._added, []
+        return added
+
+    def stats(self):
+        return {'size': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._added = []
+            self.hits = self.misses = 0
+
+
+def extract_suffixes(title: str, artist: str = "", settings_manager=None, rules: CleaningRules = None) -> Tuple[str, List[str]]:
     """
     Extracts special suffixes from a title string by first finding any text in brackets
     or parentheses, cleaning it of banned words, and then checking for keywords.
+    The words to remove and tag mappings come from `rules`, or from the settings if it is None.
+    Results are memoized in SUFFIX_MEMO.
     """
+    if rules is None:
+        rules = get_cleaning_rules(settings_manager)
+    return SUFFIX_MEMO.get(title, artist, rules)
+
+
+def _extract_suffixes(title: str, artist: str, rules: CleaningRules) -> Tuple[str, List[str]]:
     suffixes = []
     parts_to_remove = []
-    
-    tag_mappings = {}
-    if settings_manager:
-        tag_mappings = settings_manager.get('general', {}).get('tag_mappings', {})
 
     for match in SUFFIX_CONTENT_REGEX.finditer(title):
         original_match_text = match.group(0)
         content = match.group('content')
 
         # First, clean the content of any banned words.
-        cleaned_content = _clean_suffix_content(content, settings_manager)
+        cleaned_content = _clean_suffix_content(content, rules)
 
         # Store found tags to avoid creating a generic one if a specific one is found.
         found_tags = []
@@ -79,24 +225,16 @@ def extract_suffixes(title: str, artist: str = "", settings_manager=None) -> Tup
 
         remix_match = REMIX_REGEX.search(cleaned_content)
         if remix_match:
-            remixer = re.sub(r'\b\w', lambda m: m.group(0).upper(), remix_match.group(1).strip())
+            remixer = WORD_START_REGEX.sub(lambda m: m.group(0).upper(), remix_match.group(1).strip())
             if remixer:
                 found_tags.append(f"[{remixer} Remix]")
             else:
                 found_tags.append("[Remix]")
 
         # Dynamic Tag Mappings using Settings
-        for pattern_str, result_tag in tag_mappings.items():
-            # Create regex from the pattern string user provided
-            # We assume user provides regex-ready string but we should probably compile gracefully
-            try:
-                # Assuming case-insensitive matching for user convenience
-                custom_regex = re.compile(pattern_str, re.IGNORECASE)
-                if custom_regex.search(cleaned_content):
-                    found_tags.append(result_tag)
-            except re.error:
-                # Should log this or handle it, for now just skip invalid regexes
-                pass
+        for custom_regex, result_tag in rules.tag_mappings:
+            if custom_regex.search(cleaned_content):
+                found_tags.append(result_tag)
 
         # If specific tags were found, add them and mark the part for full removal.
         if found_tags:
@@ -132,11 +270,15 @@ def extract_suffixes(title: str, artist: str = "", settings_manager=None) -> Tup
             clean_title = inline_ft_match.group('title').strip()
 
     # Clean up empty brackets/parentheses that might remain
-    clean_title = re.sub(r'\(\s*\)|\[\s*\]', '', clean_title)
+    clean_title = EMPTY_BRACKETS_REGEX.sub('', clean_title)
 
     # Final cleanup of extra whitespace and remove duplicate suffixes.
-    clean_title = re.sub(r'\s+', ' ', clean_title).strip()
+    clean_title = WHITESPACE_REGEX.sub(' ', clean_title).strip()
     clean_title = clean_title.strip(' -')
     unique_suffixes = sorted(list(dict.fromkeys(suffixes)), key=str.lower)
 
     return clean_title, unique_suffixes
+
+
+# The memo of this process, shared by the GUI, the scan threads and the CLI
+SUFFIX_MEMO = SuffixMemo()
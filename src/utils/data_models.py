@@ -1,30 +1,145 @@
 from dataclasses import dataclass, field
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
-@dataclass
+@dataclass(slots=True, init=False)
 class Track:
-    """Data class representing a single audio track."""
+    """
+    Data class representing a single audio track.
+    Slotted, as a library can hold hundreds of thousands of tracks. The proposed tag changes are
+    a sparse overlay over `tags`: the dict is only created once a change is proposed, and
+    `has_proposed_tags` tells whether there are any without creating it.
+    """
     path: str
     filename: str
     clean_title: str
-    tags: Dict[str, Any] = field(default_factory=dict)
-    proposed_tags: Dict[str, Any] = field(default_factory=dict)
-    proposed_filename: str = ""
-    is_manual_rename: bool = False
-    suffixes: List[str] = field(default_factory=list)
-    has_error: bool = False
-    has_duplicate: bool = False
-
-@dataclass
+    tags: Dict[str, Any]
+    _proposed_tags: Optional[Dict[str, Any]]
+    proposed_filename: str
+    is_manual_rename: bool
+    suffixes: List[str]
+    has_error: bool
+    has_duplicate: bool
+    size: int # File size and mtime when the tags were read
+    mtime_ns: int
+    old_path: Optional[str] # Path before the last save
+
+    def __init__(self, path, filename, clean_title, tags=None, proposed_tags=None, proposed_filename="",
+                 is_manual_rename=False, suffixes=None, has_error=False, has_duplicate=False, size=0, mtime_ns=0,
+                 old_path=None):
+        self.path = path
+        self.filename = filename
+        self.clean_title = clean_title
+        self.tags = {} if tags is None else tags
+        self._proposed_tags = proposed_tags or None
+        self.proposed_filename = proposed_filename
+        self.is_manual_rename = is_manual_rename
+        self.suffixes = [] if suffixes is None else suffixes
+        self.has_error = has_error
+        self.has_duplicate = has_duplicate
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.old_path = old_path
+
+    @property
+    def proposed_tags(self):
+        """The proposed tag changes, created empty on first use."""
+        if self._proposed_tags is None:
+            self._proposed_tags = {}
+        return self._proposed_tags
+
+    @proposed_tags.setter
+    def proposed_tags(self, proposed_tags):
+        self._proposed_tags = proposed_tags or None
+
+    @property
+    def has_proposed_tags(self):
+        return bool(self._proposed_tags)
+
+@dataclass(slots=True)
 class Album:
     """Data class representing an album, containing tracks."""
     name: str
     path: str
     tracks: List[Track] = field(default_factory=list)
+    mtime_ns: int = 0 # Folder mtime when it was last listed
+    warnings: List[str] = field(default_factory=list)
+    is_loaded: bool = True # False until the tracks of a lazily scanned album have been read
 
-@dataclass
+@dataclass(slots=True)
 class Artist:
     """Data class representing an artist, containing albums."""
     name: str
     path: str
     albums: List[Album] = field(default_factory=list)
+    mtime_ns: int = 0 # Folder mtime when it was last listed
+    warnings: List[str] = field(default_factory=list)
+    empty_albums: List[Album] = field(default_factory=list) # Album folders without any tracks
+
+class Library(dict):
+    """
+    The scanned library, mapping artist names to Artist objects.
+    Also remembers the root folder, its mtime and the artist folders without any tracks,
+    so an incremental rescan can tell what changed on disk.
+    Tracks and album folders are indexed by path (`tracks_by_path`, `albums_by_path`); code
+    that adds, removes or renames them keeps the indexes up to date with the index_* methods.
+    """
+    def __init__(self, root_path=None, mtime_ns=0):
+        super().__init__()
+        self.root_path = root_path
+        self.mtime_ns = mtime_ns
+        self.empty_artists = {}
+        self.is_complete = False
+        self.tracks_by_path = {}
+        self.albums_by_path = {}
+
+    def all_artists(self):
+        """Returns every known artist folder, including those without any tracks."""
+        return list(self.values()) + list(self.empty_artists.values())
+
+    def get_warnings(self):
+        """Collects the structural warnings of every artist and album folder."""
+        warnings = []
+        for artist in self.all_artists():
+            warnings.extend(artist.warnings)
+            for album in artist.albums + artist.empty_albums:
+                warnings.extend(album.warnings)
+        return warnings
+
+    def get_track(self, path):
+        """Returns the track at `path`, or None."""
+        return self.tracks_by_path.get(path)
+
+    def get_album(self, path):
+        """Returns the album whose folder is `path` (e.g. the folder of a track), or None."""
+        return self.albums_by_path.get(path)
+
+    def index_album(self, album):
+        """Indexes an album folder and its current tracks."""
+        self.albums_by_path[album.path] = album
+        for track in album.tracks:
+            self.tracks_by_path[track.path] = track
+
+    def unindex_album(self, album):
+        """Removes an album folder and its current tracks from the indexes."""
+        if self.albums_by_path.get(album.path) is album:
+            del self.albums_by_path[album.path]
+        self.unindex_tracks(album.tracks)
+
+    def unindex_tracks(self, tracks):
+        for track in tracks:
+            if self.tracks_by_path.get(track.path) is track:
+                del self.tracks_by_path[track.path]
+
+    def index_artist(self, artist):
+        for album in artist.albums + artist.empty_albums:
+            self.index_album(album)
+
+    def unindex_artist(self, artist):
+        for album in artist.albums + artist.empty_albums:
+            self.unindex_album(album)
+
+    def reindex_track(self, track, old_path):
+        """Moves a track to its new path in the index after it was renamed."""
+        if self.tracks_by_path.get(old_path) is track:
+            del self.tracks_by_path[old_path]
+        self.tracks_by_path[track.path] = track
@@ -0,0 +1,151 @@
+import os
+import unicodedata
+
+
+def normalize_name(name):
+    """
+    The form of a filename two names are compared in: case-folded and in NFC, so 'Café.mp3'
+    typed with a combining accent and 'CAFÉ.mp3' are the same name, as they are on
+    case-insensitive or normalizing filesystems (Windows, macOS).
+    """
+    return unicodedata.normalize('NFC', unicodedata.normalize('NFD', name).casefold())
+
+
+def new_name_key(track):
+    """The (album folder, normalized new name) a track is compared on: two tracks clash if they share it."""
+    return os.path.dirname(track.path), normalize_name(track.proposed_filename or track.filename)
+
+
+class DuplicateNameIndex:
+    """
+    The new names of the tracks in view, grouped by album folder, kept up to date one track at a
+    time: `update` re-files a track whose new name changed and flips the `has_duplicate` flag of
+    the tracks that start or stop clashing, without looking at the other tracks of the view.
+    The number of tracks whose name clashes is counted as names move, so `has_duplicates` is
+    always current.
+    """
+    def __init__(self):
+        self._buckets = {} # (folder, new name) -> {id(track): track}
+        self._keys = {} # id(track) -> (folder, new name)
+        self.duplicate_count = 0
+
+    def __len__(self):
+        return len(self._keys)
+
+    @property
+    def has_duplicates(self):
+        return self.duplicate_count > 0
+
+    def clear(self):
+        self._buckets.clear()
+        self._keys.clear()
+        self.duplicate_count = 0
+
+    def build(self, tracks):
+        """Indexes the tracks of a new view and sets all their `has_duplicate` flags."""
+        self.clear()
+        for track in tracks:
+            key = self._keys[id(track)] = new_name_key(track)
+            self._buckets.setdefault(key, {})[id(track)] = track
+        for bucket in self._buckets.values():
+            is_duplicate = len(bucket) > 1
+            if is_duplicate:
+                self.duplicate_count += len(bucket)
+            for track in bucket.values():
+                track.has_duplicate = is_duplicate
+
+    def update(self, track):
+        """
+        Re-files a track after its new name may have changed, and returns the tracks whose
+        `has_duplicate` flag changed, the track itself included.
+        """
+        key = new_name_key(track)
+        old_key = self._keys.get(id(track))
+        if key == old_key:
+            return []
+        changed = []
+        if old_key is not None:
+            changed.extend(self._remove(track, old_key))
+        self._keys[id(track)] = key
+        bucket = self._buckets.setdefault(key, {})
+        bucket[id(track)] = track
+        if len(bucket) == 2:
+            self.duplicate_count += 2
+        elif len(bucket) > 2:
+            self.duplicate_count += 1
+        # Only a second name in a folder turns the first one into a duplicate too
+        is_duplicate = len(bucket) > 1
+        for other in (bucket.values() if len(bucket) == 2 else (track,)):
+            if other.has_duplicate != is_duplicate:
+                other.has_duplicate = is_duplicate
+                changed.append(other)
+        return changed
+
+    def remove(self, track):
+        """Drops a track from the index, returning the tracks that stopped clashing with it."""
+        old_key = self._keys.pop(id(track), None)
+        if old_key is None:
+            return []
+        return self._remove(track, old_key)
+
+    def _remove(self, track, key):
+        """Takes a track out of its bucket; returns the track left alone in it if it was flagged."""
+        bucket = self._buckets[key]
+        del bucket[id(track)]
+        if not bucket:
+            del self._buckets[key]
+            return []
+        if len(bucket) > 1:
+            self.duplicate_count -= 1
+            return []
+        self.duplicate_count -= 2
+        lone = next(iter(bucket.values()))
+        if not lone.has_duplicate:
+            return []
+        lone.has_duplicate = False
+        return [lone]
+
+
+def find_rename_collisions(tracks):
+    """
+    Checks the renames of a batch of tracks about to be saved against each other and against
+    the files already in their folders, before anything is written. Names are compared
+    normalized (normalize_name). Each folder a track is renamed in is listed once, and its
+    names after the whole batch is saved are indexed, so the check is linear in the number of
+    tracks and files involved.
+    Returns (track, error_message) for every rename that would clash, in the order of the tracks.
+    """
+    renames = [track for track in tracks if track.proposed_filename and track.proposed_filename != track.filename]
+    collisions = []
+    folders = {}
+    for track in renames:
+        folders.setdefault(os.path.dirname(track.path), []).append(track)
+
+    for folder, folder_renames in folders.items():
+        # The files of the folder after the batch: those not renamed keep their names
+        renamed_away = {track.filename for track in folder_renames}
+        occupants = {}
+        try:
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    if entry.name not in renamed_away:
+                        occupants[normalize_name(entry.name)] = entry.name
+        except OSError:
+            pass
+
+        targets = {}
+        for track in folder_renames:
+            new_name = track.proposed_filename
+            if os.sep in new_name or (os.altsep and os.altsep in new_name):
+                collisions.append((track, f"Cannot rename, invalid file name: {new_name!r} for {track.path}"))
+                continue
+            name = normalize_name(new_name)
+            if name in occupants:
+                collisions.append((track, f"Cannot rename, file already exists: {os.path.join(folder, occupants[name])}"))
+            elif name in targets:
+                collisions.append((track, f"Cannot rename {track.path}, {new_name!r} is also the new name of {targets[name].path}"))
+            else:
+                targets[name] = track
+    order = {id(track): index for index, track in enumerate(tracks)}
+    collisions.sort(key=lambda collision: order[id(collision[0])])
+    return collisions
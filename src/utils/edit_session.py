@@ -0,0 +1,190 @@
+from collections.abc import MutableMapping
+
+_EMPTY_TAGS = {}
+
+
+class EditSession:
+    """
+    The pending edits of the library's tracks, shared by every view of them.
+
+    Views (TrackView) read the library's Track objects directly and write their changes to
+    the session, so opening a folder copies nothing, and edits made in one folder are still
+    there when it is opened again. Edits are keyed by the Track object they apply to; after the
+    library is refreshed or rescanned, `rebase` moves them to the new objects of unchanged files.
+    """
+    def __init__(self):
+        self._edits = {} # id(track) -> (track, {field: value})
+
+    def __len__(self):
+        return len(self._edits)
+
+    def views(self, tracks):
+        """Returns a view of each library track, in order."""
+        return [TrackView(track, self) for track in tracks]
+
+    def get_edit(self, track):
+        """Returns the edited fields of a library track, or None if it has no pending edits."""
+        entry = self._edits.get(id(track))
+        return entry[1] if entry is not None else None
+
+    def set_field(self, track, name, value):
+        """Records an edited field of a library track."""
+        entry = self._edits.get(id(track))
+        if entry is None:
+            if name != 'proposed_tags' and getattr(track, name) == value:
+                return # Nothing to record
+            entry = self._edits[id(track)] = (track, {})
+        entry[1][name] = value
+
+    def discard(self, tracks):
+        """Drops the pending edits of the given library tracks."""
+        for track in tracks:
+            self._edits.pop(id(track), None)
+
+    def commit(self, track):
+        """
+        Drops the edits of a library track whose changes were just saved to its file. Its
+        proposed changes are cleared too, as the file now matches them.
+        """
+        self._edits.pop(id(track), None)
+        track.proposed_tags = None
+        track.proposed_filename = ""
+        track.is_manual_rename = False
+
+    def clear(self):
+        self._edits = {}
+
+    def rebase(self, library):
+        """
+        Moves the edits to the library's current track objects after a refresh or rescan.
+        Edits of files that were removed, or changed on disk since they were read, are dropped.
+        """
+        edits = {}
+        for track, fields in self._edits.values():
+            current = library.get_track(track.path)
+            if current is None:
+                continue
+            if current is not track and (current.size, current.mtime_ns) != (track.size, track.mtime_ns):
+                continue
+            edits[id(current)] = (current, fields)
+        self._edits = edits
+
+
+class _ProposedTagsView(MutableMapping):
+    """
+    The proposed tags of a TrackView: reads go to the session's edit, or to the library track
+    while it has none; the first write copies them into the session.
+    """
+    __slots__ = ('view',)
+
+    def __init__(self, view):
+        self.view = view
+
+    def _current(self):
+        fields = self.view.session.get_edit(self.view.base)
+        if fields is not None and 'proposed_tags' in fields:
+            return fields['proposed_tags']
+        base = self.view.base
+        return base.proposed_tags if base.has_proposed_tags else _EMPTY_TAGS
+
+    def _writable(self):
+        fields = self.view.session.get_edit(self.view.base)
+        if fields is None or 'proposed_tags' not in fields:
+            self.view.session.set_field(self.view.base, 'proposed_tags', dict(self._current()))
+            fields = self.view.session.get_edit(self.view.base)
+        return fields['proposed_tags']
+
+    def __getitem__(self, key):
+        return self._current()[key]
+
+    def __setitem__(self, key, value):
+        self._writable()[key] = value
+
+    def __delitem__(self, key):
+        del self._writable()[key]
+
+    def __iter__(self):
+        return iter(list(self._current()))
+
+    def __len__(self):
+        return len(self._current())
+
+    def __contains__(self, key):
+        return key in self._current()
+
+    def get(self, key, default=None):
+        return self._current().get(key, default)
+
+    def copy(self):
+        return dict(self._current())
+
+    def clear(self):
+        if self._current():
+            self._writable().clear()
+
+    def __repr__(self):
+        return repr(self._current())
+
+
+def _passthrough(name):
+    """A TrackView property reading and writing the library track's field."""
+    return property(lambda self: getattr(self.base, name), lambda self, value: setattr(self.base, name, value))
+
+
+def _editable(name):
+    """A TrackView property reading the pending edit of a field, if any, and writing to the session."""
+    def get(self):
+        fields = self.session.get_edit(self.base)
+        if fields is not None and name in fields:
+            return fields[name]
+        return getattr(self.base, name)
+
+    def set(self, value):
+        self.session.set_field(self.base, name, value)
+    return property(get, set)
+
+
+class TrackView:
+    """
+    A library track as shown and edited in the file browser. Has the same fields as Track.
+    The file's path, name and tags are those of the library track: saving a view renames the
+    file and updates the tags in the library. Proposed changes are pending edits in the
+    session. `has_duplicate` and `has_error` describe the current view only.
+    """
+    __slots__ = ('base', 'session', 'has_duplicate', 'has_error', '_proposed_tags_view')
+
+    def __init__(self, base, session):
+        self.base = base
+        self.session = session
+        self.has_duplicate = False
+        self.has_error = base.has_error
+        self._proposed_tags_view = None
+
+    path = _passthrough('path')
+    filename = _passthrough('filename')
+    tags = _passthrough('tags')
+    size = _passthrough('size')
+    mtime_ns = _passthrough('mtime_ns')
+    old_path = _passthrough('old_path')
+
+    proposed_filename = _editable('proposed_filename')
+    is_manual_rename = _editable('is_manual_rename')
+    clean_title = _editable('clean_title')
+    suffixes = _editable('suffixes')
+
+    @property
+    def proposed_tags(self):
+        if self._proposed_tags_view is None:
+            self._proposed_tags_view = _ProposedTagsView(self)
+        return self._proposed_tags_view
+
+    @proposed_tags.setter
+    def proposed_tags(self, proposed_tags):
+        self.session.set_field(self.base, 'proposed_tags', dict(proposed_tags or {}))
+
+    @property
+    def has_proposed_tags(self):
+        return bool(self.proposed_tags)
+
+    def __repr__(self):
+        return f"TrackView({self.path!r})"
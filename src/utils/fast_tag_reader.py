@@ -0,0 +1,286 @@
+import io
+import os
+import struct
+from collections import deque
+
+import mutagen.id3
+from mutagen.easyid3 import EasyID3
+
+# ID3v2 frames that can back an EasyID3 key; everything else (APIC, GEOB, PRIV, USLT, ...) is skipped
+ID3_KEPT_FRAMES = (b'UFID', b'WOAR', b'RVA2')
+ID3_FRAME_HEADER_SIZE = 10
+ID3V1_READ_SIZE = 128 + 5 # What mutagen reads from the end of the file to find an ID3v1 tag
+
+# Vorbis comments holding base64 cover art, which are not read
+VORBIS_SKIPPED_KEYS = {'metadata_block_picture', 'coverart'}
+VORBIS_KEY_PREFIX_SIZE = 64
+
+FLAC_STREAMINFO = 0
+FLAC_VORBIS_COMMENT = 4
+
+
+class UnsupportedFile(Exception):
+    """Raised when a file uses a layout the fast reader leaves to mutagen."""
+
+
+def read_tags(file_path):
+    """
+    Reads the text tags of an MP3, FLAC, Ogg Vorbis or Opus file without parsing the audio
+    stream, embedded pictures or other binary data, and only reading the bytes it needs.
+    Returns the same first-value-per-key dict as `mutagen.File(file_path, easy=True)`, except
+    that Vorbis comments holding cover art are left out, or None if the file should be read
+    with mutagen instead (other formats, unusual layouts, or anything malformed).
+    """
+    try:
+        with open(file_path, 'rb') as f:
+            magic = f.read(4)
+            f.seek(0)
+            if magic[:3] == b'ID3' and file_path.lower().endswith('.mp3'):
+                return _read_id3(f)
+            if magic == b'fLaC':
+                return _read_flac(f)
+            if magic == b'OggS':
+                return _read_ogg(f)
+    except (UnsupportedFile, OSError, ValueError, struct.error, mutagen.MutagenError):
+        pass
+    return None
+
+
+def _read_exact(f, size):
+    data = f.read(size)
+    if len(data) != size:
+        raise UnsupportedFile("Unexpected end of file")
+    return data
+
+
+def _syncsafe(data):
+    value = 0
+    for byte in data:
+        value = (value << 7) | (byte & 0x7F)
+    return value
+
+
+def _to_syncsafe(value):
+    return bytes(((value >> shift) & 0x7F) for shift in (21, 14, 7, 0))
+
+
+# --- ID3v2 ---
+
+def _walk_id3_headers(f, start, size, syncsafe):
+    """
+    Counts the known frames found when walking the frame headers with the given size encoding,
+    mirroring `mutagen.id3._tags.determine_bpi` but only reading the 10-byte headers.
+    Returns (known_frame_count, offset_past_end).
+    """
+    offset = 0
+    count = 0
+    while offset < size - ID3_FRAME_HEADER_SIZE:
+        f.seek(start + offset)
+        header = _read_exact(f, ID3_FRAME_HEADER_SIZE)
+        if header == b'\x00' * ID3_FRAME_HEADER_SIZE:
+            return count, -((size - offset) % ID3_FRAME_HEADER_SIZE)
+        name, frame_size, _ = struct.unpack('>4sLH', header)
+        offset += ID3_FRAME_HEADER_SIZE + (_syncsafe(header[4:8]) if syncsafe else frame_size)
+        try:
+            if name.decode('ascii') in mutagen.id3.Frames:
+                count += 1
+        except UnicodeDecodeError:
+            continue
+    return count, offset - size
+
+
+def _id3_frame_sizes_are_syncsafe(f, start, size):
+    """Tells whether ID3v2.4 frame sizes are syncsafe, as iTunes used to write plain ints."""
+    as_syncsafe, syncsafe_off = _walk_id3_headers(f, start, size, True)
+    as_int, int_off = _walk_id3_headers(f, start, size, False)
+    return not (as_int > as_syncsafe or (as_int == as_syncsafe and syncsafe_off >= 1 and int_off <= 1))
+
+
+def _read_id3(f):
+    """
+    Copies the text frames of an ID3v2.3/2.4 tag into a compact in-memory tag, seeking over
+    every other frame, and lets EasyID3 parse it together with the file's trailing ID3v1 tag.
+    """
+    header = _read_exact(f, ID3_FRAME_HEADER_SIZE)
+    version, flags = header[3], header[5]
+    if version not in (3, 4) or flags or any(byte & 0x80 for byte in header[6:10]):
+        # ID3v2.2, unsynchronisation, extended headers and footers are left to mutagen
+        raise UnsupportedFile("Unsupported ID3v2 layout")
+    size = _syncsafe(header[6:10])
+    start = ID3_FRAME_HEADER_SIZE
+    f.seek(0, os.SEEK_END)
+    file_size = f.tell()
+    if start + size + ID3V1_READ_SIZE > file_size:
+        raise UnsupportedFile("File too short to separate the ID3v1 and ID3v2 tags")
+
+    syncsafe = version == 4 and _id3_frame_sizes_are_syncsafe(f, start, size)
+    frames = []
+    offset = 0
+    while offset + ID3_FRAME_HEADER_SIZE <= size:
+        f.seek(start + offset)
+        frame_header = _read_exact(f, ID3_FRAME_HEADER_SIZE)
+        name, frame_size, frame_flags = struct.unpack('>4sLH', frame_header)
+        if name.strip(b'\x00') == b'':
+            break # Padding
+        if syncsafe:
+            frame_size = _syncsafe(frame_header[4:8])
+        data_start = offset + ID3_FRAME_HEADER_SIZE
+        offset = data_start + frame_size
+        if frame_size == 0 or not (name[:1] == b'T' or name in ID3_KEPT_FRAMES):
+            continue
+        # A frame running past the end of the tag is truncated, as mutagen does
+        data = _read_exact(f, min(frame_size, size - data_start))
+        # Frames are rewritten with sizes in the encoding mutagen expects for the version
+        encoded_size = _to_syncsafe(len(data)) if version == 4 else struct.pack('>L', len(data))
+        frames.append(name + encoded_size + struct.pack('>H', frame_flags) + data)
+
+    frame_data = b''.join(frames)
+    f.seek(-ID3V1_READ_SIZE, os.SEEK_END)
+    trailer = _read_exact(f, ID3V1_READ_SIZE)
+    tag = b'ID3' + bytes([version, 0, 0]) + _to_syncsafe(len(frame_data)) + frame_data + trailer
+
+    easy = EasyID3(io.BytesIO(tag))
+    return {key: (value[0] if value else '') for key, value in easy.items()}
+
+
+# --- Vorbis comments (FLAC and Ogg) ---
+
+def _is_valid_vorbis_key(key):
+    return bool(key) and all(' ' <= c <= '}' and c != '=' for c in key)
+
+
+def _read_vorbis_comment(read, skip, framing):
+    """
+    Parses a Vorbis comment the way mutagen's VCommentDict does, keeping the first value of
+    each (lowercased) key and skipping cover art comments without reading them.
+    `read(n)` returns the next n bytes and `skip(n)` discards them.
+    """
+    vendor_length = struct.unpack('<I', read(4))[0]
+    skip(vendor_length)
+    count = struct.unpack('<I', read(4))[0]
+    tags = {}
+    for i in range(count):
+        length = struct.unpack('<I', read(4))[0]
+        prefix = read(min(length, VORBIS_KEY_PREFIX_SIZE))
+        if b'=' in prefix:
+            key = prefix.split(b'=', 1)[0].decode('utf-8', 'replace').lower()
+            if key in VORBIS_SKIPPED_KEYS:
+                skip(length - len(prefix))
+                continue
+        string = (prefix + read(length - len(prefix))).decode('utf-8', 'replace')
+        if '=' in string:
+            key, value = string.split('=', 1)
+        else:
+            key, value = f"unknown{i}", string
+        key = key.encode('ascii', 'replace').decode('ascii')
+        if _is_valid_vorbis_key(key):
+            tags.setdefault(key.lower(), value)
+    if framing and not read(1)[0] & 0x01:
+        raise UnsupportedFile("Framing bit unset")
+    return tags
+
+
+def _read_flac(f):
+    """Reads the VORBIS_COMMENT block of a FLAC file, seeking over PICTURE and other blocks."""
+    f.seek(4)
+    tags = None
+    is_first = True
+    is_last = False
+    while not is_last:
+        block_header = _read_exact(f, 4)
+        is_last = bool(block_header[0] & 0x80)
+        code = block_header[0] & 0x7F
+        size = int.from_bytes(block_header[1:], 'big')
+        if is_first and code != FLAC_STREAMINFO:
+            raise UnsupportedFile("Stream info block not found")
+        is_first = False
+        if code == FLAC_VORBIS_COMMENT:
+            if tags is not None:
+                raise UnsupportedFile("More than one Vorbis comment block")
+            # Like mutagen, the comment is parsed for its real size rather than the declared one
+            tags = _read_vorbis_comment(lambda n: _read_exact(f, n), lambda n: f.seek(n, os.SEEK_CUR), framing=False)
+        else:
+            f.seek(size, os.SEEK_CUR)
+    return tags or {}
+
+
+class _OggPacketReader:
+    """Reads the packets of the first logical Ogg stream, seeking over bytes that are skipped."""
+    def __init__(self, f):
+        self.f = f
+        self.serial = None
+        self.runs = deque() # Remaining (size, ends_packet) runs of packet data on the current page
+        self.run_left = 0
+        self.packet_ended = False
+
+    def _next_page(self):
+        header = _read_exact(self.f, 27)
+        if header[:4] != b'OggS' or header[4] != 0:
+            raise UnsupportedFile("Not an Ogg page")
+        serial = struct.unpack('<I', header[14:18])[0]
+        if self.serial is None:
+            self.serial = serial
+        elif serial != self.serial:
+            raise UnsupportedFile("Multiplexed Ogg streams")
+        # Consecutive 255-byte lacing values belong to the same packet and are merged into one run
+        run = 0
+        for size in _read_exact(self.f, header[26]):
+            run += size
+            if size < 255:
+                self.runs.append((run, True))
+                run = 0
+        if run:
+            self.runs.append((run, False))
+
+    def _next_run(self):
+        if self.packet_ended:
+            raise UnsupportedFile("Read past the end of the packet")
+        while not self.runs:
+            self._next_page()
+        self.run_left, self.packet_ended = self.runs.popleft()
+
+    def _consume(self, size, keep):
+        chunks = []
+        while size:
+            if not self.run_left:
+                self._next_run()
+                continue
+            n = min(size, self.run_left)
+            if keep:
+                chunks.append(_read_exact(self.f, n))
+            else:
+                self.f.seek(n, os.SEEK_CUR)
+            self.run_left -= n
+            size -= n
+        return b''.join(chunks)
+
+    def read(self, size):
+        return self._consume(size, True)
+
+    def skip(self, size):
+        self._consume(size, False)
+
+    def next_packet(self):
+        """Skips the rest of the current packet."""
+        while not self.packet_ended or self.run_left:
+            if self.run_left:
+                self.skip(self.run_left)
+            else:
+                self._next_run()
+        self.packet_ended = False
+
+
+def _read_ogg(f):
+    """Reads the comment header of an Ogg Vorbis or Opus stream."""
+    packets = _OggPacketReader(f)
+    signature = packets.read(8)
+    if signature == b'OpusHead':
+        comment_signature, framing = b'OpusTags', False
+    elif signature[:7] == b'\x01vorbis':
+        comment_signature, framing = b'\x03vorbis', True
+    else:
+        raise UnsupportedFile("Unsupported Ogg codec")
+    packets.next_packet()
+    if packets.read(len(comment_signature)) != comment_signature:
+        raise UnsupportedFile("Comment header not found")
+    return _read_vorbis_comment(packets.read, packets.skip, framing)
@@ -1,74 +1,293 @@
 import os
+import threading
 import mutagen
 import mutagen.id3
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from utils.duplicate_names import normalize_name
+from utils.user_defaults import DEFAULT_SAVE_WORKERS
+from utils.library_scanner import APOSTROPHE_NORMALIZED_TAGS
 
-def save_track_changes(track):
+# Saves of more files than this run on a background thread in the app, with a progress bar
+BACKGROUND_SAVE_SIZE = 20
+
+
+class SaveJob:
+    """
+    The changes of one track to write to its file, captured from the track on the thread that
+    owns it (plan_save), so the file can be written on any thread without touching the track.
+    The outcome is recorded on the job; apply_save_job then updates the track.
+    """
+    __slots__ = ('track', 'path', 'tags', 'new_filename', 'new_path', 'tags_saved', 'error', 'is_done')
+
+    def __init__(self, track, path, tags, new_filename):
+        self.track = track
+        self.path = path
+        self.tags = tags # Tags that differ from the file: values to write, '' to delete; or None
+        self.new_filename = new_filename # None if the file keeps its name
+        self.new_path = None # Set once the file is renamed
+        self.tags_saved = tags is None # True once the file's tags match the proposed ones
+        self.error = None
+        self.is_done = False # Set once the job has run; jobs of a cancelled save may never run
+
+    @property
+    def is_no_op(self):
+        """True if the file already matches the proposed changes, so it is not opened at all."""
+        return self.tags is None and self.new_filename is None
+
+
+def plan_save(track):
     """
-    Saves the proposed changes to a track's tags and filename.
-    Returns a tuple: (bool: success, str: error_message or None).
+    Captures the proposed changes of a track as a SaveJob. Proposed tags are compared with the
+    tags read from the file (the first value of each, as read_metadata keeps them), and only
+    those that differ are written, so a file is not rewritten to the values it already holds.
+    Titles and artists are kept with normalized apostrophes, so one holding an apostrophe may
+    still differ from the file and is written anyway.
     """
+    tags = {}
+    for tag, value in (track.proposed_tags.items() if track.has_proposed_tags else ()):
+        # The proposed title is the "clean" one, it is saved with its suffixes
+        if tag == 'title':
+            value = f"{value}{''.join(track.suffixes)}"
+        current = track.tags.get(tag) or ''
+        if (value or '') == current and not (tag in APOSTROPHE_NORMALIZED_TAGS and "'" in current):
+            continue
+        tags[tag] = value
+    new_filename = None
+    if track.proposed_filename and track.proposed_filename != track.filename:
+        new_filename = track.proposed_filename
+    return SaveJob(track, track.path, tags or None, new_filename)
+
+
+def apply_save_job(job):
+    """
+    Updates the track of a finished job to match its file: written tags are merged into its
+    tags, its proposed tags are cleared once the file holds them, and its path follows the
+    rename. `old_path` is set to its path before saving and `has_error` to the outcome.
+    Must be called on the thread that owns the track.
+    """
+    track = job.track
+    track.old_path = job.path
+    if job.tags_saved:
+        # Merge the written tags into the main tags dictionary; cleared tags are removed
+        for tag_key, value in (job.tags or {}).items():
+            if value:
+                track.tags[tag_key] = value
+            elif tag_key in track.tags:
+                del track.tags[tag_key]
+        if track.has_proposed_tags:
+            track.proposed_tags.clear()
+    if job.new_path:
+        track.path = job.new_path
+        track.filename = job.new_filename
+        # Clear proposed_filename after saving to indicate changes are applied
+        track.proposed_filename = ""
+    track.has_error = job.error is not None
+
+
+def _write_tags(job):
+    """Writes the tags of a job to its file. Runs on a save worker."""
     try:
         # Check if file is writable
-        if not os.access(track.path, os.W_OK):
-            return False, f"File is read-only: {track.path}"
-
-        # --- 1. Save Tags ---
-        if track.proposed_tags:
-            # If the title was changed, reconstruct it with suffixes before saving.
-            if 'title' in track.proposed_tags:
-                # The proposed title is the "clean" one, without suffixes.
-                clean_title = track.proposed_tags.get('title', track.clean_title)
-                full_title = f"{clean_title}{''.join(track.suffixes)}"
-                # Update the proposed tags dict so it's saved and merged correctly.
-                track.proposed_tags['title'] = full_title
-
-            audio = mutagen.File(track.path, easy=True)
-            if audio is None:
-                return False, f"Could not load file for tag writing: {track.path}"
-            
-            tags_to_delete = []
-            for tag_name, value in track.proposed_tags.items():
-                tag_key = tag_name.lower().replace(' ', '')
-                if value:  # If there's a value, set it
-                    audio[tag_key] = value
-                elif tag_key in audio:  # If the value is empty, delete the tag
-                    del audio[tag_key]
-                    tags_to_delete.append(tag_key)
-            audio.save()
-
-            # For FLAC files, save a fresh non-easy instance to ensure all changes are written
-            if track.path.lower().endswith('.flac'):
-                fresh_audio = mutagen.File(track.path)
-                fresh_audio.save()
-            
-            # Merge proposed tags into the main tags dictionary
-            for tag_key, value in track.proposed_tags.items():
-                if value:
-                    track.tags[tag_key] = value
-                elif tag_key in track.tags:
-                    del track.tags[tag_key] # Ensure cleared tags are removed from the main dict
-
-            # Clear proposed tags after they've been merged
-            track.proposed_tags.clear()
+        if not os.access(job.path, os.W_OK):
+            job.error = f"File is read-only: {job.path}"
+            return
+        if job.tags is None:
+            return
 
-        # --- 2. Rename File ---
-        if track.proposed_filename and track.proposed_filename != track.filename:
-            new_path = os.path.join(os.path.dirname(track.path), track.proposed_filename)
-            
-            # On case-insensitive filesystems (like Windows), os.path.exists can be tricky.
-            # If the only difference is case, we should allow the rename.
-            if os.path.exists(new_path) and track.path.lower() != new_path.lower():
-                return False, f"Cannot rename, file already exists: {new_path}"
-            
-            os.rename(track.path, new_path)
-            track.path = new_path
-            track.filename = track.proposed_filename
-            # Clear proposed_filename after saving to indicate changes are applied
-            track.proposed_filename = ""
-
-        return True, None
+        audio = mutagen.File(job.path, easy=True)
+        if audio is None:
+            job.error = f"Could not load file for tag writing: {job.path}"
+            return
+        for tag_name, value in job.tags.items():
+            tag_key = tag_name.lower().replace(' ', '')
+            if value:  # If there's a value, set it
+                audio[tag_key] = value
+            elif tag_key in audio:  # If the value is empty, delete the tag
+                del audio[tag_key]
+        audio.save()
 
+        # For FLAC files, save a fresh non-easy instance to ensure all changes are written
+        if job.path.lower().endswith('.flac'):
+            fresh_audio = mutagen.File(job.path)
+            fresh_audio.save()
+        job.tags_saved = True
     except Exception as e:
-        return False, f"Error saving changes for {track.path}: {e}"
+        job.error = f"Error saving changes for {job.path}: {e}"
+
 
+def _rename(job, path, new_path):
+    """Renames the file of a job from `path`, recording the new path or the error."""
+    try:
+        # On case-insensitive filesystems (like Windows), os.path.exists can be tricky.
+        # If the only difference is case, we should allow the rename.
+        if os.path.exists(new_path) and path.lower() != new_path.lower():
+            job.error = f"Cannot rename, file already exists: {new_path}"
+            return False
+        os.rename(path, new_path)
+        job.new_path = new_path
+        return True
+    except Exception as e:
+        job.error = f"Error saving changes for {job.path}: {e}"
+        return False
 
+
+def _temporary_path(folder, filename):
+    """A free name in the folder to park a file on while the file holding its new name moves."""
+    for n in range(1000):
+        path = os.path.join(folder, f".{filename}.renaming{n or ''}")
+        if not os.path.exists(path):
+            return path
+    raise OSError(f"No free temporary name for {filename} in {folder}")
+
+
+def _rename_folder(folder, jobs):
+    """
+    Renames the files of one folder. A file whose new name is still held by another file of
+    the batch waits for that file to be renamed first, so chains (a -> b, b -> c) succeed in
+    any order. In a cycle (a -> b, b -> a) one file is parked on a temporary name first.
+    Runs on a save worker.
+    """
+    # Files of the batch still on their old name, by the name they hold
+    holders = {normalize_name(os.path.basename(job.path)): job for job in jobs}
+    paths = {id(job): job.path for job in jobs} # Where each file currently is
+    finished = set()
+    in_progress = set()
+
+    for first in jobs:
+        if id(first) in finished:
+            continue
+        # Follow the chain of files holding the new names, then rename them back to front
+        chain = [first]
+        in_progress.add(id(first))
+        while chain:
+            job = chain[-1]
+            holder = holders.get(normalize_name(job.new_filename))
+            if holder is not None and holder is not job and id(holder) not in finished:
+                if id(holder) not in in_progress:
+                    chain.append(holder)
+                    in_progress.add(id(holder))
+                    continue
+                # A cycle: move this file aside, which frees the name the holder waits for.
+                # It is renamed from there when the loop over the jobs reaches it.
+                chain.pop()
+                in_progress.discard(id(job))
+                try:
+                    parked = _temporary_path(folder, os.path.basename(job.path))
+                    os.rename(job.path, parked)
+                except Exception as e:
+                    job.error = f"Error saving changes for {job.path}: {e}"
+                    finished.add(id(job))
+                    continue
+                paths[id(job)] = parked
+                del holders[normalize_name(os.path.basename(job.path))]
+                continue
+            chain.pop()
+            in_progress.discard(id(job))
+            if _rename(job, paths[id(job)], os.path.join(folder, job.new_filename)):
+                holders.pop(normalize_name(os.path.basename(job.path)), None)
+            elif paths[id(job)] != job.path:
+                job.error += f" (the file was left as {paths[id(job)]})"
+            finished.add(id(job))
+    return jobs
+
+
+def iter_save_jobs(jobs, workers=DEFAULT_SAVE_WORKERS, is_cancelled=None):
+    """
+    Writes a batch of SaveJobs to disk. Tags are written on a pool of `workers` threads; the
+    renames of a folder are done together, in a safe order (see _rename_folder), once all the
+    tag writes of that folder are done. A file whose tags could not be written is not renamed.
+    Jobs are yielded as they finish, as (job, jobs_done, jobs_total). Files that already match
+    their proposed changes (SaveJob.is_no_op) are yielded first, without being opened.
+
+    If `is_cancelled` returns True, the folders not started yet are skipped. The folders
+    started are written completely, as their renames may depend on each other (a file can
+    only take the name of a file renamed away), so each file is either saved completely or
+    untouched. Closing the generator early skips the files not started yet.
+    """
+    total = len(jobs)
+    done = 0
+    # Files that already match their proposed changes are done without being opened
+    for job in jobs:
+        if job.is_no_op:
+            job.is_done = True
+            done += 1
+            yield job, done, total
+    jobs = [job for job in jobs if not job.is_no_op]
+
+    positions = {id(job): position for position, job in enumerate(jobs)}
+    unsubmitted = {} # folder -> tag writes not submitted yet
+    for job in jobs:
+        folder = os.path.dirname(job.path)
+        unsubmitted[folder] = unsubmitted.get(folder, 0) + 1
+    running = dict.fromkeys(unsubmitted, 0) # folder -> tag writes submitted and not finished
+    to_rename = {} # folder -> jobs whose tags are written, waiting for the rest of the folder
+
+    queue = iter(jobs)
+    # Only a few tag writes are queued ahead, so the renames of a finished folder are not
+    # queued behind the tag writes of the whole batch
+    max_queued = max(1, workers or 1) * 4
+    futures = {}
+    cancelled = False
+    started = set() # Folders whose first tag write has begun
+    lock = threading.Lock()
+    executor = ThreadPoolExecutor(max_workers=max(1, workers or 1))
+
+    def write_tags(folder, job):
+        """Writes the tags of a job unless the save was cancelled before its folder started."""
+        with lock:
+            if cancelled and folder not in started:
+                return False
+            started.add(folder)
+        _write_tags(job)
+        return True
+
+    def submit_tags():
+        for job in queue:
+            folder = os.path.dirname(job.path)
+            if cancelled and folder not in started:
+                continue
+            unsubmitted[folder] -= 1
+            running[folder] += 1
+            futures[executor.submit(write_tags, folder, job)] = (folder, job)
+            return
+
+    def submit_renames(folder):
+        if running[folder] or unsubmitted[folder] or folder not in to_rename:
+            return
+        # Renamed in the order of the batch, not the order the tag writes finished in
+        renames = sorted(to_rename.pop(folder), key=lambda job: positions[id(job)])
+        futures[executor.submit(_rename_folder, folder, renames)] = (folder, None)
+
+    try:
+        for _ in range(max_queued):
+            submit_tags()
+        while futures:
+            finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in finished:
+                if not cancelled and is_cancelled is not None and is_cancelled():
+                    with lock:
+                        cancelled = True
+                    # No folder starts from now on; those not started yet are dropped
+                    for folder in unsubmitted:
+                        if folder not in started:
+                            unsubmitted[folder] = 0
+                folder, job = futures.pop(future)
+                if job is None:
+                    # The renames of a folder
+                    for job in future.result():
+                        job.is_done = True
+                        done += 1
+                        yield job, done, total
+                    continue
+                running[folder] -= 1
+                submit_tags()
+                if future.result():
+                    if job.new_filename and job.error is None:
+                        to_rename.setdefault(folder, []).append(job)
+                    else:
+                        job.is_done = True
+                        done += 1
+                        yield job, done, total
+                submit_renames(folder)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,192 @@
+import re
+from collections import deque
+from operator import itemgetter
+
+WORD_REGEX = re.compile(r'\w+')
+
+
+def _fold(text):
+    """Lowercases a text character by character, so positions in the result match the original."""
+    folded = text.lower()
+    if len(folded) == len(text):
+        return folded
+    return ''.join(c if len(c.lower()) != 1 else c.lower() for c in text)
+
+
+def _is_word_char(c):
+    # The characters matched by \w in a str regex
+    return c.isalnum() or c == '_'
+
+
+class KeywordMatcher:
+    """
+    Finds any number of keywords in a text in a single pass, whatever their number, with an
+    Aho-Corasick automaton. Matching ignores case.
+
+    With `whole_words`, a keyword only matches where a regex r'\bkeyword\b' would: the
+    characters on each side of it must differ from its own first and last characters in
+    being word characters or not. The first word of such a match is then a whole word of the
+    text, so when every keyword has a word, keywords are looked up by the words of the text
+    instead of running the automaton.
+    """
+    def __init__(self, keywords, whole_words=False):
+        self.keywords = list(keywords)
+        self.whole_words = whole_words
+        self._lengths = [len(keyword) for keyword in self.keywords]
+        # First and last characters of each keyword are word characters
+        self._word_edges = [
+            (_is_word_char(keyword[0]), _is_word_char(keyword[-1])) if keyword else (False, False)
+            for keyword in self.keywords
+        ]
+        # An empty keyword is in every text, as with `in`
+        self._empty = [index for index, keyword in enumerate(self.keywords) if not keyword]
+        # No match can span the line breaks joining the texts of sub_all
+        self._joinable = not any('\n' in keyword for keyword in self.keywords)
+        # First word of a whole word keyword -> (index, position of the word in the keyword,
+        # folded keyword) of the keywords starting with it. None if a keyword has no word at all.
+        self._by_first_word = None
+        first_words = [WORD_REGEX.search(_fold(keyword)) for keyword in self.keywords]
+        if whole_words and all(first_words):
+            self._by_first_word = {}
+            for index, (keyword, word) in enumerate(zip(self.keywords, first_words)):
+                self._by_first_word.setdefault(word.group(), []).append((index, word.start(), _fold(keyword)))
+
+        # The trie: transitions and the keywords ending at each state
+        self._goto = [{}]
+        self._output = [[]]
+        for index, keyword in enumerate(self.keywords):
+            state = 0
+            for c in _fold(keyword):
+                next_state = self._goto[state].get(c)
+                if next_state is None:
+                    next_state = self._goto[state][c] = len(self._goto)
+                    self._goto.append({})
+                    self._output.append([])
+                state = next_state
+            if keyword:
+                self._output[state].append(index)
+
+        # Failure links, breadth first; each state also outputs the keywords of its failure state
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for c, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and c not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(c, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def __bool__(self):
+        return bool(self.keywords)
+
+    def finditer(self, text):
+        """
+        Yields (start, end, index) for every occurrence of a keyword in `text`, overlapping ones
+        included, ordered by end position. `index` is the keyword's position in the list.
+        """
+        folded = _fold(text)
+        if self._by_first_word is not None:
+            return iter(self._word_matches(text, folded))
+        return self._finditer(text, folded)
+
+    def _word_matches(self, text, folded):
+        """finditer for whole word keywords, looked up by the words of the text."""
+        by_first_word = self._by_first_word
+        # The first words in the text are found without a Python loop over its words; most
+        # texts hold none of them
+        words = by_first_word.keys() & WORD_REGEX.findall(folded)
+        if not words:
+            return ()
+        found = []
+        length = len(folded)
+        for word in words:
+            candidates = by_first_word[word]
+            position = folded.find(word)
+            while position != -1:
+                word_end = position + len(word)
+                # Only where it is a whole word of the text (see _is_word_char)
+                before = folded[position - 1] if position else ' '
+                after = folded[word_end] if word_end < length else ' '
+                if (not (before.isalnum() or before == '_')
+                        and not (after.isalnum() or after == '_')):
+                    for index, offset, keyword in candidates:
+                        start = position - offset
+                        if start >= 0 and folded.startswith(keyword, start):
+                            end = start + len(keyword)
+                            if self._is_whole_word(text, start, end, index):
+                                found.append((start, end, index))
+                position = folded.find(word, word_end)
+        if len(found) > 1:
+            found.sort(key=itemgetter(1))
+        return found
+
+    def _finditer(self, text, folded):
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for position, c in enumerate(folded):
+            while state and c not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(c, 0)
+            if output[state]:
+                end = position + 1
+                for index in output[state]:
+                    start = end - self._lengths[index]
+                    if not self.whole_words or self._is_whole_word(text, start, end, index):
+                        yield start, end, index
+
+    def _is_whole_word(self, text, start, end, index):
+        first, last = self._word_edges[index]
+        before = start > 0 and _is_word_char(text[start - 1])
+        after = end < len(text) and _is_word_char(text[end])
+        return before != first and after != last
+
+    def search(self, text):
+        """Tells whether any keyword is in `text`."""
+        if self._empty:
+            return True
+        for _ in self.finditer(text):
+            return True
+        return False
+
+    def matches(self, text):
+        """Returns the indexes of the keywords found in `text`."""
+        found = {index for _, _, index in self.finditer(text)}
+        found.update(self._empty)
+        return found
+
+    def sub(self, replacement, text):
+        """
+        Replaces the keywords found in `text`, as re.sub would with an alternation of them:
+        the leftmost match wins, and of those starting at the same place, the first keyword.
+        """
+        matches = list(self.finditer(text))
+        if not matches:
+            return text
+        if len(matches) > 1:
+            matches.sort(key=lambda match: (match[0], match[2]))
+        result = []
+        position = 0
+        for start, end, _ in matches:
+            if start < position:
+                continue # Overlaps the previous match
+            result.append(text[position:start])
+            result.append(replacement)
+            position = end
+        result.append(text[position:])
+        return ''.join(result)
+
+    def sub_all(self, replacement, texts):
+        """
+        Returns sub of each of a batch of texts, such as the titles of an album. Whole word
+        keywords are looked up in a single call over the texts joined by line breaks, which
+        bound a whole word as the ends of a text do; texts holding a line break are not joined.
+        """
+        joined = '\n'.join(texts)
+        if (self._by_first_word is None or not self._joinable or '\n' in replacement
+                or joined.count('\n') != len(texts) - 1):
+            return [self.sub(replacement, text) for text in texts]
+        return self.sub(replacement, joined).split('\n') if texts else []
@@ -0,0 +1,177 @@
+import os
+from utils.file_operations import plan_save, iter_save_jobs, apply_save_job
+from utils.user_defaults import DEFAULT_SAVE_WORKERS
+from tools.filename_generators import generate_filenames
+from tools.name_to_tags import name_to_title
+from tools.special_cleaner import get_cleaning_rules
+
+# Name > Title is applied automatically when more than this share of the tracks has no title
+AUTO_NAME_TO_TITLE_MISSING_RATIO = 0.8
+
+
+def prepare_tracks(tracks, settings_manager):
+    """
+    Proposes the automatic changes for a group of tracks shown or cleaned together:
+    Name > Title if it is enabled in the settings and most titles are missing, then the
+    filename generated from the tags.
+    """
+    rules = get_cleaning_rules(settings_manager)
+    auto_apply = settings_manager.get('general', {}).get('auto_apply_name_to_title', False)
+    if auto_apply and tracks:
+        missing_title_count = sum(1 for t in tracks if not t.tags.get('title', '').strip())
+        if missing_title_count / len(tracks) > AUTO_NAME_TO_TITLE_MISSING_RATIO:
+            for track in tracks:
+                name_to_title(track, settings_manager, rules)
+
+    generate_filenames(tracks, settings_manager, rules)
+    return tracks
+
+
+def has_pending_changes(track):
+    """Tells whether a track has proposed tag or filename changes to save."""
+    return track.has_proposed_tags or bool(track.proposed_filename and track.proposed_filename != track.filename)
+
+
+def get_track_changes(track):
+    """
+    Returns the changes saving a track would actually make, as
+    (tag_changes, new_filename): tag_changes maps each changed tag to (old, new), and
+    new_filename is None if the file keeps its name. Proposed tags equal to the file's are
+    left out, as they are not written (see plan_save).
+    """
+    job = plan_save(track)
+    tag_changes = {tag: (track.tags.get(tag, ''), value) for tag, value in (job.tags or {}).items()}
+    return tag_changes, job.new_filename
+
+
+def get_save_workers(settings_manager):
+    """The number of threads writing tags when saving, from the 'save_workers' setting."""
+    return settings_manager.get('general', {}).get('save_workers', DEFAULT_SAVE_WORKERS)
+
+
+def save_tracks(tracks, tag_cache=None, workers=DEFAULT_SAVE_WORKERS):
+    """
+    Saves the proposed changes of the given tracks, updating their paths after renames.
+    Tags are written on `workers` threads (see iter_save_jobs); files that already hold the
+    proposed tags are not rewritten.
+    Each track's `old_path` is set to its path before saving and `has_error` to the outcome.
+    Written and renamed files are invalidated in the tag cache, if one is given.
+    Returns (success_count, errors, counts), counts being count_saved_files of the save.
+    """
+    jobs = [plan_save(track) for track in tracks]
+    for _ in iter_save_jobs(jobs, workers):
+        pass
+    saved_tracks, errors = apply_save_jobs(jobs, tag_cache)
+    return len(saved_tracks) - len(errors), errors, count_saved_files(jobs)
+
+
+def apply_save_jobs(jobs, tag_cache=None):
+    """
+    Updates the tracks of the save jobs that ran (see apply_save_job), in the order of the
+    jobs, and invalidates their files in the tag cache, if one is given. Jobs skipped by a
+    cancelled save leave their tracks untouched.
+    Returns (saved_tracks, errors): the tracks of the jobs that ran and the error messages.
+    """
+    saved_tracks = []
+    errors = []
+    for job in jobs:
+        if not job.is_done:
+            continue
+        apply_save_job(job)
+        saved_tracks.append(job.track)
+        if job.error:
+            errors.append(job.error)
+
+    # Written and renamed files must be re-read on the next scan
+    if tag_cache is not None:
+        touched = [job for job in jobs if job.is_done and not job.is_no_op]
+        tag_cache.invalidate([job.path for job in touched] + [job.track.path for job in touched])
+    return saved_tracks, errors
+
+
+def count_saved_files(jobs):
+    """
+    Counts the files saved without error by a save, as (written, renamed_only, skipped):
+    files whose tags were rewritten (and maybe renamed), files only renamed, and files that
+    already matched their proposed changes and were not opened.
+    """
+    written = renamed_only = skipped = 0
+    for job in jobs:
+        if not job.is_done or job.error:
+            continue
+        if job.tags is not None:
+            written += 1
+        elif job.new_filename is not None:
+            renamed_only += 1
+        else:
+            skipped += 1
+    return written, renamed_only, skipped
+
+
+def update_library_paths(library, saved_tracks):
+    """
+    Updates the library's copies of saved tracks with their new filenames and paths.
+    Their albums are marked as changed, so the next incremental refresh re-reads the files.
+    """
+    for track in saved_tracks:
+        old_path = track.old_path or track.path
+        lib_track = library.get_track(old_path)
+        if lib_track is None:
+            continue
+        lib_track.filename = track.filename
+        lib_track.path = track.path
+        library.reindex_track(lib_track, old_path)
+    mark_tracks_changed(library, saved_tracks)
+
+
+def mark_tracks_changed(library, tracks):
+    """
+    Marks the albums of tracks whose files were written as changed, so the next incremental
+    refresh re-reads them: writing tags does not change the folder mtime.
+    """
+    for track in tracks:
+        album = library.get_album(os.path.dirname(track.path))
+        if album is not None:
+            album.mtime_ns = 0
+
+
+def iter_library_albums(library):
+    """Yields (artist, album) for every album of the library, in name order."""
+    for artist_name in sorted(library, key=str.lower):
+        artist = library[artist_name]
+        for album in artist.albums:
+            yield artist, album
+
+
+def plan_library(library, settings_manager):
+    """
+    Proposes the automatic changes for every album of a scanned library, the same way
+    they are proposed when the album is opened in the main window.
+    Returns a list of plan entries, one per track with changes:
+    {'artist', 'album', 'path', 'new_filename', 'tags': {tag: (old, new)}, 'track'}.
+    """
+    plan = []
+    for artist, album in iter_library_albums(library):
+        for track in prepare_tracks(album.tracks, settings_manager):
+            tag_changes, new_filename = get_track_changes(track)
+            if not tag_changes and new_filename is None:
+                continue
+            plan.append({
+                'artist': artist.name,
+                'album': album.name,
+                'path': track.path,
+                'new_filename': new_filename,
+                'tags': tag_changes,
+                'track': track,
+            })
+    return plan
+
+
+def format_plan_entry(entry):
+    """Formats a plan entry as human readable lines."""
+    lines = [entry['path']]
+    for tag, (old, new) in entry['tags'].items():
+        lines.append(f"    {tag}: {old!r} -> {new!r}")
+    if entry['new_filename'] is not None:
+        lines.append(f"    rename -> {os.path.join(os.path.dirname(entry['path']), entry['new_filename'])}")
+    return lines
@@ -0,0 +1,828 @@
+import os
+import re
+import sys
+import stat
+import mutagen
+import multiprocessing
+from collections import deque
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Future
+
+from utils.data_models import Track, Album, Artist, Library
+from utils.settings_manager import SettingsManager
+from utils.user_defaults import DEFAULT_SCAN_WORKERS, DEFAULT_SCAN_ENGINE, DEFAULT_LAZY_SCAN
+from utils.fast_tag_reader import read_tags
+from tools.special_cleaner import extract_suffixes, normalize_apostrophes, SUFFIX_MEMO
+
+# Tags whose values repeat across the tracks of an album, an artist or the whole library
+SHARED_VALUE_TAGS = frozenset((
+    'artist', 'albumartist', 'album', 'genre', 'date', 'originaldate', 'composer', 'organization',
+    'tracknumber', 'discnumber', 'language', 'media', 'encodedby',
+))
+
+# Title cleaning results sent to each scan worker process, the most recently used ones: the
+# whole memo would be pickled once per worker, and workers send back the results they add
+PROCESS_MEMO_ENTRIES = 5000
+
+# Tags kept with normalized apostrophes (normalize_apostrophes), so they may differ from the file
+APOSTROPHE_NORMALIZED_TAGS = ('title', 'artist')
+
+def read_metadata(file_path, errors=None, fast=True):
+    """
+    Reads metadata from a single audio file.
+    MP3, FLAC and Ogg files are read with the header-only reader in fast_tag_reader unless
+    `fast` is False; other files, and files it cannot handle, are read with mutagen.
+    Only the first value of each tag is kept. Read errors are appended to `errors` if given.
+    """
+    if fast:
+        tags = read_tags(file_path)
+        if tags is not None:
+            return tags
+    try:
+        audio = mutagen.File(file_path, easy=True)
+        if audio is None: return {}
+
+        tags = {}
+        for key, value in audio.items():
+            tags[key] = value[0] if value else ''
+        return tags
+    except Exception as e:
+        if errors is not None:
+            errors.append(f"Error reading metadata for {file_path}: {e}")
+        return {}
+
+
+def _intern_tags(tags):
+    """
+    Returns the tags with interned keys, and interned values for the tags that repeat across
+    tracks, so a large library holds one copy of each instead of one per track.
+    """
+    return {
+        sys.intern(key): sys.intern(value) if key in SHARED_VALUE_TAGS and type(value) is str else value
+        for key, value in tags.items()
+    }
+
+
+def build_track(file_path, filename, artist_name, album_name, settings_manager, errors=None, original_tags=None):
+    """
+    Reads the tags of a single file and builds its Track, including the cleaned title,
+    the extracted suffixes and the proposed tag changes.
+    Already known tags (e.g. from the tag cache) can be passed as `original_tags` to skip the read.
+    """
+    if original_tags is None:
+        original_tags = read_metadata(file_path, errors)
+
+    # Normalize apostrophes in the loaded metadata
+    for tag in APOSTROPHE_NORMALIZED_TAGS:
+        if tag in original_tags:
+            original_tags[tag] = normalize_apostrophes(original_tags[tag])
+
+    original_tags = _intern_tags(original_tags)
+
+    # The raw title is from the original file tags
+    raw_title = original_tags.get('title', '')
+
+    # Clean the title using folder-derived artist/album for accuracy
+    clean_title, suffixes = extract_suffixes(raw_title, artist_name, settings_manager)
+    if clean_title == raw_title:
+        clean_title = raw_title # Share the string
+
+    # Create the track object. 'tags' MUST be the original file tags.
+    track_obj = Track(path=file_path, filename=filename, tags=original_tags, suffixes=suffixes, clean_title=clean_title)
+
+    # --- LOGIC TO PROPOSE CHANGES ---
+    # Always propose artist to be the folder artist
+    track_obj.proposed_tags['artist'] = artist_name
+
+    # Propose album change if it differs from the original file tag
+    if original_tags.get('album') != album_name:
+        track_obj.proposed_tags['album'] = album_name
+
+    # Propose title change if cleaning it resulted in a difference
+    _propose_title(track_obj, raw_title)
+    return track_obj
+
+
+def _propose_title(track, raw_title):
+    """
+    Proposes the clean title of a track if cleaning its title tag resulted in a difference,
+    and drops any proposed title otherwise.
+    """
+    reconstructed_title = f"{track.clean_title}{''.join(track.suffixes)}"
+    normalized_reconstructed = re.sub(r'[\s\[\]\(\)]', '', reconstructed_title).lower()
+    normalized_raw = re.sub(r'[\s\[\]\(\)]', '', raw_title).lower()
+    if normalized_reconstructed != normalized_raw:
+        track.proposed_tags['title'] = track.clean_title
+    elif track.has_proposed_tags:
+        track.proposed_tags.pop('title', None)
+
+
+def file_status(entry):
+    """
+    Returns ((size, mtime_ns), is_read_only) for an os.DirEntry, reusing its cached stat data.
+    The stat key is None if the file could not be stat'ed.
+    """
+    try:
+        stat_result = entry.stat()
+    except OSError:
+        return None, not os.access(entry.path, os.W_OK)
+
+    stat_key = (stat_result.st_size, stat_result.st_mtime_ns)
+    if sys.platform == "win32":
+        # On Windows the read-only attribute is reflected in st_mode, which scandir already provides
+        return stat_key, not stat_result.st_mode & stat.S_IWRITE
+    return stat_key, not os.access(entry.path, os.W_OK)
+
+
+def _scan_file(job):
+    """
+    Worker function for a single audio file.
+    Tags are taken from the cached entry when the file's size and mtime still match it.
+    Returns (track, is_read_only, read_errors, cache_entry) so results can be merged in a fixed
+    order. cache_entry is None unless the tags were freshly read and should be stored.
+    """
+    entry, artist_name, album_name, settings_manager, cached = job
+    file_path = entry.path
+    read_errors = []
+    cache_entry = None
+    stat_key, is_read_only = file_status(entry)
+
+    if cached is not None and stat_key is not None and tuple(cached[0]) == stat_key:
+        original_tags = dict(cached[1])
+    else:
+        original_tags = read_metadata(file_path, read_errors)
+        if stat_key is not None and not read_errors:
+            cache_entry = (file_path, stat_key[0], stat_key[1], dict(original_tags))
+
+    track = build_track(file_path, entry.name, artist_name, album_name, settings_manager, original_tags=original_tags)
+    if stat_key is not None:
+        track.size, track.mtime_ns = stat_key
+    return track, is_read_only, read_errors, cache_entry
+
+
+def reclean_track(track, artist_name, settings_manager):
+    """
+    Re-extracts the clean title and suffixes of a track from its original title tag, and
+    proposes the new clean title as build_track does.
+    """
+    raw_title = track.tags.get('title', '')
+    track.clean_title, track.suffixes = extract_suffixes(raw_title, artist_name, settings_manager)
+    _propose_title(track, raw_title)
+
+
+def _dir_mtime(path):
+    """Returns the mtime of a folder in nanoseconds, or None if it no longer exists."""
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _entry_mtime(entry):
+    """Returns the mtime of an os.DirEntry in nanoseconds, or None if it could not be stat'ed."""
+    try:
+        return entry.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def _list_artist_dirs(root_path, settings_manager):
+    """Returns the DirEntry of every artist folder in root_path, skipping excluded folders by name."""
+    excluded_folders = set(settings_manager.get("general", {}).get("excluded_folders", []))
+    with os.scandir(root_path) as artist_dirs:
+        return [
+            artist_entry for artist_entry in artist_dirs
+            if artist_entry.name not in excluded_folders and artist_entry.is_dir()
+        ]
+
+
+def _list_album(album_obj, artist_name, settings_manager, cached_tags, known_tracks=None):
+    """
+    Lists a single album folder with os.scandir, without reading any tags.
+    Returns the album entries in directory order: warning strings, job tuples for `_scan_file`,
+    and, when `known_tracks` (filename -> Track) is given, the known Track objects whose file
+    size and mtime are unchanged.
+    """
+    supported_formats = set(settings_manager.get("general", {}).get("supported_audio_formats", []))
+    entries = []
+    with os.scandir(album_obj.path) as files:
+        for file_entry in files:
+            if file_entry.is_dir():
+                entries.append(f"Folder in album folder: {file_entry.path}")
+                continue
+
+            # Check if the file extension is in the supported formats list
+            file_extension = os.path.splitext(file_entry.name)[1].lower()
+            if file_extension not in supported_formats:
+                entries.append(f"Unsupported audio format: {file_entry.path}")
+                continue
+
+            known_track = known_tracks.get(file_entry.name) if known_tracks else None
+            if known_track is not None:
+                stat_key, is_read_only = file_status(file_entry)
+                if stat_key == (known_track.size, known_track.mtime_ns):
+                    entries.append(known_track)
+                    if is_read_only:
+                        entries.append(f"Read-only file: {file_entry.path}")
+                    continue
+
+            cached = cached_tags.get(os.path.abspath(file_entry.path))
+            entries.append((file_entry, artist_name, album_obj.name, settings_manager, cached))
+    return entries
+
+
+def _walk_artist(artist_entry, settings_manager, cached_tags, lazy=False):
+    """
+    Walks a single artist folder with os.scandir, without reading any tags.
+    Each directory is listed once and the entries' cached type data is reused, so no extra
+    isdir/isfile calls are made.
+    If `lazy` is set, the album folders themselves are not listed; their albums are left
+    unloaded, with no entries.
+    Returns (artist_obj, artist_entries) where artist entries are warning strings or
+    (album_obj, entries) pairs of `_list_album` results.
+    """
+    return _walk_artist_dir(artist_entry.name, artist_entry.path, _entry_mtime(artist_entry), settings_manager, cached_tags, lazy)
+
+
+def _walk_artist_dir(artist_name, artist_path, mtime_ns, settings_manager, cached_tags, lazy=False):
+    """Like `_walk_artist`, for an artist folder given by name, path and mtime."""
+    artist_obj = Artist(name=artist_name, path=artist_path, mtime_ns=mtime_ns)
+
+    # Warnings are kept in their original position relative to the album entries
+    artist_entries = []
+    with os.scandir(artist_path) as items:
+        for item in items:
+            if item.is_file():
+                artist_entries.append(f"File in artist folder: {item.path}")
+                continue
+
+            if lazy:
+                artist_entries.append((Album(name=item.name, path=item.path, is_loaded=False), []))
+                continue
+            album_obj = Album(name=item.name, path=item.path, mtime_ns=_entry_mtime(item))
+            artist_entries.append((album_obj, _list_album(album_obj, artist_name, settings_manager, cached_tags)))
+    return artist_obj, artist_entries
+
+
+def _walk_library(root_path, settings_manager, cached_tags):
+    """Walks every artist folder. Returns a list of `_walk_artist` results in directory order."""
+    return [
+        _walk_artist(artist_entry, settings_manager, cached_tags)
+        for artist_entry in _list_artist_dirs(root_path, settings_manager)
+    ]
+
+
+def _album_jobs(entries):
+    """Returns the job tuples among a list of album entries."""
+    return [entry for entry in entries if isinstance(entry, tuple)]
+
+
+def _artist_jobs(artist_entries):
+    """Returns the job tuples of every album among a list of artist entries."""
+    return [
+        job
+        for album_entry in artist_entries if not isinstance(album_entry, str)
+        for job in _album_jobs(album_entry[1])
+    ]
+
+
+def _assemble_album(album_obj, entries, results, errors, new_cache_entries):
+    """
+    Fills album_obj with its tracks, in directory order, and records the album's warnings.
+    `results` is an iterator over the `_scan_file` results (or Futures of them) of the album's jobs.
+    Returns the album's warnings.
+    """
+    album_obj.tracks = []
+    warnings = []
+    for entry in entries:
+        if isinstance(entry, str):
+            warnings.append(entry)
+            continue
+        if isinstance(entry, Track):
+            album_obj.tracks.append(entry)
+            continue
+
+        result = next(results)
+        if isinstance(result, Future):
+            result = result.result()
+        track_obj, is_read_only, read_errors, cache_entry = result
+        if cache_entry:
+            new_cache_entries.append(cache_entry)
+        if errors is not None:
+            errors.extend(read_errors)
+        # Check for read-only files and add warning
+        if is_read_only:
+            warnings.append(f"Read-only file: {track_obj.path}")
+        album_obj.tracks.append(track_obj)
+
+    album_obj.warnings = warnings
+    return warnings
+
+
+def _assemble_artist(artist_obj, artist_entries, results, errors, new_cache_entries):
+    """
+    Fills artist_obj with the scanned albums and tracks, in directory order.
+    `results` holds one `_scan_file` result (or a Future of one) per job.
+    Returns the artist's warnings.
+    """
+    warnings = []
+    results = iter(results)
+    for album_entry in artist_entries:
+        if isinstance(album_entry, str):
+            warnings.append(album_entry)
+            artist_obj.warnings.append(album_entry)
+            continue
+
+        album_obj, entries = album_entry
+        if not album_obj.is_loaded:
+            # Lazily scanned album, shown until it is opened and turns out to be empty
+            artist_obj.albums.append(album_obj)
+            continue
+        warnings.extend(_assemble_album(album_obj, entries, results, errors, new_cache_entries))
+        if album_obj.tracks:
+            artist_obj.albums.append(album_obj)
+        else:
+            artist_obj.empty_albums.append(album_obj)
+    return warnings
+
+
+def _get_workers(settings_manager, workers):
+    if workers is None:
+        workers = settings_manager.get("general", {}).get("scan_workers", DEFAULT_SCAN_WORKERS)
+    return workers
+
+
+def _read_jobs(jobs, workers):
+    """Runs `_scan_file` over a list of jobs, on `workers` threads if there is more than one."""
+    if workers and workers > 1 and len(jobs) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(_scan_file, jobs))
+    return [_scan_file(job) for job in jobs]
+
+
+# --- Process pool engine ---
+
+# Settings of a scan worker process, set once per pool by `_init_scan_process`
+_process_settings_manager = None
+
+
+def _init_scan_process(settings, memo_entries):
+    """
+    Pool initializer: receives the settings once per worker process instead of once per task,
+    and the title cleaning results already known to the main process.
+    """
+    global _process_settings_manager
+    _process_settings_manager = SettingsManager.from_settings(settings)
+    SUFFIX_MEMO.update(memo_entries)
+    # The new results are sent back with each artist, for the next scans
+    SUFFIX_MEMO.record_added = True
+
+
+def _track_record(track):
+    """Returns the compact, picklable form of a scanned track."""
+    return (track.path, track.filename, track.clean_title, track.tags,
+            track.proposed_tags if track.has_proposed_tags else None, track.suffixes, track.size, track.mtime_ns)
+
+
+def _track_from_record(record):
+    path, filename, clean_title, tags, proposed_tags, suffixes, size, mtime_ns = record
+    return Track(path=path, filename=filename, clean_title=clean_title, tags=tags, proposed_tags=proposed_tags,
+                 suffixes=suffixes, size=size, mtime_ns=mtime_ns)
+
+
+def _album_record(album_obj):
+    """Returns the compact, picklable form of a scanned album."""
+    return (album_obj.name, album_obj.path, album_obj.mtime_ns, album_obj.warnings,
+            [_track_record(track) for track in album_obj.tracks])
+
+
+def _album_from_record(record):
+    name, path, mtime_ns, warnings, tracks = record
+    return Album(name=name, path=path, mtime_ns=mtime_ns, warnings=warnings,
+                 tracks=[_track_from_record(track) for track in tracks])
+
+
+def _scan_artist_in_process(task):
+    """
+    Worker process function: walks one artist folder and reads all of its files.
+    Returns a picklable record of the artist, its warnings in order, the read errors, the new
+    tag cache entries, the paths of the audio files seen and the new title cleaning results.
+    """
+    artist_name, artist_path, mtime_ns, cached_tags = task
+    artist_obj, artist_entries = _walk_artist_dir(artist_name, artist_path, mtime_ns, _process_settings_manager, cached_tags)
+    jobs = _artist_jobs(artist_entries)
+    errors = []
+    new_cache_entries = []
+    warnings = _assemble_artist(artist_obj, artist_entries, map(_scan_file, jobs), errors, new_cache_entries)
+    return (
+        (artist_name, artist_path, mtime_ns, artist_obj.warnings,
+         [_album_record(album) for album in artist_obj.albums],
+         [_album_record(album) for album in artist_obj.empty_albums]),
+        warnings, errors, new_cache_entries, [job[0].path for job in jobs], SUFFIX_MEMO.take_added()
+    )
+
+
+def _artist_from_record(record):
+    artist_name, artist_path, mtime_ns, warnings, albums, empty_albums = record
+    return Artist(name=artist_name, path=artist_path, mtime_ns=mtime_ns, warnings=warnings,
+                  albums=[_album_from_record(album) for album in albums],
+                  empty_albums=[_album_from_record(album) for album in empty_albums])
+
+
+def _group_cached_tags(root_path, cached_tags):
+    """Splits the cached tags below root_path by artist folder name, so each task only carries its own."""
+    root = os.path.join(os.path.abspath(root_path), '')
+    by_artist = {}
+    for path, entry in cached_tags.items():
+        by_artist.setdefault(path[len(root):].split(os.sep, 1)[0], {})[path] = entry
+    return by_artist
+
+
+def _iter_artists_in_processes(root_path, settings_manager, artist_dirs, cached_tags, workers):
+    """
+    Scans the artist folders on a pool of `workers` processes, one task per artist folder.
+    Yields `_scan_artist_in_process` results in directory order, keeping a few artists queued
+    ahead per worker. Closing the generator cancels the artists that have not started yet.
+    """
+    cached_by_artist = _group_cached_tags(root_path, cached_tags)
+    tasks = (
+        (entry.name, entry.path, _entry_mtime(entry), cached_by_artist.get(entry.name, {}))
+        for entry in artist_dirs
+    )
+    # Spawned rather than forked, as the scan usually runs next to GUI threads
+    executor = ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_scan_process, initargs=(settings_manager.settings, SUFFIX_MEMO.entries(PROCESS_MEMO_ENTRIES))
+    )
+    try:
+        pending = deque(executor.submit(_scan_artist_in_process, task) for task in islice(tasks, workers * 2))
+        while pending:
+            result = pending.popleft().result()
+            for task in islice(tasks, 1):
+                pending.append(executor.submit(_scan_artist_in_process, task))
+            yield result
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def iter_scan_library(root_path, settings_manager, errors=None, workers=None, tag_cache=None, lazy=None):
+    """
+    Scans the given root path artist by artist.
+
+    The os.scandir walk is sequential; tag reading, stat/read-only checks and title cleaning are
+    fanned out to `workers` threads (taken from the 'scan_workers' setting when not given).
+    Artists are yielded in directory order as soon as all of their files are done, as
+    (artist_obj, warnings, artists_done, artists_total). Artists without any albums are
+    yielded too, so their folders can be rechecked later.
+    If a TagCache is given, unchanged files are not reopened; newly read tags are stored and,
+    when the scan runs to completion, entries of files that no longer exist are pruned.
+    Closing the generator early cancels the files that have not started yet.
+    With the 'scan_engine' setting set to "processes", whole artist folders are scanned on
+    `workers` processes instead, so tag parsing and title cleaning are not serialized by the GIL.
+    In lazy mode (the 'lazy_scan' setting when `lazy` is not given) only the artist and album
+    folders are listed, so the scan time depends on the number of folders, not files; albums
+    are left unloaded until `load_album` is called on them.
+    """
+    workers = _get_workers(settings_manager, workers)
+    general = settings_manager.get("general", {})
+    if lazy is None:
+        lazy = general.get("lazy_scan", DEFAULT_LAZY_SCAN)
+    use_processes = (not lazy and workers and workers > 1
+                     and general.get("scan_engine", DEFAULT_SCAN_ENGINE) == "processes")
+    cached_tags = tag_cache.load(root_path) if tag_cache else {}
+    artist_dirs = _list_artist_dirs(root_path, settings_manager)
+    total = len(artist_dirs)
+
+    if use_processes:
+        yield from _iter_scan_processes(root_path, settings_manager, artist_dirs, cached_tags, errors, workers, tag_cache)
+        return
+
+    executor = ThreadPoolExecutor(max_workers=workers) if workers and workers > 1 else None
+    # Keep enough files queued ahead of the artist being assembled to keep every worker busy
+    max_queued_jobs = max(1, workers or 1) * 4
+    pending = deque()
+    queued_jobs = 0
+    done = 0
+    seen_paths = []
+    new_cache_entries = []
+    completed = False
+    try:
+        for artist_entry in artist_dirs:
+            artist_obj, artist_entries = _walk_artist(artist_entry, settings_manager, cached_tags, lazy)
+            jobs = _artist_jobs(artist_entries)
+            seen_paths.extend(job[0].path for job in jobs)
+            if executor:
+                results = [executor.submit(_scan_file, job) for job in jobs]
+            else:
+                results = [_scan_file(job) for job in jobs]
+            pending.append((artist_obj, artist_entries, results))
+            queued_jobs += len(results)
+
+            # Hand out finished artists while the workers keep going on the queued ones
+            while pending and (queued_jobs >= max_queued_jobs or
+                               all(not isinstance(r, Future) or r.done() for r in pending[0][2])):
+                artist_obj, artist_entries, results = pending.popleft()
+                queued_jobs -= len(results)
+                warnings = _assemble_artist(artist_obj, artist_entries, results, errors, new_cache_entries)
+                done += 1
+                yield artist_obj, warnings, done, total
+
+        while pending:
+            artist_obj, artist_entries, results = pending.popleft()
+            warnings = _assemble_artist(artist_obj, artist_entries, results, errors, new_cache_entries)
+            done += 1
+            yield artist_obj, warnings, done, total
+        completed = True
+    finally:
+        if executor:
+            executor.shutdown(wait=True, cancel_futures=True)
+        if tag_cache:
+            tag_cache.store(new_cache_entries)
+            # A lazy scan has not seen the files, so it cannot tell which entries are stale
+            if completed and not lazy:
+                tag_cache.prune(root_path, seen_paths)
+
+
+def load_album(album_obj, artist_name, settings_manager, errors=None, workers=None, tag_cache=None):
+    """
+    Reads the tracks of an album left unloaded by a lazy scan: its tags, cleaned titles,
+    suffixes and proposed changes. The result is kept on the album, so this only runs once.
+    Returns the album's warnings.
+    """
+    if album_obj.is_loaded:
+        return album_obj.warnings
+    workers = _get_workers(settings_manager, workers)
+    cached_tags = tag_cache.load(album_obj.path) if tag_cache else {}
+    # The mtime is taken before listing, so changes made meanwhile are seen by the next refresh
+    album_obj.mtime_ns = _dir_mtime(album_obj.path)
+    try:
+        entries = _list_album(album_obj, artist_name, settings_manager, cached_tags)
+    except OSError as e:
+        entries = [f"Error listing {album_obj.path}: {e}"]
+    new_cache_entries = []
+    results = iter(_read_jobs(_album_jobs(entries), workers))
+    warnings = _assemble_album(album_obj, entries, results, errors, new_cache_entries)
+    album_obj.is_loaded = True
+    if tag_cache:
+        tag_cache.store(new_cache_entries)
+    return warnings
+
+
+def repartition_albums(artist_obj):
+    """Moves the albums found to be empty once loaded to the artist's empty albums."""
+    empty = [album for album in artist_obj.albums if album.is_loaded and not album.tracks]
+    if empty:
+        artist_obj.albums = [album for album in artist_obj.albums if not album.is_loaded or album.tracks]
+        artist_obj.empty_albums.extend(empty)
+    return bool(empty)
+
+
+def _iter_scan_processes(root_path, settings_manager, artist_dirs, cached_tags, errors, workers, tag_cache):
+    """The process pool variant of `iter_scan_library`, yielding the same tuples."""
+    total = len(artist_dirs)
+    done = 0
+    seen_paths = []
+    new_cache_entries = []
+    completed = False
+    results = _iter_artists_in_processes(root_path, settings_manager, artist_dirs, cached_tags, workers)
+    try:
+        for record, warnings, read_errors, artist_cache_entries, artist_paths, memo_entries in results:
+            SUFFIX_MEMO.update(memo_entries)
+            if errors is not None:
+                errors.extend(read_errors)
+            new_cache_entries.extend(artist_cache_entries)
+            seen_paths.extend(artist_paths)
+            done += 1
+            yield _artist_from_record(record), warnings, done, total
+        completed = True
+    finally:
+        results.close()
+        if tag_cache:
+            tag_cache.store(new_cache_entries)
+            if completed:
+                tag_cache.prune(root_path, seen_paths)
+
+
+def add_scanned_artist(library, artist_obj):
+    """Adds an artist yielded by iter_scan_library to the library."""
+    library.index_artist(artist_obj)
+    if artist_obj.albums:
+        library[artist_obj.name] = artist_obj
+    else:
+        library.empty_artists[artist_obj.name] = artist_obj
+
+
+def scan_library(root_path, settings_manager, errors=None, workers=None, tag_cache=None, lazy=None):
+    """
+    Scans the given root path and builds a library of Artist, Album, and Track objects.
+    Results are merged in directory order, so the library and the warnings list are the same
+    whatever the number of workers.
+    Returns (library, warnings).
+    """
+    # The root mtime is taken before listing, so changes made during the scan are seen by the next refresh
+    library = Library(root_path, _dir_mtime(root_path))
+    warnings = []
+    for artist_obj, artist_warnings, _, _ in iter_scan_library(root_path, settings_manager, errors, workers, tag_cache, lazy):
+        warnings.extend(artist_warnings)
+        add_scanned_artist(library, artist_obj)
+    library.is_complete = True
+    return library, warnings
+
+
+class LibraryRefresh:
+    """
+    The changes found on disk by plan_refresh, to be applied to the library by apply_refresh.
+    The library is only read while planning, so the folders can be listed and the files read
+    on any thread, and the library patched afterwards on the thread that owns it.
+    """
+    __slots__ = ('root_mtime', 'removed_artists', 'new_artists', 'listed_artists', 'album_orders',
+                 'pending_albums', 'results')
+
+    def __init__(self):
+        self.root_mtime = None # New mtime of the root folder, if it was listed
+        self.removed_artists = [] # Artists whose folder is gone
+        self.new_artists = [] # _walk_artist results of the new artist folders
+        self.listed_artists = [] # (artist, mtime_ns, warnings, removed albums) of the listed artist folders
+        self.album_orders = [] # (artist, albums in directory order) of the checked artists
+        self.pending_albums = [] # (album, mtime_ns or None if gone, entries, removed tracks)
+        self.results = [] # _scan_file results of the jobs of pending_albums, then of new_artists
+
+
+def plan_refresh(library, settings_manager, workers=None, tag_cache=None, force=False, dirs=None, check_files=False):
+    """
+    Lists the folders of a library built by scan_library that changed on disk and reads their
+    new and changed files, without changing the library. Returns a LibraryRefresh for
+    apply_refresh. See refresh_library for the arguments.
+    Raises OSError if the root folder cannot be listed.
+    """
+    workers = _get_workers(settings_manager, workers)
+    refresh = LibraryRefresh()
+    known_artists = {artist.name: artist for artist in library.all_artists()}
+
+    def is_listed(path, old_mtime, new_mtime):
+        return force or new_mtime != old_mtime or (dirs is not None and path in dirs)
+
+    # Artists to check: all of them, or those whose folder or one of its album folders changed
+    artists_to_check = None if dirs is None else set(dirs) | {os.path.dirname(path) for path in dirs}
+
+    root_mtime = _dir_mtime(library.root_path)
+    if is_listed(library.root_path, library.mtime_ns, root_mtime):
+        current_dirs = {entry.name: entry for entry in _list_artist_dirs(library.root_path, settings_manager)}
+        for name in list(known_artists):
+            if name not in current_dirs:
+                refresh.removed_artists.append(known_artists.pop(name))
+        refresh.new_artists = [
+            _walk_artist(entry, settings_manager, tag_cache.load(entry.path) if tag_cache else {})
+            for name, entry in current_dirs.items() if name not in known_artists
+        ]
+        refresh.root_mtime = root_mtime
+
+    for artist in known_artists.values():
+        if artists_to_check is not None and artist.path not in artists_to_check:
+            continue
+        artist_mtime = _dir_mtime(artist.path)
+        if artist_mtime is None:
+            refresh.removed_artists.append(artist)
+            continue
+
+        albums_in_order = artist.albums + artist.empty_albums
+        if is_listed(artist.path, artist.mtime_ns, artist_mtime):
+            known_albums = {album.name: album for album in albums_in_order}
+            warnings = []
+            albums_in_order = []
+            with os.scandir(artist.path) as items:
+                for item in items:
+                    if item.is_file():
+                        warnings.append(f"File in artist folder: {item.path}")
+                        continue
+                    album = known_albums.pop(item.name, None)
+                    if album is None:
+                        # New album folder, listed below
+                        album = Album(name=item.name, path=item.path, mtime_ns=None)
+                    albums_in_order.append(album)
+            refresh.listed_artists.append((artist, artist_mtime, warnings, list(known_albums.values())))
+        refresh.album_orders.append((artist, albums_in_order))
+
+        for album in albums_in_order:
+            if dirs is not None and album.path not in dirs and album.mtime_ns is not None:
+                continue
+            album_mtime = _dir_mtime(album.path)
+            if album_mtime is None:
+                # Removed since the artist folder was listed
+                refresh.pending_albums.append((album, None, [], list(album.tracks)))
+                continue
+            if not album.is_loaded:
+                # Left for load_album, which always lists the folder afresh
+                continue
+            if not check_files and not is_listed(album.path, album.mtime_ns, album_mtime):
+                continue
+            known_tracks = {track.filename: track for track in album.tracks}
+            cached_tags = tag_cache.load(album.path) if tag_cache else {}
+            entries = _list_album(album, artist.name, settings_manager, cached_tags, known_tracks)
+            kept = {id(entry) for entry in entries if isinstance(entry, Track)}
+            removed = [track for track in album.tracks if id(track) not in kept]
+            refresh.pending_albums.append((album, album_mtime, entries, removed))
+
+    # Read the new and changed files
+    jobs = [job for _, _, entries, _ in refresh.pending_albums for job in _album_jobs(entries)]
+    jobs += [job for _, artist_entries in refresh.new_artists for job in _artist_jobs(artist_entries)]
+    refresh.results = _read_jobs(jobs, workers)
+    return refresh
+
+
+def apply_refresh(library, refresh, settings_manager, errors=None, tag_cache=None, reclean=False):
+    """
+    Patches a library in place with the changes found by plan_refresh, keeping the untouched
+    Track objects as they are. Must be called on the thread that owns the library.
+    See refresh_library for the other arguments and the result.
+    """
+    changed_artists = set()
+    changed_albums = set()
+    removed_paths = []
+
+    for artist in refresh.removed_artists:
+        library.unindex_artist(artist)
+        library.pop(artist.name, None)
+        library.empty_artists.pop(artist.name, None)
+        changed_artists.add(artist.name)
+        removed_paths.extend(track.path for album in artist.albums for track in album.tracks)
+    if refresh.root_mtime is not None:
+        library.mtime_ns = refresh.root_mtime
+
+    for artist, mtime_ns, warnings, removed_albums in refresh.listed_artists:
+        artist.warnings = warnings
+        for album in removed_albums:
+            removed_paths.extend(track.path for track in album.tracks)
+            changed_albums.add(album.path)
+            library.unindex_album(album)
+        artist.mtime_ns = mtime_ns
+
+    results = iter(refresh.results)
+    new_cache_entries = []
+    for album, mtime_ns, entries, removed in refresh.pending_albums:
+        if mtime_ns is None:
+            album.is_loaded = True
+        else:
+            album.mtime_ns = mtime_ns
+        _assemble_album(album, entries, results, errors, new_cache_entries)
+        library.unindex_tracks(removed)
+        library.index_album(album)
+        removed_paths.extend(track.path for track in removed)
+        if removed or _album_jobs(entries):
+            changed_albums.add(album.path)
+
+    # Re-partition albums and artists by whether they still have tracks
+    for artist, albums_in_order in refresh.album_orders:
+        name = artist.name
+        album_names = [album.name for album in artist.albums]
+        artist.albums = [album for album in albums_in_order if album.tracks or not album.is_loaded]
+        artist.empty_albums = [album for album in albums_in_order if album.is_loaded and not album.tracks]
+        if [album.name for album in artist.albums] != album_names:
+            changed_artists.add(name)
+        if artist.albums and name in library.empty_artists:
+            del library.empty_artists[name]
+            library[name] = artist
+        elif not artist.albums and name in library:
+            del library[name]
+            library.empty_artists[name] = artist
+
+    for artist_obj, artist_entries in refresh.new_artists:
+        _assemble_artist(artist_obj, artist_entries, results, errors, new_cache_entries)
+        add_scanned_artist(library, artist_obj)
+        changed_artists.add(artist_obj.name)
+        changed_albums.update(album.path for album in artist_obj.albums)
+
+    if reclean:
+        for artist in library.values():
+            for album in artist.albums:
+                for track in album.tracks:
+                    reclean_track(track, artist.name, settings_manager)
+
+    if tag_cache:
+        tag_cache.store(new_cache_entries)
+        tag_cache.invalidate(removed_paths)
+    return changed_artists, changed_albums
+
+
+def refresh_library(library, settings_manager, errors=None, workers=None, tag_cache=None, force=False, reclean=False, dirs=None, check_files=False):
+    """
+    Incrementally rescans a library built by scan_library, patching its objects in place.
+
+    Only folders whose mtime changed are listed again (all of them if `force` is set, e.g.
+    after the excluded folders or supported formats changed), and only files whose size or
+    mtime changed are read again, taken from `tag_cache` when it holds them, as in
+    scan_library. Untouched Track objects are kept as they are, including any pending proposed
+    changes. If `reclean` is set, the clean title and suffixes of every kept track are
+    re-extracted and its title proposed again, e.g. after the cleaning settings changed.
+    If `check_files` is set, the album folders whose mtime did not change are listed too, and
+    their files stat'ed, so files edited in place by another program are read again.
+    If `dirs` is given (e.g. folders reported by a file system watcher), only those folders are
+    checked, and listed even if their mtime did not change; the rest of the library is assumed
+    to be unchanged.
+    The folders are listed and the files read by plan_refresh, then the library is patched by
+    apply_refresh; the two can be called separately to do the first on a background thread.
+    Returns (changed_artists, changed_albums): the names of artists whose album list changed or
+    that were added or removed, and the paths of albums whose tracks changed.
+    """
+    refresh = plan_refresh(library, settings_manager, workers, tag_cache, force, dirs, check_files)
+    return apply_refresh(library, refresh, settings_manager, errors, tag_cache, reclean)
@@ -0,0 +1,194 @@
+import gc
+import os
+import json
+from itertools import chain
+from contextlib import contextmanager
+from utils.data_models import Track, Album, Artist, Library
+
+# The first line of a snapshot is a JSON header: [magic, format version, library root].
+# Snapshots with another version are ignored. The library follows as JSON.
+SNAPSHOT_MAGIC = 'MRCLSNAP'
+SNAPSHOT_VERSION = 3
+
+
+class _StringIndexes(dict):
+    """
+    Gives each tag name and value of a snapshot an index in its string table, in order of first
+    use; the keys are the table. Tracks store their tags as indexes, so each string is written
+    once and the values that repeat across tracks are shared again when the snapshot is read.
+    """
+    def __missing__(self, string):
+        index = self[string] = len(self)
+        return index
+
+    def encode(self, tags):
+        """Returns the tags of a track as a flat list of name and value indexes."""
+        return list(map(self.__getitem__, chain.from_iterable(tags.items())))
+
+
+def _decode_tags(encoded, string):
+    """Reverses _StringIndexes.encode, with `string` returning the string at an index."""
+    strings = map(string, encoded)
+    return dict(zip(strings, strings))
+
+
+def _track_record(track, indexes):
+    proposed_tags = indexes.encode(track.proposed_tags) if track.has_proposed_tags else None
+    return (track.path, track.filename, track.clean_title, indexes.encode(track.tags), proposed_tags,
+            track.suffixes, track.size, track.mtime_ns)
+
+
+def _track_from_record(record, string):
+    path, filename, clean_title, tags, proposed_tags, suffixes, size, mtime_ns = record
+    return Track(path=path, filename=filename, clean_title=clean_title, tags=_decode_tags(tags, string),
+                 proposed_tags=_decode_tags(proposed_tags, string) if proposed_tags else None,
+                 suffixes=suffixes, size=size, mtime_ns=mtime_ns)
+
+
+def _album_record(album, indexes):
+    return (album.name, album.path, album.mtime_ns, album.warnings, album.is_loaded,
+            [_track_record(track, indexes) for track in album.tracks])
+
+
+def _album_from_record(record, string):
+    name, path, mtime_ns, warnings, is_loaded, tracks = record
+    return Album(name=name, path=path, mtime_ns=mtime_ns, warnings=warnings, is_loaded=is_loaded,
+                 tracks=[_track_from_record(track, string) for track in tracks])
+
+
+def _artist_record(artist, indexes):
+    return (artist.name, artist.path, artist.mtime_ns, artist.warnings,
+            [_album_record(album, indexes) for album in artist.albums],
+            [_album_record(album, indexes) for album in artist.empty_albums])
+
+
+def _artist_from_record(record, string):
+    name, path, mtime_ns, warnings, albums, empty_albums = record
+    return Artist(name=name, path=path, mtime_ns=mtime_ns, warnings=warnings,
+                  albums=[_album_from_record(album, string) for album in albums],
+                  empty_albums=[_album_from_record(album, string) for album in empty_albums])
+
+
+def _is_same_path(path, other):
+    return os.path.normcase(os.path.abspath(path)) == os.path.normcase(os.path.abspath(other))
+
+
+@contextmanager
+def _gc_paused():
+    """
+    Pauses the cyclic garbage collector, which would otherwise run over and over while the
+    millions of small objects of a large snapshot are created, without finding any garbage.
+    """
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
+def save_snapshot(snapshot_path, library, warnings):
+    """
+    Writes a complete library and its warnings to a snapshot file, as the scanned state of
+    every folder and track (pending edits in the file browser are not included).
+    The file is replaced atomically, so a crash never leaves a truncated snapshot behind.
+    """
+    temp_path = snapshot_path + '.tmp'
+    with _gc_paused(), open(temp_path, 'wb') as f:
+        indexes = _StringIndexes()
+        artists = [_artist_record(artist, indexes) for artist in library.values()]
+        empty_artists = [_artist_record(artist, indexes) for artist in library.empty_artists.values()]
+        data = (library.mtime_ns, list(warnings), list(indexes), artists, empty_artists)
+        # The root is stored in the header line, so a snapshot of another library is rejected without loading it
+        f.write(json.dumps([SNAPSHOT_MAGIC, SNAPSHOT_VERSION, library.root_path]).encode('ascii') + b'\n')
+        f.write(json.dumps(data, separators=(',', ':'), default=str).encode('ascii'))
+    os.replace(temp_path, snapshot_path)
+
+
+def load_snapshot(snapshot_path, root_path=None):
+    """
+    Reads a library snapshot written by save_snapshot.
+    Returns (library, warnings), or None if there is no usable snapshot (missing, written by
+    another version, corrupt, or for another root folder than `root_path`, if given).
+    The snapshot only reflects the disk as it was when it was written; use
+    find_changed_folders and refresh_library to bring it up to date.
+    """
+    with _gc_paused():
+        return _read_snapshot(snapshot_path, root_path)
+
+
+def _read_snapshot(snapshot_path, root_path):
+    try:
+        with open(snapshot_path, 'rb') as f:
+            magic, version, root = json.loads(f.readline())
+            if (magic, version) != (SNAPSHOT_MAGIC, SNAPSHOT_VERSION):
+                return None
+            if root_path is not None and not _is_same_path(root, root_path):
+                return None
+            mtime_ns, warnings, strings, artists, empty_artists = json.loads(f.read())
+
+        string = strings.__getitem__
+        library = Library(root, mtime_ns)
+        for record in artists:
+            artist = _artist_from_record(record, string)
+            library[artist.name] = artist
+            library.index_artist(artist)
+        for record in empty_artists:
+            artist = _artist_from_record(record, string)
+            library.empty_artists[artist.name] = artist
+            library.index_artist(artist)
+    except (OSError, ValueError, TypeError, AttributeError, IndexError):
+        return None
+    library.is_complete = True
+    return library, warnings
+
+
+def library_folder_states(library):
+    """
+    Returns (path, mtime_ns, files) for the root, artist and album folders of a library, files
+    being {filename: (size, mtime_ns)} of the tracks of a loaded album, and None otherwise.
+    """
+    folders = [(library.root_path, library.mtime_ns, None)]
+    for artist in library.all_artists():
+        folders.append((artist.path, artist.mtime_ns, None))
+        folders.extend(
+            (album.path, album.mtime_ns,
+             {track.filename: (track.size, track.mtime_ns) for track in album.tracks} if album.is_loaded else None)
+            for album in artist.albums + artist.empty_albums
+        )
+    return folders
+
+
+def _files_changed(path, files):
+    """True if a file of an album folder is gone or its size or mtime differs from `files`."""
+    seen = 0
+    with os.scandir(path) as entries:
+        for entry in entries:
+            stat_key = files.get(entry.name)
+            if stat_key is None:
+                continue
+            seen += 1
+            stat_result = entry.stat()
+            if (stat_result.st_size, stat_result.st_mtime_ns) != stat_key:
+                return True
+    return seen != len(files)
+
+
+def find_changed_folders(folders, is_cancelled=None):
+    """
+    Stats the folders returned by library_folder_states and returns the paths of those whose
+    mtime changed or that are gone, and of the album folders holding a file whose size or mtime
+    changed (e.g. tags edited in place by another program), to be passed to refresh_library as
+    `dirs`, which then reads only the files that changed.
+    """
+    changed = set()
+    for path, mtime_ns, files in folders:
+        if is_cancelled is not None and is_cancelled():
+            break
+        try:
+            if os.stat(path).st_mtime_ns != mtime_ns or (files and _files_changed(path, files)):
+                changed.add(path)
+        except OSError:
+            changed.add(path)
+    return changed
@@ -1,12 +1,25 @@
 import json
 import os
-from utils.user_defaults import DEFAULT_BANNED_WORDS, DEFAULT_TAG_MAPPINGS
+from utils.user_defaults import DEFAULT_BANNED_WORDS, DEFAULT_TAG_MAPPINGS, DEFAULT_SCAN_WORKERS, DEFAULT_SAVE_WORKERS, DEFAULT_SCAN_ENGINE, DEFAULT_LAZY_SCAN, DEFAULT_WATCH_LIBRARY, DEFAULT_MAX_WATCHED_FOLDERS, DEFAULT_FILENAME_TEMPLATE
 
 class SettingsManager:
     """Handles loading and accessing application settings."""
     def __init__(self, settings_path='src/settings.json'):
         self.settings_path = settings_path
         self.settings = self.load_settings()
+        # Incremented when the settings are saved; compiled forms of older versions are dropped
+        self.version = 0
+        self._compiled = {}
+
+    @classmethod
+    def from_settings(cls, settings):
+        """Creates a manager over already loaded settings, e.g. in a scan worker process, without reading the settings file."""
+        settings_manager = cls.__new__(cls)
+        settings_manager.settings_path = None
+        settings_manager.settings = settings
+        settings_manager.version = 0
+        settings_manager._compiled = {}
+        return settings_manager
 
     def load_settings(self):
         """Loads settings from the JSON file."""
@@ -56,7 +69,14 @@ class SettingsManager:
                 "special_album_names": [], 
                 "words_to_remove": DEFAULT_BANNED_WORDS,
                 "tag_mappings": DEFAULT_TAG_MAPPINGS,
-                "auto_apply_name_to_title": False 
+                "auto_apply_name_to_title": False,
+                "scan_workers": DEFAULT_SCAN_WORKERS,
+                "save_workers": DEFAULT_SAVE_WORKERS,
+                "scan_engine": DEFAULT_SCAN_ENGINE,
+                "lazy_scan": DEFAULT_LAZY_SCAN,
+                "watch_library": DEFAULT_WATCH_LIBRARY,
+                "max_watched_folders": DEFAULT_MAX_WATCHED_FOLDERS,
+                "filename_template": DEFAULT_FILENAME_TEMPLATE
             },
             "ui": {"highlight_colors": {}},
             "tagging_and_columns": {"default_tags": {"Artist": True, "Album": True, "Title": True}}
@@ -66,6 +86,18 @@ class SettingsManager:
         """Saves the current settings to the JSON file."""
         with open(self.settings_path, 'w') as f:
             json.dump(self.settings, f, indent=4)
+        self.version += 1
+        self._compiled.clear()
+
+    def get_compiled(self, name, build):
+        """
+        Returns `build(self)`, e.g. regexes compiled from the settings, built once per settings
+        version: it is built again only after the settings are saved.
+        """
+        compiled = self._compiled.get(name)
+        if compiled is None:
+            compiled = self._compiled[name] = build(self)
+        return compiled
 
     def get(self, key, default=None):
         """Gets a value from the settings."""
@@ -0,0 +1,80 @@
+import os
+import json
+import sqlite3
+from contextlib import contextmanager
+
+
+class TagCache:
+    """
+    Persistent on-disk cache of `read_metadata` results.
+
+    Entries are keyed by absolute path and are only valid while the file's size and
+    modification time (in nanoseconds) are unchanged.
+    """
+    def __init__(self, db_path):
+        self.db_path = db_path
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS tags ("
+                "path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, tags TEXT NOT NULL)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        """Opens a short-lived connection, so the cache can be used from any thread."""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _key(path):
+        return os.path.abspath(path)
+
+    @staticmethod
+    def _prefix_range(root_path):
+        """Returns the (low, high) key range covering every path below root_path."""
+        root = os.path.join(os.path.abspath(root_path), '')
+        return root, root[:-1] + chr(ord(root[-1]) + 1)
+
+    def load(self, root_path):
+        """
+        Loads every cached entry below root_path.
+        Returns a dict of absolute path -> ((size, mtime_ns), tags).
+        """
+        low, high = self._prefix_range(root_path)
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT path, size, mtime_ns, tags FROM tags WHERE path >= ? AND path < ?", (low, high)
+            ).fetchall()
+        return {path: ((size, mtime_ns), json.loads(tags)) for path, size, mtime_ns, tags in rows}
+
+    def store(self, entries):
+        """Stores (path, size, mtime_ns, tags) entries, replacing any existing ones."""
+        if not entries:
+            return
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO tags (path, size, mtime_ns, tags) VALUES (?, ?, ?, ?)",
+                [(self._key(path), size, mtime_ns, json.dumps(tags, default=str)) for path, size, mtime_ns, tags in entries]
+            )
+
+    def invalidate(self, paths):
+        """Removes the entries of files that have been written or renamed."""
+        keys = [(self._key(path),) for path in paths if path]
+        if not keys:
+            return
+        with self._connect() as conn:
+            conn.executemany("DELETE FROM tags WHERE path = ?", keys)
+
+    def prune(self, root_path, existing_paths):
+        """Removes entries below root_path whose files were not found by the last scan."""
+        existing = {self._key(path) for path in existing_paths}
+        low, high = self._prefix_range(root_path)
+        with self._connect() as conn:
+            cached = conn.execute("SELECT path FROM tags WHERE path >= ? AND path < ?", (low, high)).fetchall()
+            stale = [(path,) for (path,) in cached if path not in existing]
+            if stale:
+                conn.executemany("DELETE FROM tags WHERE path = ?", stale)
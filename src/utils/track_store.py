@@ -0,0 +1,229 @@
+import os
+from array import array
+from collections import Counter
+from itertools import compress
+
+# Row flags
+FLAG_PROPOSED_TAGS = 1
+FLAG_RENAME = 2
+FLAG_MANUAL_RENAME = 4
+FLAG_ERROR = 8
+
+# Columns of every row besides the tags, which are addressed as 'tag:<name>'
+STORE_COLUMNS = ('artist', 'album', 'folder', 'filename', 'new_name', 'title', 'suffixes')
+
+
+class Mask(bytes):
+    """
+    A row selection of a TrackStore: one byte per row, 1 if the row is selected.
+    Masks combine with &, | and ~, which work on whole masks at once.
+    """
+    def __and__(self, other):
+        return Mask._from_int(int.from_bytes(self, 'little') & int.from_bytes(other, 'little'), len(self))
+
+    def __or__(self, other):
+        return Mask._from_int(int.from_bytes(self, 'little') | int.from_bytes(other, 'little'), len(self))
+
+    def __invert__(self):
+        return Mask(self.translate(_INVERT))
+
+    @staticmethod
+    def _from_int(value, length):
+        # Each byte holds 0 or 1, so bitwise operations on the whole integer work byte by byte
+        return Mask(value.to_bytes(length, 'little'))
+
+    @classmethod
+    def full(cls, length):
+        return cls(b'\x01' * length)
+
+    def count(self):
+        """Number of selected rows."""
+        return bytes.count(self, 1)
+
+
+_INVERT = bytes.maketrans(b'\x00\x01', b'\x01\x00')
+
+
+class EncodedColumn:
+    """
+    A dictionary-encoded column: each distinct value is stored once, and each row holds
+    the code of its value. Code 0 is the missing value (None).
+    Predicates are evaluated once per distinct value rather than once per row.
+    """
+    __slots__ = ('values', 'codes', '_index')
+
+    def __init__(self, rows=0):
+        self.values = [None]
+        self._index = {None: 0}
+        self.codes = array('i', bytes(4 * rows))
+
+    def __len__(self):
+        return len(self.codes)
+
+    def append(self, value):
+        code = self._index.get(value)
+        if code is None:
+            code = self._index[value] = len(self.values)
+            self.values.append(value)
+        self.codes.append(code)
+
+    def __getitem__(self, row):
+        return self.values[self.codes[row]]
+
+    def code_of(self, value):
+        """The code of a value, or None if no row holds it."""
+        return self._index.get(value)
+
+    def where(self, predicate):
+        """Returns the Mask of the rows whose value satisfies `predicate` (called with None for missing values)."""
+        table = bytes(1 if predicate(value) else 0 for value in self.values)
+        return Mask(bytes(map(table.__getitem__, self.codes)))
+
+
+class TrackStore:
+    """
+    A column-oriented copy of a set of tracks, for questions asked about all of them at once
+    (missing titles, mixed artist tags, duplicate names...). Each row is one track; the
+    folder artist and album, the album folder, the filename, the new name (proposed filename,
+    or the current one), the title (proposed, or the tag), its suffixes and every tag are
+    dictionary-encoded columns, and the proposed changes are summed up in a flags column.
+
+    The store is a snapshot: it does not follow later changes of the tracks.
+    """
+    def __init__(self):
+        self.paths = []
+        self.columns = {name: EncodedColumn() for name in STORE_COLUMNS}
+        self.tags = {} # tag name -> EncodedColumn
+        self.flags = array('B')
+
+    @classmethod
+    def from_library(cls, library):
+        """Builds the store of every loaded track of a library, by artist and album."""
+        store = cls()
+        for artist in library.values():
+            for album in artist.albums:
+                for track in album.tracks:
+                    store.append(track, artist.name, album.name, album.path)
+        return store
+
+    @classmethod
+    def from_tracks(cls, tracks):
+        """Builds the store of a list of tracks, in order. Artists and albums are taken from their paths."""
+        store = cls()
+        for track in tracks:
+            album_path = os.path.dirname(track.path)
+            store.append(track, os.path.basename(os.path.dirname(album_path)), os.path.basename(album_path), album_path)
+        return store
+
+    def __len__(self):
+        return len(self.paths)
+
+    def append(self, track, artist_name, album_name, album_path):
+        """Adds a track (a Track or a TrackView) as the last row."""
+        row = len(self.paths)
+        self.paths.append(track.path)
+        columns = self.columns
+        columns['artist'].append(artist_name)
+        columns['album'].append(album_name)
+        columns['folder'].append(album_path)
+        columns['filename'].append(track.filename)
+        columns['new_name'].append(track.proposed_filename or track.filename)
+        proposed_tags = track.proposed_tags if track.has_proposed_tags else {}
+        columns['title'].append(proposed_tags.get('title', track.tags.get('title', '')))
+        columns['suffixes'].append(''.join(track.suffixes))
+
+        track_tags = track.tags
+        for name, column in self.tags.items():
+            column.append(track_tags.get(name))
+        for name, value in track_tags.items():
+            if name not in self.tags:
+                column = self.tags[name] = EncodedColumn(row)
+                column.append(value)
+
+        flags = 0
+        if proposed_tags:
+            flags |= FLAG_PROPOSED_TAGS
+        if track.proposed_filename and track.proposed_filename != track.filename:
+            flags |= FLAG_RENAME
+        if track.is_manual_rename:
+            flags |= FLAG_MANUAL_RENAME
+        if track.has_error:
+            flags |= FLAG_ERROR
+        self.flags.append(flags)
+
+    def column(self, name):
+        """Returns a column by name: one of STORE_COLUMNS, or 'tag:<name>' for a tag."""
+        if name.startswith('tag:'):
+            column = self.tags.get(name[4:])
+            # No track has this tag
+            return column if column is not None else EncodedColumn(len(self))
+        return self.columns[name]
+
+    # --- Filters ---
+    def all(self):
+        return Mask.full(len(self))
+
+    def where(self, name, predicate):
+        """Rows whose value in column `name` satisfies `predicate`."""
+        return self.column(name).where(predicate)
+
+    def equals(self, name, value):
+        """Rows whose value in column `name` is `value`."""
+        column = self.column(name)
+        code = column.code_of(value)
+        if code is None:
+            return Mask(bytes(len(self)))
+        return Mask(bytes(map(code.__eq__, column.codes)))
+
+    def missing(self, name):
+        """Rows whose value in column `name` is missing or blank."""
+        return self.where(name, lambda value: not value or not str(value).strip())
+
+    def flagged(self, flag):
+        """Rows with any of the given flags set."""
+        table = bytes(1 if value & flag else 0 for value in range(256))
+        return Mask(self.flags.tobytes().translate(table))
+
+    def contains_any(self, name, keywords):
+        """Rows whose value in column `name` contains one of `keywords`, ignoring case."""
+        keywords = [keyword.lower() for keyword in keywords]
+        return self.where(name, lambda value: bool(value) and any(keyword in value.lower() for keyword in keywords))
+
+    def map_values(self, name, function):
+        """Returns `function(value)` for the value of each row in column `name`, calling it once per distinct value."""
+        column = self.column(name)
+        results = [function(value) for value in column.values]
+        return [results[code] for code in column.codes]
+
+    # --- Results ---
+    def rows(self, mask):
+        """The row numbers selected by a mask."""
+        return list(compress(range(len(self)), mask))
+
+    def select(self, name, mask=None):
+        """The values of column `name` for the rows selected by `mask` (all rows if None)."""
+        column = self.column(name)
+        codes = column.codes if mask is None else compress(column.codes, mask)
+        return [column.values[code] for code in codes]
+
+    def group_count(self, name, mask=None):
+        """Counts the rows selected by `mask` (all rows if None) for each value of column `name`."""
+        column = self.column(name)
+        counts = Counter(column.codes if mask is None else compress(column.codes, mask))
+        return {column.values[code]: count for code, count in counts.items()}
+
+    def distinct_count(self, group_name, name, mask=None):
+        """
+        For each value of column `group_name`, counts the distinct values of column `name` among
+        the rows selected by `mask` (all rows if None). Missing values are counted as a value.
+        """
+        group_column, column = self.column(group_name), self.column(name)
+        pairs = zip(group_column.codes, column.codes)
+        counts = Counter(group for group, _ in set(pairs if mask is None else compress(pairs, mask)))
+        return {group_column.values[code]: count for code, count in counts.items()}
+
+    def duplicates(self, group_name, name):
+        """Rows whose value in column `name` is also held by another row with the same `group_name` value."""
+        keys = list(zip(self.column(group_name).codes, self.column(name).codes))
+        counts = Counter(keys)
+        return Mask(bytes(1 if counts[key] > 1 else 0 for key in keys))
@@ -61,3 +61,26 @@ DEFAULT_TAG_MAPPINGS = {
     "radio edit": "[Radio Remix]",
     "unplugged": "[Unplugged]"
 }
+
+# Number of worker threads used to read tags while scanning the library (1 = sequential)
+DEFAULT_SCAN_WORKERS = 8
+
+# Number of worker threads writing tags when saving changes (1 = one file at a time)
+DEFAULT_SAVE_WORKERS = 4
+
+# How the scan workers run: "threads", or "processes" to spread the tag parsing and title
+# cleaning over all CPU cores, one artist folder at a time
+DEFAULT_SCAN_ENGINE = "threads"
+
+# Only list the artist and album folders when scanning; tags are read when an album is opened
+DEFAULT_LAZY_SCAN = False
+
+# Watch the library folders for changes made by other programs while the app is open
+DEFAULT_WATCH_LIBRARY = True
+
+# Maximum number of folders watched at once (root and artists first, then albums)
+DEFAULT_MAX_WATCHED_FOLDERS = 20000
+
+# Layout of the generated filenames: {artist}, {title} and {suffixes}, or any tag such as
+# {album} or {tracknumber:02}. The extension of the file is always kept
+DEFAULT_FILENAME_TEMPLATE = "{artist} - {title}{suffixes}"
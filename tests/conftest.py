@@ -0,0 +1,27 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from mutagen.id3 import ID3, TIT2, TPE1, TALB
+
+# One MPEG1 Layer III frame, so mutagen can open the files
+MP3_FRAME = bytes([0xFF, 0xFB, 0x90, 0x64]) + b'\x00' * 413
+
+
+@pytest.fixture
+def make_mp3():
+    """Returns a function writing an MP3 file with the given tags, creating its folder."""
+    def make(path, title=None, artist=None, album=None):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(MP3_FRAME * 4)
+        tags = ID3()
+        for frame, value in ((TIT2, title), (TPE1, artist), (TALB, album)):
+            if value is not None:
+                tags.add(frame(encoding=3, text=value))
+        tags.save(path)
+        return str(path)
+    return make
@@ -0,0 +1,122 @@
+import random
+
+from utils.data_models import Track
+from utils.duplicate_names import DuplicateNameIndex, find_rename_collisions
+
+# Names differing in case, or in Unicode normalization (NFC and NFD)
+NAMES = ["a.mp3", "A.mp3", "b.mp3", "Caf\u00e9.mp3", "Cafe\u0301.mp3", "c.mp3"]
+FOLDERS = ["/music/A/One", "/music/A/Two"]
+
+
+def make_track(folder, filename, proposed_filename=""):
+    return Track(path=f"{folder}/{filename}", filename=filename, clean_title="", proposed_filename=proposed_filename)
+
+
+def expected_flags(tracks):
+    """has_duplicate and duplicate_count as a fresh build gives them."""
+    index = DuplicateNameIndex()
+    index.build(tracks)
+    return [track.has_duplicate for track in tracks], index.duplicate_count
+
+
+def test_update_and_remove_agree_with_a_full_build():
+    rng = random.Random(7)
+    tracks = [make_track(rng.choice(FOLDERS), f"{n}.mp3", rng.choice(NAMES)) for n in range(12)]
+    index = DuplicateNameIndex()
+    index.build(tracks)
+    indexed = list(tracks)
+
+    for _ in range(500):
+        track = rng.choice(tracks)
+        flags_before = {id(other): other.has_duplicate for other in indexed}
+        if track in indexed and rng.random() < 0.2:
+            indexed.remove(track)
+            changed = index.remove(track)
+            track.has_duplicate = False
+        else:
+            track.proposed_filename = rng.choice(NAMES + [""])
+            if track not in indexed:
+                indexed.append(track)
+            changed = index.update(track)
+
+        flags = [other.has_duplicate for other in indexed]
+        assert (flags, index.duplicate_count) == expected_flags(indexed)
+        assert index.has_duplicates == (index.duplicate_count > 0)
+        assert len(index) == len(indexed)
+        # Exactly the tracks whose flag flipped are reported
+        flipped = {id(other) for other in indexed if flags_before.get(id(other), False) != other.has_duplicate}
+        assert {id(other) for other in changed} - {id(track)} == flipped - {id(track)}
+
+
+def test_names_differing_in_case_or_normalization_clash():
+    first = make_track(FOLDERS[0], "1.mp3", "Cafe\u0301.mp3")
+    second = make_track(FOLDERS[0], "2.mp3", "CAF\u00c9.mp3")
+    elsewhere = make_track(FOLDERS[1], "3.mp3", "caf\u00e9.mp3")
+    index = DuplicateNameIndex()
+    index.build([first, second, elsewhere])
+
+    assert first.has_duplicate and second.has_duplicate
+    assert not elsewhere.has_duplicate
+    assert index.duplicate_count == 2
+
+    second.proposed_filename = "Other.mp3"
+    assert set(map(id, index.update(second))) == {id(first), id(second)}
+    assert not index.has_duplicates
+
+
+def make_folder(folder, filenames):
+    """Creates empty files in a folder and returns a track for each, keeping its name."""
+    folder.mkdir(parents=True, exist_ok=True)
+    tracks = []
+    for filename in filenames:
+        (folder / filename).touch()
+        tracks.append(make_track(str(folder), filename))
+    return tracks
+
+
+def test_renames_onto_existing_files_clash_whatever_the_case_or_normalization(tmp_path):
+    folder = tmp_path / "A" / "One"
+    to_upper, to_nfc, free = make_folder(folder, ["1.mp3", "2.mp3", "3.mp3"])
+    make_folder(folder, ["song.mp3", "Cafe\u0301.mp3"]) # The accent as a combining character (NFD)
+    to_upper.proposed_filename = "SONG.mp3"
+    to_nfc.proposed_filename = "Caf\u00e9.mp3"
+    free.proposed_filename = "other.mp3"
+
+    collisions = find_rename_collisions([to_upper, to_nfc, free])
+
+    assert [track for track, _ in collisions] == [to_upper, to_nfc]
+    assert collisions[0][1] == f"Cannot rename, file already exists: {folder / 'song.mp3'}"
+    assert collisions[1][1] == "Cannot rename, file already exists: " + str(folder / "Cafe\u0301.mp3")
+
+
+def test_two_renames_to_the_same_name_clash(tmp_path):
+    first, second, third = make_folder(tmp_path / "A" / "One", ["1.mp3", "2.mp3", "3.mp3"])
+    elsewhere, = make_folder(tmp_path / "A" / "Two", ["1.mp3"])
+    first.proposed_filename = "Caf\u00e9.mp3"
+    second.proposed_filename = "CAF\u00c9.mp3"
+    third.proposed_filename = "cafe\u0301.mp3"
+    elsewhere.proposed_filename = "Caf\u00e9.mp3"
+
+    collisions = find_rename_collisions([first, second, third, elsewhere])
+
+    assert [track for track, _ in collisions] == [second, third]
+    assert all(f"is also the new name of {first.path}" in message for _, message in collisions)
+
+
+def test_names_freed_by_the_batch_can_be_taken(tmp_path):
+    # A swap, a chain, and a change of case of the file's own name
+    a, b, c, d, e = make_folder(tmp_path / "A" / "One", ["a.mp3", "b.mp3", "c.mp3", "d.mp3", "e.mp3"])
+    a.proposed_filename, b.proposed_filename = "b.mp3", "a.mp3"
+    c.proposed_filename, d.proposed_filename = "d.mp3", "new.mp3"
+    e.proposed_filename = "E.mp3"
+
+    assert find_rename_collisions([a, b, c, d, e]) == []
+
+
+def test_names_with_a_path_separator_are_rejected(tmp_path):
+    track, = make_folder(tmp_path / "A" / "One", ["a.mp3"])
+    track.proposed_filename = "AC/DC - Song.mp3"
+
+    (collision,) = find_rename_collisions([track])
+
+    assert collision == (track, f"Cannot rename, invalid file name: 'AC/DC - Song.mp3' for {track.path}")
@@ -0,0 +1,91 @@
+from utils.data_models import Track, Library, Album
+from utils.edit_session import EditSession
+
+
+def make_track(name="a.mp3", **fields):
+    return Track(path=f"/music/A/One/{name}", filename=name, clean_title="Song",
+                 tags={'title': "Song", 'artist': "A"}, **fields)
+
+
+def test_views_write_to_the_session_not_the_track():
+    track = make_track(proposed_tags={'artist': "A"})
+    session = EditSession()
+    view, = session.views([track])
+
+    view.proposed_tags['title'] = "New"
+    view.proposed_filename = "A - New.mp3"
+
+    assert view.proposed_tags == {'artist': "A", 'title': "New"}
+    assert view.proposed_filename == "A - New.mp3"
+    assert track.proposed_tags == {'artist': "A"}
+    assert track.proposed_filename == ""
+    # Another view of the same track sees the pending edits
+    other, = session.views([track])
+    assert other.proposed_tags['title'] == "New"
+
+
+def test_setting_a_field_to_its_current_value_records_nothing():
+    track = make_track()
+    session = EditSession()
+    view, = session.views([track])
+
+    view.clean_title = "Song"
+
+    assert len(session) == 0
+
+
+def test_discard_drops_the_edits_of_the_given_tracks_only():
+    kept, dropped = make_track("a.mp3"), make_track("b.mp3", proposed_tags={'genre': "Jazz"})
+    session = EditSession()
+    kept_view, dropped_view = session.views([kept, dropped])
+    kept_view.proposed_tags['title'] = "Kept"
+    dropped_view.proposed_tags['title'] = "Dropped"
+    dropped_view.proposed_filename = "b2.mp3"
+
+    session.discard([dropped])
+
+    assert len(session) == 1
+    assert kept_view.proposed_tags['title'] == "Kept"
+    # The view reads the library track again, which was never changed
+    assert dropped_view.proposed_tags == {'genre': "Jazz"}
+    assert dropped_view.proposed_filename == ""
+    assert dropped.proposed_tags == {'genre': "Jazz"}
+
+
+def test_commit_drops_the_edits_and_clears_the_proposed_changes():
+    track = make_track(proposed_tags={'artist': "A"}, proposed_filename="x.mp3", is_manual_rename=True)
+    session = EditSession()
+    view, = session.views([track])
+    view.proposed_tags['title'] = "New"
+
+    session.commit(track)
+
+    assert len(session) == 0
+    assert not track.has_proposed_tags
+    assert track.proposed_filename == ""
+    assert not track.is_manual_rename
+    assert not view.has_proposed_tags
+    assert view.proposed_filename == ""
+
+
+def test_rebase_keeps_edits_of_unchanged_files_only():
+    unchanged = make_track("a.mp3", size=10, mtime_ns=1)
+    changed = make_track("b.mp3", size=10, mtime_ns=1)
+    removed = make_track("c.mp3", size=10, mtime_ns=1)
+    session = EditSession()
+    for view in session.views([unchanged, changed, removed]):
+        view.proposed_tags['title'] = "New"
+
+    # A rescan builds new Track objects for the same files
+    library = Library("/music")
+    album = Album(name="One", path="/music/A/One", tracks=[
+        make_track("a.mp3", size=10, mtime_ns=1),
+        make_track("b.mp3", size=10, mtime_ns=2),
+    ])
+    library.index_album(album)
+    session.rebase(library)
+
+    new_unchanged, new_changed = album.tracks
+    assert len(session) == 1
+    assert session.get_edit(new_unchanged) == {'proposed_tags': {'title': "New"}}
+    assert session.get_edit(new_changed) is None
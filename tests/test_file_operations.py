@@ -0,0 +1,207 @@
+import os
+
+import mutagen
+import pytest
+
+import utils.file_operations as file_operations
+from utils.data_models import Track
+from utils.file_operations import SaveJob, plan_save, iter_save_jobs, _rename_folder
+from utils.library_cleanup import save_tracks
+
+
+def make_files(folder, names):
+    """Creates files holding their own name, so a file can be followed through renames."""
+    os.makedirs(folder, exist_ok=True)
+    for name in names:
+        with open(os.path.join(folder, name), 'w') as f:
+            f.write(name)
+
+
+def folder_state(folder):
+    """Each file of a folder, with the name it was created with."""
+    state = {}
+    for name in os.listdir(folder):
+        with open(os.path.join(folder, name)) as f:
+            state[name] = f.read()
+    return state
+
+
+def rename_jobs(folder, renames):
+    return [SaveJob(None, os.path.join(folder, old), None, new) for old, new in renames]
+
+
+@pytest.mark.parametrize('renames', [
+    # A chain, listed in both orders
+    [("1.mp3", "2.mp3"), ("2.mp3", "3.mp3"), ("3.mp3", "4.mp3")],
+    [("3.mp3", "4.mp3"), ("2.mp3", "3.mp3"), ("1.mp3", "2.mp3")],
+    # A swap and a longer cycle
+    [("1.mp3", "2.mp3"), ("2.mp3", "1.mp3")],
+    [("1.mp3", "2.mp3"), ("2.mp3", "3.mp3"), ("3.mp3", "1.mp3")],
+    # A cycle with a chain hanging off it, and a change of case
+    [("4.mp3", "1.mp3"), ("1.mp3", "2.mp3"), ("2.mp3", "1.MP3"), ("5.mp3", "5.MP3")],
+])
+def test_rename_folder_handles_chains_and_cycles(tmp_path, renames):
+    folder = str(tmp_path)
+    make_files(folder, [old for old, _ in renames])
+    jobs = rename_jobs(folder, renames)
+
+    _rename_folder(folder, jobs)
+
+    assert [job.error for job in jobs] == [None] * len(jobs)
+    assert [job.new_path for job in jobs] == [os.path.join(folder, new) for _, new in renames]
+    # Every file got its new name, and no file was left on a temporary name
+    assert folder_state(folder) == {new: old for old, new in renames}
+
+
+def test_rename_folder_leaves_a_cycle_untouched_if_no_temporary_name_is_free(tmp_path, monkeypatch):
+    folder = str(tmp_path)
+    make_files(folder, ["1.mp3", "2.mp3", "3.mp3"])
+    jobs = rename_jobs(folder, [("1.mp3", "2.mp3"), ("2.mp3", "1.mp3"), ("3.mp3", "4.mp3")])
+
+    def no_free_name(folder, filename):
+        raise OSError(f"No free temporary name for {filename} in {folder}")
+    monkeypatch.setattr(file_operations, '_temporary_path', no_free_name)
+    _rename_folder(folder, jobs)
+
+    swap_first, swap_second, other = jobs
+    assert swap_first.error == f"Cannot rename, file already exists: {os.path.join(folder, '2.mp3')}"
+    assert swap_second.error == f"Error saving changes for {swap_second.path}: No free temporary name for 2.mp3 in {folder}"
+    assert swap_first.new_path is None and swap_second.new_path is None
+    assert other.error is None
+    assert folder_state(folder) == {"1.mp3": "1.mp3", "2.mp3": "2.mp3", "4.mp3": "3.mp3"}
+
+
+def test_rename_folder_reports_where_a_parked_file_was_left(tmp_path, monkeypatch):
+    folder = str(tmp_path)
+    make_files(folder, ["1.mp3", "2.mp3"])
+    jobs = rename_jobs(folder, [("1.mp3", "2.mp3"), ("2.mp3", "1.mp3")])
+    rename = file_operations._rename
+
+    def failing_rename(job, path, new_path):
+        if os.path.basename(path).startswith('.'):
+            job.error = f"Error saving changes for {job.path}: disk full"
+            return False
+        return rename(job, path, new_path)
+    monkeypatch.setattr(file_operations, '_rename', failing_rename)
+    _rename_folder(folder, jobs)
+
+    first, parked = jobs
+    assert first.error is None
+    parked_path = os.path.join(folder, ".2.mp3.renaming")
+    assert parked.error == f"Error saving changes for {parked.path}: disk full (the file was left as {parked_path})"
+    assert folder_state(folder) == {"2.mp3": "1.mp3", ".2.mp3.renaming": "2.mp3"}
+
+
+@pytest.fixture
+def album_tracks(tmp_path, make_mp3):
+    """Tracks of three albums, each with a new title and a new name shifting onto the next file."""
+    tracks = []
+    for album in range(3):
+        for n in range(8):
+            folder = tmp_path / f"Album {album}"
+            filename = f"{n:02d}.mp3"
+            path = make_mp3(folder / filename, title=f"Old {n}")
+            track = Track(path=path, filename=filename, clean_title=f"Old {n}", tags={'title': f"Old {n}"})
+            track.proposed_tags['title'] = f"New {n}"
+            track.proposed_filename = f"{n + 1:02d}.mp3"
+            tracks.append(track)
+    return tracks
+
+
+def read_title(path):
+    return mutagen.File(path, easy=True)['title'][0]
+
+
+# With 8 tag writes queued ahead, the last album cannot start before the 9th finishes
+@pytest.mark.parametrize('cancel_after', [1, 3, 6])
+def test_a_cancelled_save_saves_each_file_completely_or_not_at_all(album_tracks, cancel_after):
+    jobs = [plan_save(track) for track in album_tracks]
+    checks = 0
+
+    def is_cancelled():
+        nonlocal checks
+        checks += 1
+        return checks > cancel_after
+
+    yielded = [job for job, _, _ in iter_save_jobs(jobs, workers=2, is_cancelled=is_cancelled)]
+
+    assert all(job.is_done for job in yielded)
+    assert len(yielded) < len(jobs)
+    # A folder is saved completely or not at all, as its renames shift onto each other
+    for folder in {os.path.dirname(job.path) for job in jobs}:
+        assert len({job.is_done for job in jobs if os.path.dirname(job.path) == folder}) == 1
+    for job in jobs:
+        n = int(job.track.filename[:2])
+        if job.is_done:
+            assert job.error is None
+            assert job.new_path == os.path.join(os.path.dirname(job.path), job.new_filename)
+            assert read_title(job.new_path) == f"New {n}"
+        else:
+            assert job.new_path is None
+    # Files not renamed still hold their old title, under their old name or the name the
+    # next file moved away from
+    for folder in {os.path.dirname(job.path) for job in jobs}:
+        done = {job.new_filename for job in jobs if job.is_done and os.path.dirname(job.path) == folder}
+        for name in os.listdir(folder):
+            title = read_title(os.path.join(folder, name))
+            if name in done:
+                assert title == f"New {int(name[:2]) - 1}"
+            else:
+                assert title == f"Old {int(name[:2])}"
+
+
+def make_track(tags, proposed_tags, suffixes=None, proposed_filename=""):
+    return Track(path="/music/A/One/a.mp3", filename="a.mp3", clean_title="", tags=tags,
+                 proposed_tags=proposed_tags, suffixes=suffixes, proposed_filename=proposed_filename)
+
+
+def test_plan_save_of_proposals_matching_the_file_is_a_no_op():
+    track = make_track({'title': "Song", 'artist': "A"}, {'title': "Song", 'artist': "A"},
+                       proposed_filename="a.mp3")
+    job = plan_save(track)
+    assert job.is_no_op
+    assert job.tags is None and job.new_filename is None
+
+
+def test_plan_save_writes_only_the_tags_that_differ():
+    track = make_track({'title': "Song", 'artist': "A", 'album': "One"},
+                       {'title': "Song", 'artist': "B", 'album': "One", 'genre': "Jazz"},
+                       proposed_filename="B - Song.mp3")
+    job = plan_save(track)
+    assert job.tags == {'artist': "B", 'genre': "Jazz"}
+    assert job.new_filename == "B - Song.mp3"
+
+
+def test_plan_save_compares_the_title_with_its_suffixes():
+    unchanged = make_track({'title': "Song (Live)"}, {'title': "Song"}, suffixes=[" (Live)"])
+    changed = make_track({'title': "Song"}, {'title': "Song"}, suffixes=[" (Live)", " [2010]"])
+    assert plan_save(unchanged).is_no_op
+    assert plan_save(changed).tags == {'title': "Song (Live) [2010]"}
+
+
+def test_plan_save_clears_only_tags_the_file_holds():
+    track = make_track({'title': "Song", 'album': "One"}, {'album': "", 'genre': ""})
+    assert plan_save(track).tags == {'album': ""}
+
+
+def test_plan_save_writes_titles_and_artists_holding_an_apostrophe():
+    track = make_track({'title': "Don't Stop", 'artist': "Guns N' Roses", 'album': "Rock 'n' Roll"},
+                       {'title': "Don't Stop", 'artist': "Guns N' Roses", 'album': "Rock 'n' Roll"})
+    assert plan_save(track).tags == {'title': "Don't Stop", 'artist': "Guns N' Roses"}
+
+
+def test_save_tracks_does_not_open_files_already_saved(tmp_path, make_mp3):
+    unchanged_path = make_mp3(tmp_path / "A" / "One" / "1.mp3", title="Same")
+    changed_path = make_mp3(tmp_path / "A" / "One" / "2.mp3", title="Old")
+    unchanged = Track(path=unchanged_path, filename="1.mp3", clean_title="Same", tags={'title': "Same"})
+    unchanged.proposed_tags['title'] = "Same"
+    changed = Track(path=changed_path, filename="2.mp3", clean_title="Old", tags={'title': "Old"})
+    changed.proposed_tags['title'] = "New"
+    before = os.stat(unchanged_path).st_mtime_ns
+
+    success_count, errors, counts = save_tracks([unchanged, changed])
+
+    assert (success_count, errors, counts) == (2, [], (1, 0, 1))
+    assert os.stat(unchanged_path).st_mtime_ns == before
+    assert read_title(changed_path) == "New"
+    assert not unchanged.has_proposed_tags and not unchanged.has_error
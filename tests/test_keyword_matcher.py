@@ -0,0 +1,88 @@
+import re
+import random
+
+import pytest
+
+from utils.keyword_matcher import KeywordMatcher
+from utils.user_defaults import DEFAULT_BANNED_WORDS
+
+KEYWORD_LISTS = [
+    list(DEFAULT_BANNED_WORDS),
+    # Overlapping keywords, keywords that are prefixes of others, and keywords starting or
+    # ending with non-word characters
+    ["lyric", "lyrics", "lyric video", "(Short)", "( Short)", "- Music Video", "ver.", "a-b", "_x", "é"],
+]
+
+ALPHABET = "abcdehilmorstuvxyé _-().'ÉL"
+
+
+def regex_for(keyword, whole_words):
+    pattern = re.escape(keyword)
+    return rf'\b{pattern}\b' if whole_words else pattern
+
+
+def random_texts(keywords, count, seed):
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        parts = []
+        for _ in range(rng.randint(0, 5)):
+            if rng.random() < 0.4:
+                keyword = rng.choice(keywords)
+                parts.append(keyword.upper() if rng.random() < 0.3 else keyword)
+            else:
+                parts.append(''.join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 6))))
+            parts.append(rng.choice(['', ' ', '-', '(', 'x']))
+        texts.append(''.join(parts))
+    return texts
+
+
+@pytest.mark.parametrize('whole_words', [True, False])
+@pytest.mark.parametrize('keywords', KEYWORD_LISTS)
+def test_matches_like_re(keywords, whole_words):
+    matcher = KeywordMatcher(keywords, whole_words=whole_words)
+    patterns = [re.compile(regex_for(keyword, whole_words), re.IGNORECASE) for keyword in keywords]
+    alternation = re.compile('|'.join(pattern.pattern for pattern in patterns), re.IGNORECASE)
+
+    for text in random_texts(keywords, 3000, seed=len(keywords) * 2 + whole_words):
+        expected = {index for index, pattern in enumerate(patterns) if pattern.search(text)}
+        assert matcher.matches(text) == expected, text
+        assert matcher.search(text) == bool(expected), text
+        assert matcher.sub('#', text) == alternation.sub('#', text), text
+
+
+@pytest.mark.parametrize('text, whole_words, expected', [
+    ("Song (Official Video)", True, "Song (#)"),
+    ("Lyrics video", True, "# video"), # The first keyword listed wins at the same place
+    ("lyricsx", True, "lyricsx"), # Not a whole word
+    ("lyricsx", False, "#x"),
+    # A keyword starting and ending with non-word characters needs word characters around
+    # it, as with \b
+    ("A (Short) B", True, "A (Short) B"),
+    ("A(Short)B", True, "A#B"),
+])
+def test_sub_examples(text, whole_words, expected):
+    matcher = KeywordMatcher(["lyric video", "lyrics", "lyric", "(Short)", "Official Video"], whole_words=whole_words)
+    assert matcher.sub('#', text) == expected
+
+
+def test_empty_keyword_is_in_every_text():
+    matcher = KeywordMatcher(["", "x"])
+    assert matcher.search("abc")
+    assert matcher.matches("abc") == {0}
+
+
+def test_no_keywords():
+    matcher = KeywordMatcher([], whole_words=True)
+    assert not matcher
+    assert not matcher.search("anything")
+    assert matcher.sub('', "anything") == "anything"
+
+
+@pytest.mark.parametrize('whole_words', [True, False])
+def test_sub_all_is_sub_of_each_text(whole_words):
+    matcher = KeywordMatcher(["lyric video", "lyrics", "(Short)", "Official Video"], whole_words=whole_words)
+    texts = ["Song (Official Video)", "lyrics", "", "A(Short)B", "Lyrics\nvideo", "official video lyrics"]
+    assert matcher.sub_all('#', texts) == [matcher.sub('#', text) for text in texts]
+    assert matcher.sub_all('\n', texts) == [matcher.sub('\n', text) for text in texts]
+    assert matcher.sub_all('#', []) == []
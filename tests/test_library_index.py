@@ -0,0 +1,120 @@
+import os
+import shutil
+
+from utils.settings_manager import SettingsManager
+from utils.library_scanner import scan_library, refresh_library, plan_refresh, apply_refresh
+
+
+def settings_manager():
+    return SettingsManager.from_settings({'general': {
+        'supported_audio_formats': ['.mp3'], 'scan_engine': 'threads', 'lazy_scan': False,
+    }})
+
+
+def walked_indexes(library):
+    """The indexes a library should have, from walking all of its artists."""
+    tracks, albums = {}, {}
+    for artist in library.all_artists():
+        for album in artist.albums + artist.empty_albums:
+            albums[album.path] = album
+            tracks.update((track.path, track) for track in album.tracks)
+    return tracks, albums
+
+
+def assert_indexed(library):
+    tracks, albums = walked_indexes(library)
+    assert library.tracks_by_path == tracks
+    assert library.albums_by_path == albums
+
+
+def test_scan_indexes_every_track_and_album(tmp_path, make_mp3):
+    for artist in ("A", "B"):
+        for album in ("One", "Two"):
+            for n in range(3):
+                make_mp3(tmp_path / artist / album / f"{n}.mp3", title=f"Song {n}")
+    os.makedirs(tmp_path / "B" / "Empty")
+
+    library, _ = scan_library(str(tmp_path), settings_manager())
+
+    assert len(library.tracks_by_path) == 12
+    assert_indexed(library)
+    path = str(tmp_path / "A" / "Two" / "1.mp3")
+    assert library.get_track(path).path == path
+    assert library.get_album(os.path.dirname(path)).name == "Two"
+    assert library.get_album(str(tmp_path / "B" / "Empty")).tracks == []
+
+
+def test_refresh_keeps_the_indexes_in_step(tmp_path, make_mp3):
+    for artist in ("A", "B"):
+        for album in ("One", "Two"):
+            for n in range(3):
+                make_mp3(tmp_path / artist / album / f"{n}.mp3", title=f"Song {n}")
+    sm = settings_manager()
+    library, _ = scan_library(str(tmp_path), sm)
+
+    removed = str(tmp_path / "A" / "One" / "0.mp3")
+    os.remove(removed)
+    added = make_mp3(tmp_path / "A" / "Three" / "0.mp3", title="New")
+    shutil.rmtree(tmp_path / "B" / "Two")
+    make_mp3(tmp_path / "C" / "Only" / "0.mp3", title="Other")
+    refresh_library(library, sm)
+
+    assert_indexed(library)
+    assert library.get_track(removed) is None
+    assert library.get_track(added) is not None
+    assert library.get_album(str(tmp_path / "B" / "Two")) is None
+    assert library.get_album(str(tmp_path / "C" / "Only")) is not None
+
+
+def test_reindex_track_follows_a_rename(tmp_path, make_mp3):
+    make_mp3(tmp_path / "A" / "One" / "old.mp3", title="Song")
+    library, _ = scan_library(str(tmp_path), settings_manager())
+    old_path = str(tmp_path / "A" / "One" / "old.mp3")
+    track = library.get_track(old_path)
+
+    track.path = str(tmp_path / "A" / "One" / "new.mp3")
+    library.reindex_track(track, old_path)
+
+    assert library.get_track(old_path) is None
+    assert library.get_track(track.path) is track
+
+
+def test_refresh_checking_files_reads_files_edited_in_place(tmp_path, make_mp3):
+    edited = make_mp3(tmp_path / "A" / "One" / "0.mp3", title="Old")
+    make_mp3(tmp_path / "A" / "One" / "1.mp3", title="Kept")
+    sm = settings_manager()
+    library, _ = scan_library(str(tmp_path), sm)
+    kept = library.get_track(str(tmp_path / "A" / "One" / "1.mp3"))
+    album_path = str(tmp_path / "A" / "One")
+    album_mtime = os.stat(album_path).st_mtime_ns
+
+    # Another program rewrites the tags, which does not change the folder's mtime
+    make_mp3(edited, title="Edited in place")
+    stat = os.stat(edited)
+    os.utime(edited, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    os.utime(album_path, ns=(album_mtime, album_mtime))
+
+    assert refresh_library(library, sm) == (set(), set())
+    assert library.get_track(edited).tags['title'] == "Old"
+
+    assert refresh_library(library, sm, check_files=True) == (set(), {album_path})
+    assert library.get_track(edited).tags['title'] == "Edited in place"
+    assert library.get_track(kept.path) is kept
+    assert_indexed(library)
+
+
+def test_planning_a_refresh_leaves_the_library_untouched(tmp_path, make_mp3):
+    make_mp3(tmp_path / "A" / "One" / "0.mp3", title="Song")
+    sm = settings_manager()
+    library, _ = scan_library(str(tmp_path), sm)
+    added = make_mp3(tmp_path / "A" / "One" / "1.mp3", title="New")
+    make_mp3(tmp_path / "B" / "Two" / "0.mp3", title="Other")
+    album_path = str(tmp_path / "A" / "One")
+
+    refresh = plan_refresh(library, sm, dirs={str(tmp_path), album_path})
+
+    assert library.get_track(added) is None
+    assert sorted(library) == ["A"]
+    assert apply_refresh(library, refresh, sm) == ({"B"}, {album_path, str(tmp_path / "B" / "Two")})
+    assert library.get_track(added).tags['title'] == "New"
+    assert_indexed(library)
@@ -0,0 +1,53 @@
+import os
+
+from utils.settings_manager import SettingsManager
+from utils.library_scanner import scan_library, refresh_library
+from utils.library_snapshot import save_snapshot, load_snapshot, library_folder_states, find_changed_folders
+
+
+def settings_manager():
+    return SettingsManager.from_settings({'general': {
+        'supported_audio_formats': ['.mp3'], 'scan_engine': 'threads', 'lazy_scan': False,
+    }})
+
+
+def library_state(library):
+    return sorted((artist.name, album.name, track.filename, sorted(track.tags.items()), track.size, track.mtime_ns)
+                  for artist in library.all_artists() for album in artist.albums for track in album.tracks)
+
+
+def test_a_snapshot_restores_the_library(tmp_path, make_mp3):
+    for album in ("One", "Two"):
+        for n in range(3):
+            make_mp3(tmp_path / "lib" / "A" / album / f"{n}.mp3", title=f"Song {n}", artist="A")
+    library, warnings = scan_library(str(tmp_path / "lib"), settings_manager())
+    snapshot_path = str(tmp_path / "library_snapshot.json")
+
+    save_snapshot(snapshot_path, library, warnings)
+    restored, restored_warnings = load_snapshot(snapshot_path, str(tmp_path / "lib"))
+
+    assert library_state(restored) == library_state(library)
+    assert restored_warnings == warnings
+    assert restored.is_complete
+    assert load_snapshot(snapshot_path, str(tmp_path / "other")) is None
+
+
+def test_files_edited_in_place_are_found_and_read_again(tmp_path, make_mp3):
+    edited = make_mp3(tmp_path / "A" / "One" / "0.mp3", title="Old")
+    make_mp3(tmp_path / "A" / "One" / "1.mp3", title="Kept")
+    make_mp3(tmp_path / "A" / "Two" / "0.mp3", title="Other")
+    sm = settings_manager()
+    library, _ = scan_library(str(tmp_path), sm)
+    album_path = str(tmp_path / "A" / "One")
+    album_mtime = os.stat(album_path).st_mtime_ns
+    assert find_changed_folders(library_folder_states(library)) == set()
+
+    make_mp3(edited, title="Edited in place")
+    stat = os.stat(edited)
+    os.utime(edited, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    os.utime(album_path, ns=(album_mtime, album_mtime))
+
+    changed = find_changed_folders(library_folder_states(library))
+    assert changed == {album_path}
+    refresh_library(library, sm, dirs=changed)
+    assert library.get_track(edited).tags['title'] == "Edited in place"